@@ -1,16 +1,73 @@
+import glob
+import json
 import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Optional
+
 import requests
-from typing import List, Dict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from monitoring.metrics import (ALERTMANAGER_SENT, ALERTMANAGER_SPOOLED, ALERTMANAGER_DROPPED,
+                                    ALERTMANAGER_QUEUE_DEPTH, ALERTMANAGER_BATCH_LATENCY)
+except ImportError:
+    ALERTMANAGER_SENT = ALERTMANAGER_SPOOLED = ALERTMANAGER_DROPPED = None
+    ALERTMANAGER_QUEUE_DEPTH = ALERTMANAGER_BATCH_LATENCY = None
+
 
 class AlertmanagerClient:
-    def __init__(self, base_url: str, timeout: int = 5):
+    # send_alerts()는 bounded 큐에 넣고 바로 반환
+    # worker 스레드가 max_batch_size개 또는 flush_interval초 단위로 묶어 keep-alive 세션으로 /api/v2/alerts에 POST
+    # 재시도까지 실패하면 배치를 spool_dir에 JSON 파일로 내려두고, Alertmanager가 복구되면 오래된 순으로 재전송
+    # spool_dir이 없으면 실패·backoff 중 배치를 메모리에 보관(최대 queue_size개 alert)했다가 backoff 후 재전송
+    def __init__(self, base_url: str, timeout: int = 5, max_batch_size: int = 500,
+                 flush_interval: float = 1.0, queue_size: int = 10000, max_retries: int = 3,
+                 backoff_factor: float = 0.5, max_backoff: float = 60.0, spool_dir: Optional[str] = None):
         self.base_url = base_url.rstrip('/')
+        self.url = f"{self.base_url}/api/v2/alerts"
         self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.spool_dir = spool_dir
+        self.queue_size = queue_size
+        self._held: List[List[Dict]] = []
+        self._held_count = 0
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+        self.sent = 0
+        self.spooled = 0
+        self.dropped = 0
+        # 연속 실패 횟수와 다음 전송 시도 시각 (장애 중에는 배치를 바로 spool)
+        self._failures = 0
+        self._retry_at = 0.0
+        self._spool_seq = 0
+
+        # Alertmanager는 같은 label set의 alert를 덮어쓰므로 POST 재시도가 안전
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['POST']),
+            respect_retry_after_header=True
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_maxsize=1, max_retries=retry))
+        self.session.mount('http://', HTTPAdapter(pool_maxsize=1, max_retries=retry))
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._worker = threading.Thread(target=self._run, name='alertmanager-client', daemon=True)
+        self._worker.start()
         logging.info(f"AlertmanagerClient initialized with URL: {self.base_url}")
 
-    def send_alerts(self, alerts: List[Dict]):
+    def send_alerts(self, alerts: List[Dict]) -> int:
         """
-        Alertmanager로 alerts 리스트 보내기
+        Alertmanager로 보낼 alerts를 큐에 넣음 (전송은 백그라운드에서 배치로 수행)
         Each alert dict should follow Alertmanager API spec 예시
           {
             'labels': {'alertname': 'AnomalyDetected', ...},
@@ -18,15 +75,183 @@ class AlertmanagerClient:
             'startsAt': '2025-05-30T02:00:00Z',
             'endsAt': '0001-01-01T00:00:00Z'
           }
+        큐가 가득 차면 넘치는 alert는 spool_dir에 기록 (spool_dir이 없으면 버림)
+        반환값은 큐에 들어간 alert 수
         """
-        url = f"{self.base_url}/api/v1/alerts"
+        accepted = 0
+        overflow = []
+        for alert in alerts:
+            try:
+                self._queue.put_nowait(alert)
+                accepted += 1
+            except queue.Full:
+                overflow.append(alert)
+        if overflow:
+            if self.spool_dir:
+                self._spool(overflow)
+            else:
+                self.dropped += len(overflow)
+                if ALERTMANAGER_DROPPED is not None:
+                    ALERTMANAGER_DROPPED.inc(len(overflow))
+                logging.error(f"Alertmanager queue full; dropped {len(overflow)} alerts")
+        self._observe_depth()
+        return accepted
+
+    def _observe_depth(self):
+        if ALERTMANAGER_QUEUE_DEPTH is not None:
+            ALERTMANAGER_QUEUE_DEPTH.set(self._queue.qsize())
+
+    def _next_batch(self) -> Optional[List[Dict]]:
+        # 첫 alert 이후 flush_interval이 지나거나 max_batch_size가 차면 반환, 종료 신호면 None
         try:
-            resp = requests.post(url, json=alerts, timeout=self.timeout)
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        if first is None:
+            self._queue.task_done()
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get_nowait() if remaining <= 0 else self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # 종료 신호는 현재 배치를 보낸 뒤 처리하도록 되돌려 놓음
+                self._queue.task_done()
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                # 종료 전에 보관 중인 배치를 한 번 더 시도
+                self._replay_held()
+                if self._held_count:
+                    self._drop(self._held_count)
+                    self._held, self._held_count = [], 0
+                return
+            try:
+                if batch:
+                    self._deliver(batch)
+                if self._failures == 0 or time.monotonic() >= self._retry_at:
+                    self._replay_held()
+                    self._replay_spool()
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                self._observe_depth()
+
+    def _post(self, alerts: List[Dict]) -> bool:
+        # False면 재시도 대상 (연결 오류·429·5xx), 영구 실패(그 외 4xx)는 버리고 True
+        start = time.perf_counter()
+        try:
+            resp = self.session.post(self.url, json=alerts, timeout=self.timeout)
             resp.raise_for_status()
-            logging.info(f"Sent {len(alerts)} alerts to Alertmanager")
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status is not None and 400 <= status < 500 and status != 429:
+                # 429 외 4xx는 재전송해도 같은 결과 → 재시도하지 않고 버림 (뒤 배치가 막히지 않도록)
+                self._drop(len(alerts), f"Alertmanager rejected batch ({e})")
+                return True
+            return self._fail(alerts, e)
         except Exception as e:
-            logging.error(f"Failed to send alerts to Alertmanager: {e}")
-            raise
+            return self._fail(alerts, e)
+        self._failures = 0
+        self.sent += len(alerts)
+        if ALERTMANAGER_SENT is not None:
+            ALERTMANAGER_SENT.inc(len(alerts))
+            ALERTMANAGER_BATCH_LATENCY.observe(time.perf_counter() - start)
+        logging.debug(f"Sent {len(alerts)} alerts to Alertmanager")
+        return True
+
+    def _fail(self, alerts: List[Dict], e: Exception) -> bool:
+        self._failures += 1
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** self._failures))
+        self._retry_at = time.monotonic() + delay
+        logging.error(f"Failed to send {len(alerts)} alerts to Alertmanager: {e}; next attempt in {delay:.1f}s")
+        return False
+
+    def _deliver(self, batch: List[Dict]):
+        # 장애 backoff 중이거나 보관 중인 배치가 있으면 전송을 시도하지 않고 바로 spool/보관 (순서 유지)
+        if self._held or (self._failures and time.monotonic() < self._retry_at):
+            self._spool_or_hold(batch)
+        elif not self._post(batch):
+            self._spool_or_hold(batch)
+
+    def _spool_or_hold(self, batch: List[Dict]):
+        if self.spool_dir:
+            self._spool(batch)
+            return
+        # 넘치면 오래된 배치부터 버림
+        self._held.append(batch)
+        self._held_count += len(batch)
+        while self._held_count > self.queue_size:
+            oldest = self._held.pop(0)
+            self._held_count -= len(oldest)
+            self._drop(len(oldest))
+
+    def _drop(self, n: int, reason: str = 'Alertmanager unavailable'):
+        self.dropped += n
+        if ALERTMANAGER_DROPPED is not None:
+            ALERTMANAGER_DROPPED.inc(n)
+        logging.error(f"{reason}; dropped {n} alerts")
+
+    def _replay_held(self):
+        # 보관 중인 배치를 오래된 순으로 재전송, 실패하면 다음 backoff 시점까지 중단
+        while self._held:
+            if not self._post(self._held[0]):
+                return
+            self._held_count -= len(self._held.pop(0))
+
+    def _spool(self, alerts: List[Dict]):
+        # 임시 파일에 쓴 뒤 rename → 재전송 쪽은 완성된 파일만 봄
+        self._spool_seq += 1
+        name = f"batch-{time.time_ns():020d}-{os.getpid()}-{self._spool_seq:06d}.json"
+        tmp = os.path.join(self.spool_dir, '.' + name)
+        with open(tmp, 'w') as f:
+            json.dump(alerts, f)
+        os.replace(tmp, os.path.join(self.spool_dir, name))
+        self.spooled += len(alerts)
+        if ALERTMANAGER_SPOOLED is not None:
+            ALERTMANAGER_SPOOLED.inc(len(alerts))
+
+    def spool_files(self) -> List[str]:
+        if not self.spool_dir:
+            return []
+        return sorted(glob.glob(os.path.join(self.spool_dir, 'batch-*.json')))
+
+    def _replay_spool(self):
+        # 오래된 spool부터 재전송, 하나라도 실패하면 다음 backoff 시점까지 중단
+        for path in self.spool_files():
+            with open(path) as f:
+                alerts = json.load(f)
+            if not self._post(alerts):
+                return
+            os.remove(path)
+            logging.info(f"Replayed {len(alerts)} spooled alerts from {os.path.basename(path)}")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        # 큐에 쌓인 alert가 모두 전송(또는 spool)될 때까지 대기
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        # 남은 alert를 보낸 뒤 worker 종료 (미전송분은 spool에 남아 다음 실행에서 재전송)
+        if not self.flush(timeout):
+            logging.warning(f"AlertmanagerClient closed with {self._queue.qsize()} alerts still queued")
+            return
+        self._queue.put(None)
+        self._worker.join(timeout)
 
 
 if __name__ == '__main__':
@@ -45,3 +270,4 @@ if __name__ == '__main__':
         'endsAt': '0001-01-01T00:00:00Z'
     }
     client.send_alerts([alert])
+    client.close(timeout=10)
@@ -0,0 +1,84 @@
+import logging
+import queue
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class SlackDispatcher:
+    # 탐지와 분리된 백그라운드 Slack Webhook 전송
+    # submit()은 큐에 넣고 바로 반환, worker 스레드가 keep-alive 세션으로 순서대로 전송
+    # 429/5xx는 Retry-After 헤더를 따르는 backoff 재시도, 메시지 간 최소 간격으로 rate limit 회피
+    def __init__(self, webhook_url: str, timeout: float = 5.0, max_retries: int = 5,
+                 backoff_factor: float = 1.0, min_interval: float = 1.0, queue_size: int = 1000):
+        self.webhook_url = webhook_url
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['POST']),
+            respect_retry_after_header=True
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_maxsize=1, max_retries=retry))
+        self.session.mount('http://', HTTPAdapter(pool_maxsize=1, max_retries=retry))
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._worker = threading.Thread(target=self._drain, name='slack-dispatcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> bool:
+        # 큐가 가득 차면 탐지를 막지 않고 버림
+        try:
+            self._queue.put_nowait(text)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logging.error("Slack queue full; dropping alert message")
+            return False
+
+    def _drain(self):
+        last_sent = 0.0
+        while True:
+            text = self._queue.get()
+            try:
+                if text is None:
+                    return
+                wait = self.min_interval - (time.monotonic() - last_sent)
+                if wait > 0:
+                    time.sleep(wait)
+                try:
+                    resp = self.session.post(self.webhook_url, json={"text": text}, timeout=self.timeout)
+                    resp.raise_for_status()
+                    self.sent += 1
+                except Exception as e:
+                    self.failed += 1
+                    logging.error("Slack alert failed: %s", e)
+                last_sent = time.monotonic()
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        # 큐에 쌓인 메시지가 모두 전송(또는 실패)될 때까지 대기
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        # 남은 메시지를 전송한 뒤 worker 종료 (CronJob 종료 직전 호출)
+        if not self.flush(timeout):
+            logging.warning("Slack dispatcher closed with %d undelivered messages", self._queue.qsize())
+            return
+        self._queue.put(None)
+        self._worker.join(timeout)
@@ -0,0 +1,459 @@
+import heapq
+import logging
+import re
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from storage.state_store import StateStore
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_epoch(ts: datetime) -> float:
+    return (ts - _EPOCH).total_seconds()
+
+
+def _from_epoch(seconds: float) -> datetime:
+    return _EPOCH + timedelta(seconds=seconds)
+
+
+class ExpiringKeyIndex:
+    # alert_id별 상태를 마지막 갱신 순서로 보관: 앞쪽부터 ttl이 지났거나 max_keys를 넘은 key를 제거
+    # 갱신 시각이 단조 증가하므로 OrderedDict 순서가 곧 만료 순서 → 갱신·만료 모두 amortized O(1)
+    def __init__(self, ttl: timedelta, max_keys: int):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.evicted = 0
+        self._entries: 'OrderedDict[str, Tuple[datetime, Any]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        return default if entry is None else entry[1]
+
+    def entry(self, key: str) -> Optional[Tuple[datetime, Any]]:
+        return self._entries.get(key)
+
+    def put(self, key: str, value: Any, now: datetime):
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        self.expire(now)
+
+    def expire(self, now: datetime):
+        entries = self._entries
+        cutoff = now - self.ttl
+        while entries:
+            stamp, _ = next(iter(entries.values()))
+            if stamp >= cutoff and len(entries) <= self.max_keys:
+                break
+            entries.popitem(last=False)
+            self.evicted += 1
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for key, (_, value) in self._entries.items():
+            yield key, value
+
+
+class PersistentState(ABC):
+    # ExpiringKeyIndex를 StateStore 앞단 캐시로 사용: 처음 보는 key만 store에서 읽고,
+    # 변경된 key는 모아 두었다가 flush()에서 한 번에 기록 (시작 시 전체 로드 없음)
+    namespace = ''
+
+    def __init__(self, index: ExpiringKeyIndex, store: Optional[StateStore], namespace: Optional[str]):
+        self._index = index
+        self.store = store
+        self.namespace = namespace or self.namespace
+        self._dirty: Set[str] = set()
+        self._fetched: Set[str] = set()
+
+    @abstractmethod
+    def _encode(self, value: Any) -> bytes:
+        ...
+
+    @abstractmethod
+    def _decode(self, blob: bytes, updated: datetime) -> Any:
+        ...
+
+    def prefetch(self, keys: Iterable[str]):
+        # 메모리에 없는 key를 store에서 한 번의 조회로 읽어 옴
+        if self.store is None:
+            return
+        missing = {k for k in keys if k not in self._index and k not in self._fetched}
+        if not missing:
+            return
+        self._fetched |= missing
+        cutoff = datetime.utcnow() - self._index.ttl
+        for key, (updated, blob) in self.store.get_many(self.namespace, missing).items():
+            stamp = _from_epoch(updated)
+            if stamp >= cutoff:
+                self._index.put(key, self._decode(blob, stamp), stamp)
+
+    def _load(self, key: str):
+        if self.store is not None and key not in self._index and key not in self._fetched:
+            self.prefetch((key,))
+
+    def _touch(self, key: str):
+        if self.store is not None:
+            self._dirty.add(key)
+
+    def flush(self):
+        # 변경분을 store에 일괄 기록하고 window가 지난 key는 store에서도 삭제
+        if self.store is None:
+            return
+        items = {}
+        for key in self._dirty:
+            entry = self._index.entry(key)
+            if entry is not None:
+                items[key] = (_to_epoch(entry[0]), self._encode(entry[1]))
+        self.store.put_many(self.namespace, items)
+        self.store.prune(self.namespace, _to_epoch(datetime.utcnow() - self._index.ttl))
+        self._dirty.clear()
+        self._fetched.clear()
+
+
+class FlappingSuppressor(PersistentState):
+    # Flapping(진동) 필터링: 동일 alert_id가 short window 내에 반복 발생할 때 억제
+    namespace = 'flapping'
+
+    def __init__(self, window: timedelta, threshold: int, max_keys: int = 100000,
+                 store: Optional[StateStore] = None, namespace: Optional[str] = None):
+        self.window = window
+        self.threshold = threshold
+        # 각 alert_id별 최근 발생 시각 (threshold개만 있으면 판정 가능하므로 deque 길이 제한)
+        self.history = ExpiringKeyIndex(window, max_keys)
+        super().__init__(self.history, store, namespace)
+
+    def _encode(self, value: deque) -> bytes:
+        # 발생 시각 epoch 초를 float64 배열로
+        return array('d', map(_to_epoch, value)).tobytes()
+
+    def _decode(self, blob: bytes, updated: datetime) -> deque:
+        return deque(map(_from_epoch, array('d', blob)), maxlen=self.threshold)
+
+    def _record(self, alert_id: str, now: datetime) -> int:
+        # 발생 기록 후 window 내 발생 횟수 반환
+        times: Optional[deque] = self.history.get(alert_id)
+        if times is None:
+            times = deque(maxlen=self.threshold)
+        # window를 벗어난 기록은 앞에서부터 제거
+        while times and now - times[0] > self.window:
+            times.popleft()
+        times.append(now)
+        self.history.put(alert_id, times, now)
+        self._touch(alert_id)
+        return len(times)
+
+    def should_suppress(self, alert_id: str, now: Optional[datetime] = None) -> bool:
+        now = now or datetime.utcnow()
+        self._load(alert_id)
+        count = self._record(alert_id, now)
+        if count >= self.threshold:
+            logging.warning(f"Suppressing flapping alert '{alert_id}': {count} occurrences within {self.window}")
+            return True
+        return False
+
+    def suppress_many(self, alert_ids: Sequence[str], now: datetime) -> List[bool]:
+        # should_suppress를 순서대로 적용한 것과 같은 결과, 건별 로그 없이 하나의 시각으로 판정
+        self.prefetch(alert_ids)
+        return [self._record(a, now) >= self.threshold for a in alert_ids]
+
+class Deduplicator(PersistentState):
+    # 중복 제거: 동일 alert_id가 dedup_window 내에 다시 들어오면 억제
+    namespace = 'dedup'
+
+    def __init__(self, dedup_window: timedelta, max_keys: int = 100000,
+                 store: Optional[StateStore] = None, namespace: Optional[str] = None):
+        self.dedup_window = dedup_window
+        self.last_seen = ExpiringKeyIndex(dedup_window, max_keys)
+        super().__init__(self.last_seen, store, namespace)
+
+    def _encode(self, value: datetime) -> bytes:
+        # 마지막 발생 시각은 store의 갱신 시각과 같으므로 값은 비워 둠
+        return b''
+
+    def _decode(self, blob: bytes, updated: datetime) -> datetime:
+        return updated
+
+    def _seen(self, alert_id: str, now: datetime) -> Optional[datetime]:
+        # window 내 이전 발생 시각 반환, 없으면 now로 기록하고 None
+        last = self.last_seen.get(alert_id)
+        if last and now - last <= self.dedup_window:
+            return last
+        self.last_seen.put(alert_id, now, now)
+        self._touch(alert_id)
+        return None
+
+    def is_duplicate(self, alert_id: str, now: Optional[datetime] = None) -> bool:
+        now = now or datetime.utcnow()
+        self._load(alert_id)
+        last = self._seen(alert_id, now)
+        if last is not None:
+            logging.info(f"Duplicate alert '{alert_id}' suppressed (last at {last})")
+            return True
+        return False
+
+    def duplicates(self, alert_ids: Sequence[str], now: datetime) -> List[bool]:
+        # is_duplicate를 순서대로 적용한 것과 같은 결과, 건별 로그 없이 하나의 시각으로 판정
+        self.prefetch(alert_ids)
+        return [self._seen(a, now) is not None for a in alert_ids]
+
+class Matcher:
+    # Alertmanager 방식 label matcher: = (일치), != (불일치), =~ (정규식), !~ (정규식 불일치)
+    _SYNTAX = re.compile(r'^\s*([A-Za-z_][A-Za-z0-9_]*)\s*(=~|!~|!=|=)\s*"?(.*?)"?\s*$')
+
+    def __init__(self, name: str, value: Any, is_regex: bool = False, is_equal: bool = True):
+        self.name = name
+        self.value = value
+        self.is_regex = is_regex
+        self.is_equal = is_equal
+        # Alertmanager와 같이 정규식은 값 전체에 anchor
+        self.pattern = re.compile(str(value)) if is_regex else None
+
+    @classmethod
+    def parse(cls, spec: Any) -> 'Matcher':
+        # 'severity=~"warn|info"' 문자열 또는 Alertmanager silence API의 matcher dict
+        if isinstance(spec, dict):
+            return cls(spec['name'], spec['value'], spec.get('isRegex', False), spec.get('isEqual', True))
+        m = cls._SYNTAX.match(spec)
+        if not m:
+            raise ValueError(f"Invalid matcher: {spec!r}")
+        name, op, value = m.groups()
+        return cls(name, value, is_regex=op in ('=~', '!~'), is_equal=op in ('=', '=~'))
+
+    @property
+    def indexable(self) -> bool:
+        # 빈 값·None 일치는 label이 없는 경우도 매치하므로 inverted index에 넣지 않음
+        return self.is_equal and not self.is_regex and self.value not in (None, '')
+
+    def matches(self, labels: Dict[str, Any]) -> bool:
+        actual = labels.get(self.name)
+        if self.pattern is not None:
+            hit = self.pattern.fullmatch('' if actual is None else str(actual)) is not None
+        else:
+            hit = actual == self.value or (actual is None and self.value == '')
+        return hit == self.is_equal
+
+
+class MuteRule:
+    # 하나의 뮤트: matcher 전부 만족 + startsAt <= now < endsAt 일 때 매치
+    def __init__(self, rule_id: int, matchers: List[Matcher],
+                 starts_at: Optional[datetime] = None, ends_at: Optional[datetime] = None):
+        self.id = rule_id
+        indexed = sorted(((m.name, m.value) for m in matchers if m.indexable), key=lambda item: item[0])
+        # (label 이름 tuple, 값 tuple): MuteList index key
+        self.key = (tuple(name for name, _ in indexed), tuple(value for _, value in indexed))
+        self.rest = [m for m in matchers if not m.indexable]
+        self.starts_at = starts_at
+        self.ends_at = ends_at
+
+    def active(self, now: datetime) -> bool:
+        return ((self.starts_at is None or self.starts_at <= now)
+                and (self.ends_at is None or now < self.ends_at))
+
+
+def _utc(value: Any) -> Optional[datetime]:
+    # ISO8601 문자열('...Z' 포함)·datetime → utcnow()와 비교 가능한 naive UTC
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class MuteList:
+    # 뮤팅: 특정 라벨 조합이 매치되면 완전 억제 -> mutes: List of label dicts to mute
+    # rule을 일치 matcher의 label 이름 조합별로 묶고, 조합 안에서는 값 tuple → rule id로 index
+    # alert마다 조합 수만큼 dict 조회 후 후보만 정규식·부정 matcher와 시간 범위를 검사 → rule 수와 무관한 비용
+    # 각 mute는 label dict({'alertname': 'foo'}) 또는 Alertmanager silence 형식
+    #   {'matchers': ['severity=~"warn|info"', {'name': 'instance', 'value': 'db1', 'isEqual': False}],
+    #    'startsAt': '2025-05-30T02:00:00Z', 'endsAt': '2025-05-30T04:00:00Z'}
+    def __init__(self, mutes: List[Dict[str, Any]]):
+        self.rules: Dict[int, MuteRule] = {}
+        # (label 이름 tuple) → (값 tuple) → rule ids, 일치 matcher가 없는 rule은 이름 tuple ()에 모임
+        self._index: Dict[Tuple[str, ...], Dict[Tuple[Any, ...], Set[int]]] = {}
+        # endsAt 순 min-heap: 만료된 rule만 index에서 빼므로 전체 재구성이 필요 없음
+        self._expiry: List[Tuple[datetime, int]] = []
+        self._next_id = 0
+        for mute in mutes:
+            self.add(mute)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def add(self, mute: Dict[str, Any]) -> int:
+        if 'matchers' in mute:
+            rule = MuteRule(self._next_id, [Matcher.parse(spec) for spec in mute['matchers']],
+                            _utc(mute.get('startsAt')), _utc(mute.get('endsAt')))
+        else:
+            rule = MuteRule(self._next_id, [Matcher(k, v) for k, v in mute.items()])
+        self._next_id += 1
+        self.rules[rule.id] = rule
+        names, values = rule.key
+        self._index.setdefault(names, {}).setdefault(values, set()).add(rule.id)
+        if rule.ends_at is not None:
+            heapq.heappush(self._expiry, (rule.ends_at, rule.id))
+        return rule.id
+
+    def remove(self, rule_id: int):
+        rule = self.rules.pop(rule_id, None)
+        if rule is None:
+            return
+        names, values = rule.key
+        group = self._index[names]
+        group[values].discard(rule_id)
+        if not group[values]:
+            del group[values]
+            if not group:
+                del self._index[names]
+
+    def expire(self, now: Optional[datetime] = None):
+        now = now or datetime.utcnow()
+        while self._expiry and self._expiry[0][0] <= now:
+            _, rule_id = heapq.heappop(self._expiry)
+            self.remove(rule_id)
+
+    def match(self, labels: Dict[str, Any], now: Optional[datetime] = None) -> Optional[MuteRule]:
+        now = now or datetime.utcnow()
+        self.expire(now)
+        for names, group in self._index.items():
+            try:
+                rule_ids = group.get(tuple(labels[name] for name in names))
+            except (KeyError, TypeError):
+                continue
+            for rule_id in rule_ids or ():
+                rule = self.rules[rule_id]
+                if rule.active(now) and all(m.matches(labels) for m in rule.rest):
+                    return rule
+        return None
+
+    def is_muted(self, labels: Dict[str, Any], now: Optional[datetime] = None) -> bool:
+        if self.match(labels, now) is not None:
+            logging.info(f"Muted alert with labels {labels}")
+            return True
+        return False
+
+    def muted_many(self, labels: Sequence[Dict[str, Any]], now: datetime) -> List[bool]:
+        # 같은 label 조합은 한 번만 매칭 (alert storm은 대부분 반복되는 조합)
+        self.expire(now)
+        decided: Dict[Tuple, bool] = {}
+        out = []
+        for item in labels:
+            try:
+                key = tuple(item.items())
+                muted = decided.get(key)
+            except TypeError:
+                key, muted = None, None
+            if muted is None:
+                muted = self.match(item, now) is not None
+                if key is not None:
+                    decided[key] = muted
+            out.append(muted)
+        return out
+
+
+def filter_alerts(
+    alerts: List[Dict[str, Any]],
+    flapping: FlappingSuppressor,
+    deduplicator: Deduplicator,
+    mute_list: MuteList,
+    now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    
+    #flapping, deduplication, muting을 순차 적용하여 최종 전송할 alerts 반환
+    #now를 주면 모든 판정에 같은 시각 사용 (없으면 alert마다 현재 시각)
+    #store가 있으면 이번 batch의 alert_id 상태를 한 번에 읽고, 끝에서 변경분을 한 번에 기록
+    
+    alert_ids = {alert.get('labels', {}).get('alertname', '') for alert in alerts}
+    deduplicator.prefetch(alert_ids)
+    flapping.prefetch(alert_ids)
+    filtered = []
+    for alert in alerts:
+        alert_id = alert.get('labels', {}).get('alertname', '')
+        # 뮤팅
+        if mute_list.is_muted(alert.get('labels', {}), now):
+            continue
+        # 중복 제거
+        if deduplicator.is_duplicate(alert_id, now):
+            continue
+        # flapping 억제
+        if flapping.should_suppress(alert_id, now):
+            continue
+        filtered.append(alert)
+    deduplicator.flush()
+    flapping.flush()
+    return filtered
+
+
+def suppression_mask(
+    alert_ids: Sequence[str],
+    labels: Sequence[Dict[str, Any]],
+    flapping: FlappingSuppressor,
+    deduplicator: Deduplicator,
+    mute_list: MuteList,
+    now: Optional[datetime] = None
+) -> List[bool]:
+    # 컬럼 형태(alert_id 목록 + labels 목록) 입력에 대해 전송 여부 mask 반환
+    # 모든 판정은 하나의 시각 now 기준이고, 결과는 같은 now로 filter_alerts를 건별 적용한 것과 같음:
+    # 같은 시각에는 batch 안의 두 번째 이후 같은 alert_id가 항상 중복이므로,
+    # 뮤트되지 않은 alert_id별 첫 발생만 dedup·flapping 상태를 조회·갱신
+    now = now or datetime.utcnow()
+    muted = mute_list.muted_many(labels, now)
+    firsts: List[int] = []
+    seen: Set[str] = set()
+    for i, (alert_id, is_muted) in enumerate(zip(alert_ids, muted)):
+        if not is_muted and alert_id not in seen:
+            seen.add(alert_id)
+            firsts.append(i)
+    live = len(alert_ids) - sum(muted)
+    duplicate = deduplicator.duplicates([alert_ids[i] for i in firsts], now)
+    candidates = [i for i, dup in zip(firsts, duplicate) if not dup]
+    suppressed = flapping.suppress_many([alert_ids[i] for i in candidates], now)
+    keep = [False] * len(alert_ids)
+    for i, flap in zip(candidates, suppressed):
+        keep[i] = not flap
+    deduplicator.flush()
+    flapping.flush()
+    sent = len(candidates) - sum(suppressed)
+    logging.info("Filtered %d alerts: %d muted, %d duplicate, %d flapping, %d to send",
+                 len(alert_ids), len(alert_ids) - live, live - len(candidates), sum(suppressed), sent)
+    return keep
+
+
+def filter_alerts_batch(
+    alerts: List[Dict[str, Any]],
+    flapping: FlappingSuppressor,
+    deduplicator: Deduplicator,
+    mute_list: MuteList,
+    now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    # filter_alerts의 batch 버전: alert storm에서 건별 시각 계산·로그 없이 한 번에 판정
+    labels = [alert.get('labels', {}) for alert in alerts]
+    alert_ids = [item.get('alertname', '') for item in labels]
+    mask = suppression_mask(alert_ids, labels, flapping, deduplicator, mute_list, now)
+    return [alert for alert, keep in zip(alerts, mask) if keep]
+
+if __name__ == '__main__':
+    from datetime import timedelta
+
+    # 설정: 5분 window 내 3회 이상은 flapping
+    flapper = FlappingSuppressor(window=timedelta(minutes=5), threshold=3)
+    deduper = Deduplicator(dedup_window=timedelta(minutes=10))
+    mutes = MuteList(mutes=[{'alertname': 'Heartbeat', 'severity': 'info'}])
+
+    # alert list
+    alerts = [
+        {'labels': {'alertname': 'AnomalyDetected', 'severity': 'warning'}},
+        {'labels': {'alertname': 'Heartbeat', 'severity': 'info'}},
+    ]
+    result = filter_alerts(alerts, flapper, deduper, mutes)
+    print(f"Filtered alerts: {result}")
@@ -1,21 +1,34 @@
 import argparse
 import logging
+import math
+import multiprocessing
 import os
+import re
 import sys
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from functools import partial
+from itertools import chain
+from typing import Dict, List, Optional
 
-import joblib
 import numpy as np
 import pandas as pd
 import requests
 import yaml
-from sklearn.ensemble import IsolationForest
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-# drift detector
-try:
-    from river import drift
-except ImportError:
-    drift = None
+from alerting.alerting_manager import AlertmanagerClient
+from alerting.dispatcher import SlackDispatcher
+from alerting.suppression import Deduplicator
+from models.registry import available_detectors, get_detector
+from monitoring.drift import MetricDriftDetector
+from storage.metric_archive import MetricArchive
+from storage.model_cache import MODEL_CACHE
+from storage.model_store import ModelStore
+from storage.reservoir import Reservoir, reservoir_path
+from storage.series_cache import SeriesCache
+from storage.state_store import SQLiteStateStore
 
 # 로깅 Configure
 def setup_logging():
@@ -32,118 +45,680 @@ class ConfigLoader:
             cfg = yaml.safe_load(f)
         return cfg
 
+_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800, 'y': 31536000}
+
+
+def parse_step(step) -> float:
+    # Prometheus duration("15s", "1m30s") 또는 숫자(초)를 초 단위 float로 변환
+    if isinstance(step, (int, float)):
+        return float(step)
+    text = str(step).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = re.findall(r'(\d+(?:\.\d+)?)(ms|s|m|h|d|w|y)', text)
+    if not parts or ''.join(n + u for n, u in parts) != text:
+        raise ValueError(f"Invalid Prometheus step: {step!r}")
+    return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+
+
+def _label_key(labels: Dict[str, str]) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+class SeriesMatrix:
+    # Prometheus matrix 응답을 dense 행렬로 보관
+    # values[i, j] = i번째 series(labels[i])의 timestamps[j](epoch ms) 시점 값, 샘플이 없으면 NaN
+    def __init__(self, timestamps: np.ndarray, values: np.ndarray, labels: List[Dict[str, str]]):
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(labels), len(self.timestamps))
+        self.labels = labels
+
+    @classmethod
+    def empty(cls) -> 'SeriesMatrix':
+        return cls(np.empty(0, dtype=np.int64), np.empty((0, 0)), [])
+
+    @classmethod
+    def from_result(cls, result: List[dict]) -> 'SeriesMatrix':
+        # series별 [ts, "value"] 리스트를 한 번에 float 배열로 변환 후 scatter (샘플 단위 Python 루프 없음)
+        if not result:
+            return cls.empty()
+        lengths = np.fromiter((len(r['values']) for r in result), dtype=np.int64, count=len(result))
+        flat = np.array(list(chain.from_iterable(r['values'] for r in result)), dtype=np.float64).reshape(-1, 2)
+        timestamps, cols = np.unique(np.round(flat[:, 0] * 1000).astype(np.int64), return_inverse=True)
+        rows = np.repeat(np.arange(len(result)), lengths)
+        values = np.full((len(result), len(timestamps)), np.nan)
+        values[rows, cols.reshape(-1)] = flat[:, 1]
+        return cls(timestamps, values, [r.get('metric', {}) for r in result])
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return pd.to_datetime(self.timestamps, unit='ms')
+
+    def label_values(self, name: str) -> np.ndarray:
+        # series별 라벨 값 (없으면 빈 문자열)
+        return np.array([labels.get(name, '') for labels in self.labels], dtype=object)
+
+    def slice_time(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> 'SeriesMatrix':
+        # [start_ms, end_ms) 구간만 남기고, 구간 내 샘플이 하나도 없는 series는 제거
+        lo = 0 if start_ms is None else int(np.searchsorted(self.timestamps, start_ms, side='left'))
+        hi = len(self.timestamps) if end_ms is None else int(np.searchsorted(self.timestamps, end_ms, side='left'))
+        values = self.values[:, lo:hi]
+        alive = ~np.isnan(values).all(axis=1) if values.shape[1] else np.zeros(len(self.labels), dtype=bool)
+        return SeriesMatrix(self.timestamps[lo:hi], values[alive], [l for l, a in zip(self.labels, alive) if a])
+
+    def merge(self, other: 'SeriesMatrix') -> 'SeriesMatrix':
+        # 시간축·series축 합집합, 겹치는 칸은 other 값 우선
+        if not len(self):
+            return other
+        if not len(other):
+            return self
+        keys = {_label_key(l): i for i, l in enumerate(self.labels)}
+        labels = list(self.labels)
+        other_rows = []
+        for l in other.labels:
+            k = _label_key(l)
+            if k not in keys:
+                keys[k] = len(labels)
+                labels.append(l)
+            other_rows.append(keys[k])
+        timestamps = np.union1d(self.timestamps, other.timestamps)
+        values = np.full((len(labels), len(timestamps)), np.nan)
+        values[np.ix_(np.arange(len(self)), np.searchsorted(timestamps, self.timestamps))] = self.values
+        other_cols = np.searchsorted(timestamps, other.timestamps)
+        block = values[np.ix_(other_rows, other_cols)]
+        values[np.ix_(other_rows, other_cols)] = np.where(np.isnan(other.values), block, other.values)
+        return SeriesMatrix(timestamps, values, labels)
+
+    def mean_frame(self, metric: str) -> pd.DataFrame:
+        # timestamp x 1 DataFrame: 시점별 series 평균 (series가 생기거나 사라져도 컬럼은 metric 하나)
+        # scrape 누락으로 평균 대상이 바뀌어 값이 튀지 않도록 series별로 직전 값을 채운 뒤 평균
+        # 실제 표본이 하나도 없는 시점은 NaN으로 둠 (보간은 호출 쪽에서)
+        filled = pd.DataFrame(self.values.T, index=self.index).ffill()
+        mean = filled.mean(axis=1).where(~np.isnan(self.values).all(axis=0))
+        return pd.DataFrame({metric: mean}, index=self.index)
+
+
 class PrometheusClient:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, timeout: float = 10.0, max_retries: int = 3,
+                 backoff_factor: float = 0.5, pool_size: int = 10,
+                 max_points_per_query: int = 11000, chunk_concurrency: int = 4):
         self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        # Prometheus의 series당 최대 포인트 수(기본 11,000)를 넘는 구간은 step 정렬 chunk로 분할
+        self.max_points_per_query = max_points_per_query
+        self.chunk_concurrency = max(1, chunk_concurrency)
+        self._chunk_pool = None
+        # keep-alive 세션: 커넥션 풀 재사용 + 5xx/429 응답에 대한 backoff 재시도
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET'])
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, self.chunk_concurrency),
+                              max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
-    def query_range(self, metric: str, start: datetime, end: datetime, step: str) -> pd.Series:
+    def _request(self, metric: str, start_s: float, end_s: float, step: str) -> List[dict]:
         url = f"{self.base_url}/api/v1/query_range"
         params = {
             'query': metric,
-            'start': start.timestamp(),
-            'end': end.timestamp(),
+            'start': start_s,
+            'end': end_s,
             'step': step
         }
-        logging.debug(f"Querying Prometheus: {metric} from {start} to {end} step={step}")
-        resp = requests.get(url, params=params)
+        logging.debug(f"Querying Prometheus: {metric} from {start_s} to {end_s} step={step}")
+        resp = self.session.get(url, params=params, timeout=self.timeout)
         resp.raise_for_status()
-        result = resp.json().get('data', {}).get('result', [])
-        if not result:
-            return pd.Series(dtype=float)
-        values = result[0]['values']
-        timestamps, vals = zip(*values)
-        idx = pd.to_datetime(timestamps, unit='s')
-        return pd.Series(data=np.array(vals, dtype=float), index=idx)
-
-class DriftDetectorWrapper:
-    def __init__(self):
-        if not drift:
-            raise RuntimeError("river library is required for drift detection")
-        self.detector = drift.ADWIN()
-
-    def check(self, values: np.ndarray) -> bool:
-        for v in values:
-            if self.detector.update(v):
-                return True
-        return False
+        return resp.json().get('data', {}).get('result', [])
+
+    def query_range(self, metric: str, start: datetime, end: datetime, step: str) -> SeriesMatrix:
+        # 응답의 모든 series를 (series x timestamp) 행렬로 반환
+        start_ms = int(round(start.timestamp() * 1000))
+        end_ms = int(round(end.timestamp() * 1000))
+        step_ms = int(round(parse_step(step) * 1000))
+        n_points = (end_ms - start_ms) // step_ms + 1
+        if n_points <= self.max_points_per_query:
+            return SeriesMatrix.from_result(self._request(metric, start_ms / 1000, end_ms / 1000, step))
+        return self._query_chunked(metric, start_ms, step_ms, n_points, step)
+
+    def _query_chunked(self, metric: str, start_ms: int, step_ms: int, n_points: int, step: str) -> SeriesMatrix:
+        # chunk i는 [start + i*P*step, start + ((i+1)*P - 1)*step] 평가 시점을 담당 → 경계 중복·누락 없음
+        # 각 chunk 결과는 도착하는 대로 미리 할당한 (series x 전체 timestamp) 배열에 바로 기록
+        per_chunk = self.max_points_per_query
+        if self._chunk_pool is None:
+            self._chunk_pool = ThreadPoolExecutor(max_workers=self.chunk_concurrency,
+                                                  thread_name_prefix='prom-chunk')
+        futures = []
+        for first in range(0, n_points, per_chunk):
+            last = min(first + per_chunk, n_points) - 1
+            futures.append(self._chunk_pool.submit(
+                self._request, metric,
+                (start_ms + first * step_ms) / 1000, (start_ms + last * step_ms) / 1000, step
+            ))
+        logging.debug("Split %s into %d chunks of <= %d points", metric, len(futures), per_chunk)
+
+        rows: Dict[tuple, int] = {}
+        labels: List[Dict[str, str]] = []
+        values = np.full((0, n_points), np.nan)
+        present = np.zeros(n_points, dtype=bool)
+        for future in as_completed(futures):
+            chunk = SeriesMatrix.from_result(future.result())
+            if not len(chunk):
+                continue
+            chunk_rows = []
+            for l in chunk.labels:
+                k = _label_key(l)
+                if k not in rows:
+                    rows[k] = len(labels)
+                    labels.append(l)
+                chunk_rows.append(rows[k])
+            if len(labels) > len(values):
+                # 새 series 등장 시 행 용량을 두 배씩 확장
+                grown = np.full((max(len(labels), 2 * len(values)), n_points), np.nan)
+                grown[:len(values)] = values
+                values = grown
+            cols = (chunk.timestamps - start_ms) // step_ms
+            values[np.ix_(chunk_rows, cols)] = chunk.values
+            present[cols] = True
+        timestamps = start_ms + np.arange(n_points, dtype=np.int64) * step_ms
+        values = values[:len(labels)]
+        if not present.all():
+            timestamps, values = timestamps[present], values[:, present]
+        return SeriesMatrix(timestamps, values, labels)
+
+    def close(self):
+        # chunk 조회용 thread pool과 세션 정리
+        if self._chunk_pool is not None:
+            self._chunk_pool.shutdown(wait=True)
+            self._chunk_pool = None
+        self.session.close()
+
+    def __enter__(self) -> 'PrometheusClient':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class CachingPrometheusClient(PrometheusClient):
+    # 이미 받아온 step 정렬 샘플은 SeriesCache에서 재사용하고, 누락된 꼬리 구간과
+    # "now" 근처 invalidation margin 구간만 Prometheus에 다시 요청
+    def __init__(self, base_url: str, cache: SeriesCache, invalidation_seconds: float = 120.0, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.cache = cache
+        self.invalidation_seconds = invalidation_seconds
+
+    def query_range(self, metric: str, start: datetime, end: datetime, step: str) -> SeriesMatrix:
+        step_ms = int(round(parse_step(step) * 1000))
+        start_ms = math.ceil(start.timestamp() * 1000 / step_ms) * step_ms
+        end_ms = math.floor(end.timestamp() * 1000 / step_ms) * step_ms
+        margin_ms = math.ceil(self.invalidation_seconds * 1000 / step_ms) * step_ms
+        key = f"{metric}\x00{step}"
+
+        cached = self.cache.get(key)
+        fetch_from = start_ms
+        matrix = SeriesMatrix.empty()
+        if cached is not None:
+            # window 밖으로 밀려난 샘플(및 사라진 series) 제거
+            matrix = SeriesMatrix(*cached).slice_time(start_ms)
+            # 캐시가 window 앞부분을 덮지 못하면(윈도우 확장 등) 전체 재조회
+            ts = matrix.timestamps
+            if len(ts) and ts[0] - step_ms < start_ms:
+                fetch_from = max(start_ms, min(int(ts[-1]) + step_ms, end_ms - margin_ms))
+            else:
+                matrix = SeriesMatrix.empty()
+
+        if fetch_from <= end_ms:
+            fresh = super().query_range(
+                metric,
+                datetime.fromtimestamp(fetch_from / 1000),
+                datetime.fromtimestamp(end_ms / 1000),
+                step
+            )
+            # invalidation 구간은 새로 받은 값으로 대체
+            reused = matrix.slice_time(None, fetch_from)
+            logging.debug("Cache %s: reused %d samples, fetched %d",
+                          metric, len(reused.timestamps), len(fresh.timestamps))
+            matrix = reused.merge(fresh)
+        self.cache.put(key, matrix.timestamps, matrix.values, matrix.labels)
+        return matrix
+
+
+def _update_incrementally(store: ModelStore, contamination: float, X: np.ndarray, detector: str,
+                          options: dict):
+    # 현재 버전을 새 window(X) + 과거 reservoir 표본으로 증분 학습 → (모델, None)
+    # 이전 버전이 없거나 지원하지 않으면 (None, 전체 재학습에 함께 쓸 과거 표본)
+    # X가 이미 archive 이력이면(history) 과거 표본 없이 X만으로 재학습
+    # reservoir에는 학습에 쓴 모든 window를 누적 (전체 재학습 포함)
+    from models.incremental import update_model
+
+    options = dict(options)
+    history = options.pop('history', False)
+    reservoir_file = reservoir_path(store.root)
+    reservoir = Reservoir.load(reservoir_file, options.pop('reservoir_size', 10000), X.shape[1])
+    past = reservoir.rows
+    previous = store.load_current()
+    model = update_model(previous, detector, X, past, contamination, **options) if previous is not None \
+        else None
+    reservoir.add(X)
+    reservoir.save(reservoir_file)
+    if model is not None or history or not len(past):
+        return model, None
+    return None, past
+
+
+def _train_and_publish(store_root: str, contamination: float, X: np.ndarray,
+                       detector: str = 'isolation_forest', params: Optional[dict] = None,
+                       entities: Optional[np.ndarray] = None, fleet: Optional[dict] = None,
+                       incremental: Optional[dict] = None) -> str:
+    # 별도 프로세스에서 실행: 학습이 끝난 뒤에만 새 버전을 publish
+    # entities(행별 entity key)가 있으면 entity별 모델을 버전에 딸린 pack 파일 하나로 학습
+    # incremental이 있으면 이전 버전에서 이어서 학습 (entity별 모델은 항상 전체 재학습)
+    store = ModelStore(store_root)
+    if entities is not None:
+        from models.fleet import train_fleet
+
+        version = store.new_version()
+        model = train_fleet(X, entities, contamination, store.attachment_path(version, 'pack'),
+                            detector, params, **(fleet or {}))
+        return store.publish(model, version)
+    model, past = _update_incrementally(store, contamination, X, detector, incremental) if incremental \
+        else (None, None)
+    if model is None:
+        if past is not None:
+            logging.info("Refitting on %d new rows + %d reservoir rows", len(X), len(past))
+            X = np.vstack([X, past])
+        model = get_detector(detector)(X, contamination, **(params or {}))
+    return store.publish(model)
+
 
 class AnomalyDetector:
     def __init__(self, cfg: dict):
         self.cfg = cfg
-        self.prom = PrometheusClient(cfg['prometheus_url'])
         self.metrics = cfg['metrics']
+        # 동시 조회 개수 (1이면 순차 조회)
+        self.fetch_concurrency = max(1, int(cfg.get('fetch_concurrency', 8)))
+        client_kwargs = dict(
+            timeout=cfg.get('query_timeout_seconds', 10.0),
+            max_retries=cfg.get('query_retries', 3),
+            backoff_factor=cfg.get('retry_backoff_seconds', 0.5),
+            pool_size=self.fetch_concurrency,
+            max_points_per_query=cfg.get('max_points_per_query', 11000),
+            chunk_concurrency=cfg.get('chunk_concurrency', 4)
+        )
+        if cfg.get('cache_dir'):
+            # 증분 조회: 이전 실행에서 받은 샘플은 로컬 캐시에서 재사용
+            self.prom = CachingPrometheusClient(
+                cfg['prometheus_url'],
+                SeriesCache(cfg['cache_dir']),
+                invalidation_seconds=cfg.get('cache_invalidation_seconds', 120),
+                **client_kwargs
+            )
+        else:
+            self.prom = PrometheusClient(cfg['prometheus_url'], **client_kwargs)
+        # 설정 시 query 결과의 series를 이 라벨(예: instance) 기준 entity로 묶어 한 번에 탐지
+        self.entity_label = cfg.get('entity_label')
         self.contamination = cfg.get('contamination', 0.01)
+        # 탐지 모델 종류 (models/registry.py), 학습 프레임워크는 학습할 때만 import
+        self.detector_name = cfg.get('detector', 'isolation_forest')
+        if self.detector_name not in available_detectors():
+            raise ValueError(f"unknown detector {self.detector_name!r}; available: {available_detectors()}")
+        self.detector_params = cfg.get('detector_params', {})
+        # entity별 모델 (entity_label 필요): worker 프로세스에서 병렬 학습, pack 파일 하나에 저장
+        self.per_entity_models = bool(cfg.get('per_entity_models', False))
+        if self.per_entity_models and not self.entity_label:
+            raise ValueError("per_entity_models requires entity_label")
+        self.fleet_options = {
+            'n_workers': cfg.get('fleet_workers'),
+            'chunk_entities': cfg.get('fleet_chunk_entities', 32),
+            'min_rows': cfg.get('fleet_min_rows', 10),
+            'cache_size': cfg.get('fleet_cache_size', 1024),
+        }
+        # IsolationForest를 평탄 배열 점수 계산기로 변환해 탐지 (작은 batch의 호출 overhead 제거, 같은 label)
+        self.flat_scoring = bool(cfg.get('flat_scoring', False))
+        # 증분 재학습: 새 window + 과거 reservoir 표본으로 이전 버전에서 이어서 학습 (비용이 이력 길이와 무관)
+        self.incremental = dict(cfg.get('incremental_params', {}),
+                                reservoir_size=cfg.get('reservoir_size', 10000)) \
+            if cfg.get('incremental_retrain', False) else None
+        self.flat_large_batch = cfg.get('flat_scoring_large_batch', 1024)
+        self._compiled = (None, None)
         self.window = timedelta(minutes=cfg.get('window_minutes', 60))
         self.step = cfg.get('step', '60s')
+        # 버전별 모델 저장소 (CURRENT 포인터를 원자적으로 교체)
         self.model_path = cfg.get('model_path', 'anomaly_model.joblib')
+        self.model_store = ModelStore(
+            cfg.get('model_store_dir', 'model_store'),
+            keep_versions=cfg.get('model_keep_versions', 5)
+        )
+        self._train_pool = None
+        self._training: Optional[Future] = None
         self.slack_webhook = cfg.get('slack_webhook_url')
+        # 알림은 실행/entity 단위 배치 메시지로 묶어 백그라운드에서 전송
+        self.alert_batch_size = cfg.get('alert_batch_size', 50)
+        self.dispatcher = SlackDispatcher(
+            self.slack_webhook,
+            min_interval=cfg.get('slack_min_interval_seconds', 1.0)
+        ) if self.slack_webhook else None
+        # Alertmanager는 이상치 행마다 alert 하나, 배치 전송·장애 시 spool은 client가 담당
+        self.alertmanager = AlertmanagerClient(
+            cfg['alertmanager_url'],
+            max_batch_size=cfg.get('alertmanager_batch_size', 500),
+            flush_interval=cfg.get('alertmanager_flush_seconds', 1.0),
+            spool_dir=cfg.get('alertmanager_spool_dir')
+        ) if cfg.get('alertmanager_url') else None
+        # 조회한 window·탐지 결과를 metric/day 파티션 컬럼 저장소에 누적 (재학습·백테스트용)
+        self.archive = MetricArchive(cfg['archive_dir']) if cfg.get('archive_dir') else None
+        # 설정 시 신규 학습은 archive의 최근 train_window_days 이력으로 수행
+        train_days = cfg.get('train_window_days')
+        self.train_window = timedelta(days=train_days) if train_days else None
         self.model = None
-        self.drift_detector = None
-        if cfg.get('drift_detection', False):
-            if drift:
-                self.drift_detector = DriftDetectorWrapper()
-                logging.info("Drift detection enabled using ADWIN")
-            else:
-                logging.warning("Drift detection requested but river not installed. Skipping.")
+        # 설정 시 drift·alert 중복 제거 상태를 로컬 SQLite에 보관해 CronJob 실행 간 공유
+        self.state = SQLiteStateStore(cfg['state_path']) if cfg.get('state_path') else None
+        dedup_minutes = cfg.get('alert_dedup_minutes')
+        self.deduplicator = Deduplicator(
+            timedelta(minutes=dedup_minutes), store=self.state
+        ) if dedup_minutes else None
+        # metric별 Page-Hinkley drift 검출 (state_path가 있으면 실행 간 누적)
+        self.drift_detector = MetricDriftDetector(
+            delta=cfg.get('drift_delta', 0.5),
+            threshold=cfg.get('drift_threshold', 25.0),
+            store=self.state,
+            state_ttl=cfg.get('drift_state_ttl_hours', 168) * 3600
+        ) if cfg.get('drift_detection', False) else None
 
     def fetch_data(self) -> pd.DataFrame:
         end = datetime.utcnow()
         start = end - self.window
-        df = pd.DataFrame()
-        for metric in self.metrics:
-            series = self.prom.query_range(metric, start, end, self.step)
-            df[metric] = series
-        df = df.ffill().bfill()
+        workers = min(self.fetch_concurrency, len(self.metrics)) or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            matrices = list(pool.map(
+                lambda metric: self.prom.query_range(metric, start, end, self.step),
+                self.metrics
+            ))
+        if self.entity_label:
+            raw = self._entity_frame(matrices)
+            # entity별로 결측치 보간, 특정 metric이 아예 없는 entity는 제외
+            df = raw.groupby(level=0).ffill().groupby(level=0).bfill()
+            incomplete = df.isna().any(axis=1)
+            if incomplete.any():
+                dropped = df.index[incomplete].get_level_values(0).unique()
+                logging.warning("Dropping %d entities with missing metrics: %s",
+                                len(dropped), list(dropped[:10]))
+                df = df[~incomplete]
+        else:
+            # 완료 순서와 무관하게 cfg['metrics'] 순서대로 컬럼을 한 번에 구성
+            # query가 여러 series를 반환하면 entity 모드처럼 평균 → 모델 입력 폭은 항상 metric 수
+            raw = pd.concat([m.mean_frame(metric) for metric, m in zip(self.metrics, matrices)], axis=1)
+            df = raw.ffill().bfill()
         if df.empty:
             raise RuntimeError(f"No data fetched for metrics: {self.metrics}")
+        if self.archive:
+            # 보간 전 값만 보관 (보간은 load_history에서 읽을 때 수행)
+            for metric in self.metrics:
+                self.archive.append('metrics', raw[[metric]].dropna(), key=metric)
         return df
 
-    def load_or_train(self, X: np.ndarray):
-        if os.path.exists(self.model_path):
-            self.model = joblib.load(self.model_path)
-            logging.info("Loaded model from %s", self.model_path)
+    def load_history(self, start: datetime, end: datetime) -> pd.DataFrame:
+        # Prometheus 대신 archive에서 fetch_data와 같은 형태의 frame을 읽음
+        if not self.archive:
+            raise RuntimeError("archive_dir is not configured")
+        frames = [self.archive.read('metrics', key=metric, start=start, end=end) for metric in self.metrics]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, axis=1)
+        if isinstance(df.index, pd.MultiIndex):
+            df = df.groupby(level=0).ffill().groupby(level=0).bfill().dropna()
         else:
-            self.model = IsolationForest(
-                contamination=self.contamination,
-                random_state=42,
-                n_jobs=-1
-            )
-            self.model.fit(X)
-            joblib.dump(self.model, self.model_path)
-            logging.info("Trained and saved model to %s", self.model_path)
+            df = df.ffill().bfill()
+        return df
+
+    def training_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        # archive 이력이 있으면 그것으로, 없으면 현재 window로 학습
+        # 이전 버전에서 이어서 학습할 수 있으면 새 window만 사용 (과거는 reservoir 표본으로 반영)
+        # 전체 재학습(detector 변경, 지원하지 않는 backend, entity별 모델)은 archive 이력을 쓰고,
+        # 이력이 없으면 _train_and_publish가 현재 window에 reservoir 표본을 합쳐 학습
+        if self.incremental and not self.per_entity_models:
+            from models.incremental import can_update
+
+            if can_update(self.model_store.load_current(), self.detector_name):
+                return df
+        if self.archive and self.train_window:
+            end = datetime.utcnow()
+            history = self.load_history(end - self.train_window, end)
+            if not history.empty and list(history.columns) == list(df.columns):
+                logging.info("Training on %d archived rows", len(history))
+                return history
+            logging.warning("Archived history unavailable or incompatible; training on current window")
+        return df
+
+    def training_data(self, df: pd.DataFrame) -> np.ndarray:
+        return self.training_frame(df).values
+
+    def training_entities(self, frame: pd.DataFrame) -> Optional[np.ndarray]:
+        # per_entity_models일 때 행별 entity key (entity별 모델 학습용)
+        if self.per_entity_models and isinstance(frame.index, pd.MultiIndex):
+            return frame.index.get_level_values(0).to_numpy()
+        return None
+
+    def _entity_frame(self, matrices: List[SeriesMatrix]) -> pd.DataFrame:
+        # metric별 (series x timestamp) 행렬을 entity 라벨로 정렬해 (entity, timestamp) x metric frame 구성
+        entity_ids = [m.label_values(self.entity_label) for m in matrices]
+        entities = np.unique(np.concatenate(entity_ids)) if any(len(e) for e in entity_ids) else np.empty(0, dtype=object)
+        timestamps = np.unique(np.concatenate([m.timestamps for m in matrices]))
+        cube = np.full((len(entities), len(timestamps), len(matrices)), np.nan)
+        for k, (matrix, ids) in enumerate(zip(matrices, entity_ids)):
+            if not len(matrix):
+                continue
+            rows = np.searchsorted(entities, ids)
+            cols = np.searchsorted(timestamps, matrix.timestamps)
+            # 한 entity에 series가 여러 개면(예: CPU core별) 평균
+            valid = ~np.isnan(matrix.values)
+            sums = np.zeros((len(entities), len(cols)))
+            counts = np.zeros_like(sums)
+            np.add.at(sums, rows, np.where(valid, matrix.values, 0.0))
+            np.add.at(counts, rows, valid)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cube[:, cols, k] = sums / counts
+        index = pd.MultiIndex.from_product(
+            [entities, pd.to_datetime(timestamps, unit='ms')],
+            names=[self.entity_label, 'timestamp']
+        )
+        return pd.DataFrame(cube.reshape(-1, len(matrices)), index=index, columns=self.metrics)
+
+    def _incremental_options(self, history: bool) -> Optional[dict]:
+        # history: X가 training_frame의 archive 이력인지 (전체 재학습 시 reservoir 표본을 합칠지 결정)
+        return dict(self.incremental, history=history) if self.incremental else None
+
+    def load_or_train(self, X: np.ndarray, entities: Optional[np.ndarray] = None, history: bool = False):
+        # 현재 버전을 로드하고, 아직 버전이 하나도 없을 때만 inline 학습 (모델 없이 탐지하지 않도록)
+        if self.model_store.current_version() is None:
+            if os.path.exists(self.model_path):
+                # 기존 단일 파일 모델을 첫 버전으로 이관
+                self.model_store.publish(MODEL_CACHE.load(self.model_path))
+                logging.info("Imported legacy model %s into %s", self.model_path, self.model_store.root)
+            else:
+                _train_and_publish(self.model_store.root, self.contamination, X, self.detector_name,
+                                   self.detector_params, entities, self.fleet_options,
+                                   self._incremental_options(history))
+                logging.info("Trained and published initial model to %s", self.model_store.root)
+        # 파일이 바뀌지 않았으면 캐시된 모델 재사용 (매 run마다 역직렬화하지 않음)
+        self.model = self.model_store.load_current()
+        if self.flat_scoring:
+            self.model = self._compile(self.model)
+
+    def _compile(self, model):
+        # 같은 모델 객체(같은 버전)는 한 번만 변환
+        from models.flat_iforest import compile_model
+
+        if getattr(model, 'per_entity', False):
+            if model.transform is None:
+                model.set_transform(partial(compile_model, large_batch=self.flat_large_batch))
+            return model
+        source, compiled = self._compiled
+        if source is not model:
+            compiled = compile_model(model, self.flat_large_batch)
+            self._compiled = (model, compiled)
+        return compiled
 
-    def detect(self, X: np.ndarray) -> np.ndarray:
+    def retrain_async(self, X: np.ndarray, entities: Optional[np.ndarray] = None,
+                      history: bool = False) -> Optional[Future]:
+        # 별도 프로세스에서 학습 후 publish, 탐지는 기존 버전으로 계속 진행
+        if self._training is not None and not self._training.done():
+            logging.info("Retrain already in progress; skipping")
+            return self._training
+        if self._train_pool is None:
+            # spawn: fetch용 스레드가 있는 프로세스를 fork하지 않도록
+            self._train_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        self._training = self._train_pool.submit(_train_and_publish, self.model_store.root, self.contamination, X,
+                                                 self.detector_name, self.detector_params, entities,
+                                                 self.fleet_options, self._incremental_options(history))
+        self._training.add_done_callback(self._on_trained)
+        logging.info("Submitted background retrain on %d rows", len(X))
+        return self._training
+
+    @staticmethod
+    def _on_trained(future: Future):
+        try:
+            logging.info("Background retrain published version %s", future.result())
+        except Exception as e:
+            logging.error("Background retrain failed: %s", e)
+
+    def wait_for_training(self, timeout: Optional[float] = None):
+        if self._training is not None:
+            self._training.exception(timeout=timeout)
+
+    def detect(self, X: np.ndarray, segments: Optional[np.ndarray] = None,
+               entities: Optional[np.ndarray] = None) -> np.ndarray:
+        # segments: entity별 행 구간의 시작 위치 (window 기반 모델이 entity 경계를 넘지 않도록)
+        # entities: 구간별 entity key (entity별 모델 fleet이 구간마다 해당 entity 모델 사용)
+        if getattr(self.model, 'per_entity', False):
+            return self.model.predict(X, segments, entities)
+        if segments is not None and getattr(self.model, 'sequential', False):
+            return self.model.predict(X, segments=segments)
         return self.model.predict(X)
 
+    def _alert_messages(self, anomalies: pd.DataFrame) -> List[str]:
+        # entity 모드면 entity별, 아니면 실행 단위로 묶고 alert_batch_size 줄씩 나눔
+        values = anomalies.drop(columns='anomaly', errors='ignore')
+        columns = list(values.columns)
+        if isinstance(values.index, pd.MultiIndex):
+            groups = [(entity, frame) for entity, frame in values.groupby(level=0, sort=False)]
+        else:
+            groups = [(None, values)]
+        messages = []
+        for entity, frame in groups:
+            lines = [
+                f"{ts} -> " + ", ".join(f"{m}={v:.2f}" for m, v in zip(columns, row))
+                for ts, row in zip(frame.index.get_level_values(-1), frame.to_numpy())
+            ]
+            n_parts = (len(lines) + self.alert_batch_size - 1) // self.alert_batch_size
+            for part in range(n_parts):
+                title = f"{len(lines)} anomalies" + (f" on {entity}" if entity is not None else "")
+                if n_parts > 1:
+                    title += f" ({part + 1}/{n_parts})"
+                chunk = lines[part * self.alert_batch_size:(part + 1) * self.alert_batch_size]
+                messages.append(f"[ALERT] {title}\n" + "\n".join(chunk))
+        return messages
+
+    def _alertmanager_alerts(self, anomalies: pd.DataFrame) -> List[Dict]:
+        values = anomalies.drop(columns='anomaly', errors='ignore')
+        columns = list(values.columns)
+        multi = isinstance(values.index, pd.MultiIndex)
+        entities = values.index.get_level_values(0) if multi else [None] * len(values)
+        alerts = []
+        for entity, ts, row in zip(entities, values.index.get_level_values(-1), values.to_numpy()):
+            labels = {'alertname': 'AnomalyDetected', 'severity': 'warning'}
+            if multi:
+                labels[values.index.names[0] or 'entity'] = str(entity)
+            alerts.append({
+                'labels': labels,
+                'annotations': {'description': ", ".join(f"{m}={v:.2f}" for m, v in zip(columns, row))},
+                'startsAt': pd.Timestamp(ts).strftime('%Y-%m-%dT%H:%M:%SZ')
+            })
+        return alerts
+
+    @staticmethod
+    def _drift_columns(df: pd.DataFrame):
+        # entity 모드는 (metric, entity)별 series로 펼쳐 각각 drift 검출
+        # 행 timestamp(epoch 초)도 함께 넘겨 이전 실행과 겹치는 구간은 다시 반영하지 않음
+        if isinstance(df.index, pd.MultiIndex):
+            wide = df.unstack(level=0)
+            return ([f"{metric}[{entity}]" for metric, entity in wide.columns], wide.to_numpy(dtype=float),
+                    wide.index.asi8 / 1e9)
+        return [str(c) for c in df.columns], df.to_numpy(dtype=float), df.index.asi8 / 1e9
+
+    def _deduplicate(self, anomalies: pd.DataFrame) -> pd.DataFrame:
+        # entity(또는 실행 전체) 단위로 dedup window 안에 이미 알린 이상치는 제외
+        if isinstance(anomalies.index, pd.MultiIndex):
+            entities = anomalies.index.get_level_values(0).astype(str)
+        else:
+            entities = pd.Index([''] * len(anomalies))
+        ids = {e: f"AnomalyDetected/{e}" if e else 'AnomalyDetected' for e in entities.unique()}
+        self.deduplicator.prefetch(ids.values())
+        fresh = [e for e, alert_id in ids.items() if not self.deduplicator.is_duplicate(alert_id)]
+        self.deduplicator.flush()
+        if len(fresh) < len(ids):
+            logging.info("Suppressed duplicate alerts for %d of %d entities", len(ids) - len(fresh), len(ids))
+        return anomalies[entities.isin(fresh)]
+
     def alert(self, anomalies: pd.DataFrame):
-        for ts, row in anomalies.iterrows():
-            msg = f"[ALERT] Anomaly at {ts} -> " + ", ".join([f"{m}={row[m]:.2f}" for m in row.index])
+        # 큐에 넣고 바로 반환, 전송은 dispatcher/alertmanager worker가 처리
+        if self.deduplicator:
+            anomalies = self._deduplicate(anomalies)
+        for msg in self._alert_messages(anomalies):
             logging.warning(msg)
-            if self.slack_webhook:
-                payload = {"text": msg}
-                try:
-                    resp = requests.post(self.slack_webhook, json=payload)
-                    resp.raise_for_status()
-                except Exception as e:
-                    logging.error("Slack alert failed: %s", e)
+            if self.dispatcher:
+                self.dispatcher.submit(msg)
+        if self.alertmanager and not anomalies.empty:
+            self.alertmanager.send_alerts(self._alertmanager_alerts(anomalies))
+
+    def close(self, timeout: Optional[float] = 30.0):
+        # 남은 알림 전송 및 백그라운드 재학습 완료 대기
+        if self.dispatcher:
+            self.dispatcher.close(timeout)
+        if self.alertmanager:
+            self.alertmanager.close(timeout)
+        self.wait_for_training()
+        self.prom.close()
+        if self.state:
+            self.state.close()
 
     def run(self):
         logging.info("=== Starting anomaly detection ===")
         df = self.fetch_data()
         X = df.values
 
-        # Data drift 감지
-        if self.drift_detector:
-            means = X.mean(axis=1)
-            if self.drift_detector.check(means):
-                logging.info("Data drift detected. Forcing retrain.")
-                os.remove(self.model_path) if os.path.exists(self.model_path) else None
+        # Train or load model (신규 학습이 필요하면 archive 이력 사용)
+        if self.model_store.current_version() is None:
+            train = self.training_frame(df)
+            self.load_or_train(train.values, self.training_entities(train), history=train is not df)
+        else:
+            self.load_or_train(X)
 
-        # Train or load model
-        self.load_or_train(X)
+        # Data drift 감지 → 백그라운드 재학습, 이번 run은 현재 버전으로 탐지
+        if self.drift_detector:
+            drifted = self.drift_detector.update(*self._drift_columns(df))
+            self.drift_detector.save()
+            if drifted:
+                logging.info("Data drift detected in %s. Retraining in background.", drifted[:10])
+                train = self.training_frame(df)
+                self.retrain_async(train.values, self.training_entities(train), history=train is not df)
 
-        # Detect anomalies
-        labels = self.detect(X)
+        # Detect anomalies (entity 모드에서도 전체 entity를 한 번의 predict로 처리)
+        segments = entities = None
+        if isinstance(df.index, pd.MultiIndex):
+            codes = df.index.codes[0]
+            segments = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+            entities = df.index.levels[0][codes[segments]]
+        labels = self.detect(X, segments, entities)
         results = df.copy()
         results['anomaly'] = labels
         anomalies = results[results['anomaly'] == -1]
@@ -160,9 +735,16 @@ def main(config_path: str = 'config.yaml'):
     cfg = ConfigLoader.load(config_path)
     detector = AnomalyDetector(cfg)
     results = detector.run()
-    out_file = cfg.get('output_csv', 'anomaly_results.csv')
-    results.to_csv(out_file)
-    logging.info("Results written to %s", out_file)
+    # 대기 중인 알림 전송과 백그라운드 재학습 publish까지 마친 뒤 종료
+    detector.close()
+    if detector.archive:
+        detector.archive.append('results', results)
+        logging.info("Results archived to %s", cfg['archive_dir'])
+    # archive 사용 시 CSV는 output_csv를 명시한 경우에만 기록
+    out_file = cfg.get('output_csv', None if detector.archive else 'anomaly_results.csv')
+    if out_file:
+        results.to_csv(out_file)
+        logging.info("Results written to %s", out_file)
 
 
 # Airflow DAG 통합
@@ -0,0 +1,81 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.abspath(__file__)) + '/../'
+sys.path.insert(0, ROOT)
+from alerting.alerting_manager import AlertmanagerClient
+from benchmarks.bench_chunked import free_port, wait_ready
+
+
+def make_alert(i: int) -> dict:
+    return {
+        'labels': {'alertname': 'AnomalyDetected', 'severity': 'warning', 'instance': f'node{i % 5000:05d}'},
+        'annotations': {'description': f'anomaly #{i}'},
+        'startsAt': '2025-06-01T00:00:00Z',
+        'endsAt': '0001-01-01T00:00:00Z'
+    }
+
+
+def start_stub(port: int, latency: float) -> subprocess.Popen:
+    proc = subprocess.Popen([sys.executable, '-m', 'benchmarks.fake_alertmanager',
+                             '--port', str(port), '--latency', str(latency)], cwd=ROOT)
+    wait_ready(port)
+    return proc
+
+
+def received(url: str) -> int:
+    return requests.get(f'{url}/stats').json()['alerts']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='AlertmanagerClient 배치 전송 처리량·장애 spool 벤치마크')
+    parser.add_argument('--alerts', type=int, default=50000)
+    parser.add_argument('--batch-size', type=int, nargs='+', default=[1, 100, 500])
+    parser.add_argument('--latency', type=float, default=0.002)
+    args = parser.parse_args()
+    alerts = [make_alert(i) for i in range(args.alerts)]
+
+    port = free_port()
+    url = f'http://127.0.0.1:{port}'
+    stub = start_stub(port, args.latency)
+    try:
+        for size in args.batch_size:
+            n = args.alerts if size > 1 else min(args.alerts, 2000)
+            before = received(url)
+            client = AlertmanagerClient(url, max_batch_size=size, flush_interval=0.05, queue_size=n)
+            t = time.perf_counter()
+            client.send_alerts(alerts[:n])
+            client.close(timeout=300)
+            elapsed = time.perf_counter() - t
+            print(f"batch_size={size:4d}  {n:6d} alerts  {elapsed:6.2f}s  {n / elapsed:9.0f} alerts/s  "
+                  f"delivered={received(url) - before}")
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    # 장애 시나리오: Alertmanager가 내려간 동안 보낸 alert는 spool로, 복구 후 재전송
+    port = free_port()
+    url = f'http://127.0.0.1:{port}'
+    with tempfile.TemporaryDirectory() as spool:
+        client = AlertmanagerClient(url, max_batch_size=500, flush_interval=0.05, max_retries=0,
+                                    backoff_factor=0.1, max_backoff=0.5, spool_dir=spool)
+        client.send_alerts(alerts[:10000])
+        client.flush(timeout=60)
+        print(f"outage: spooled={client.spooled} files={len(client.spool_files())}")
+        stub = start_stub(port, args.latency)
+        try:
+            t = time.perf_counter()
+            while client.spool_files() and time.perf_counter() - t < 60:
+                time.sleep(0.05)
+            client.close(timeout=60)
+            print(f"recovery: delivered={received(url)} in {time.perf_counter() - t:.2f}s, "
+                  f"spool left={len(client.spool_files())}")
+        finally:
+            stub.terminate()
+            stub.wait()
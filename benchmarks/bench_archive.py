@@ -0,0 +1,45 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+from storage.metric_archive import MetricArchive
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='CSV vs MetricArchive 구간·컬럼 읽기 벤치마크')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--columns', type=int, default=50)
+    args = parser.parse_args()
+
+    idx = pd.date_range('2025-01-01', periods=args.days * 1440, freq='min')
+    df = pd.DataFrame(np.random.rand(len(idx), args.columns), index=idx,
+                      columns=[f'metric_{i}' for i in range(args.columns)])
+    df['anomaly'] = np.where(np.random.rand(len(idx)) < 0.01, -1, 1)
+    start, end = idx[-1440 * 2], idx[-1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'results.csv')
+        df.to_csv(csv_path)
+        archive = MetricArchive(os.path.join(tmp, 'archive'))
+        # 하루치씩 나눠 적재 (일 단위 파티션)
+        for day in range(args.days):
+            archive.append('results', df.iloc[day * 1440:(day + 1) * 1440])
+
+        t = time.perf_counter()
+        csv = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+        csv = csv.loc[start:end, ['anomaly']]
+        print(f"csv     last 2 days, 1 column: {time.perf_counter() - t:7.3f}s rows={len(csv)}")
+
+        t = time.perf_counter()
+        arc = archive.read('results', start=start, end=end, columns=['anomaly'])
+        print(f"archive last 2 days, 1 column: {time.perf_counter() - t:7.3f}s rows={len(arc)}")
+
+        t = time.perf_counter()
+        full = archive.read('results')
+        print(f"archive full scan            : {time.perf_counter() - t:7.3f}s rows={len(full)}")
@@ -0,0 +1,71 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__)) + '/../'
+sys.path.insert(0, ROOT)
+
+
+def startup(code: str) -> float:
+    # 새 프로세스에서 import + 모델 로드 + 60행 점수까지의 시간
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def per_call(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='오토인코더 점수 Keras predict vs NumPy 추론 지연·기동 시간 벤치마크')
+    parser.add_argument('--features', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    from models.deep_autoencoder import DeepAutoencoderDetector
+    from models.vae_detector import VariationalAutoencoderDetector
+
+    X = np.random.RandomState(0).rand(1000, args.features).astype('float32')
+    window = X[:args.rows]
+    detectors = [('deep_autoencoder', lambda: DeepAutoencoderDetector(args.features, 32), 'autoencoder'),
+                 ('vae', lambda: VariationalAutoencoderDetector(args.features, 16), 'vae')]
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, build, attr in detectors:
+            try:
+                detector = build()
+            except Exception as e:
+                # 설치된 Keras 버전에서 모델 구성이 안 되는 경우 (VAE의 Keras 3 비호환)
+                print(f"{name}: skipped ({type(e).__name__})")
+                continue
+            detector.fit(X, epochs=1, batch_size=64)
+            path = os.path.join(tmp, f'{name}.npz')
+            model = detector.export_numpy(path)
+            keras_model = getattr(detector, attr)
+            keras = per_call(lambda: detector.compute_reconstruction_error(window), args.repeat // 10)
+            direct = per_call(lambda: keras_model(window, training=False), args.repeat)
+            numpy_path = per_call(lambda: model.compute_reconstruction_error(window), args.repeat)
+            print(f"{name} ({args.rows} rows): keras predict {keras * 1000:7.2f}ms  "
+                  f"keras __call__ {direct * 1000:6.2f}ms  numpy {numpy_path * 1000:6.3f}ms  "
+                  f"x{keras / numpy_path:,.0f}")
+
+            keras_start = startup(
+                "import numpy as np; from models.deep_autoencoder import DeepAutoencoderDetector as D; "
+                f"d = D({args.features}, 32); d.compute_reconstruction_error(np.random.rand({args.rows}, {args.features}))"
+            )
+            numpy_start = startup(
+                "import numpy as np, sys; from models.numpy_inference import NumpyAutoencoder; "
+                f"m = NumpyAutoencoder.load({path!r}); m.compute_reconstruction_error(np.random.rand({args.rows}, {args.features})); "
+                "assert 'tensorflow' not in sys.modules"
+            )
+            print(f"{name} cold start: keras {keras_start:.2f}s  numpy {numpy_start:.2f}s")
@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__)) + '/../'
+sys.path.insert(0, ROOT)
+from models.registry import available_detectors, get_detector
+from storage.model_store import ModelStore
+
+# 새 프로세스: 탐지 모듈 import → 현재 모델 로드 → 60행 점수, 단계별 시간과 최대 RSS(VmHWM, exec 이후 기준) 출력
+PROBE = """
+import json, sys, time
+import numpy as np
+start = time.perf_counter()
+import anomaly_detection
+from storage.model_store import ModelStore
+imported = time.perf_counter()
+{extra}
+model = ModelStore({store!r}).load_current()
+model.predict(np.random.rand(60, {features}))
+done = time.perf_counter()
+print(json.dumps({{'import': imported - start, 'total': done - start, 'tensorflow': 'tensorflow' in sys.modules,
+                  'rss_mb': int(next(l for l in open('/proc/self/status') if l.startswith('VmHWM')).split()[1]) / 1024}}))
+"""
+
+
+def probe(store: str, features: int, extra: str = '') -> dict:
+    out = subprocess.run([sys.executable, '-c', PROBE.format(store=store, features=features, extra=extra)],
+                         cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='detector backend별 탐지 프로세스 기동 시간·메모리 벤치마크')
+    parser.add_argument('--features', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--detectors', nargs='+', default=available_detectors())
+    args = parser.parse_args()
+
+    X = np.random.RandomState(0).rand(args.rows, args.features)
+    params = {'isolation_forest': {}, 'deep_autoencoder': {'epochs': 2}, 'vae': {'epochs': 2},
+              'lstm_autoencoder': {'epochs': 1, 'latent_dim': 16}}
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {}
+        for name in args.detectors:
+            try:
+                model = get_detector(name)(X, 0.01, **params.get(name, {}))
+            except Exception as e:
+                # 설치된 Keras에서 구성되지 않는 모델 (VAE의 Keras 3 비호환)
+                print(f"{name}: skipped ({type(e).__name__}: {str(e)[:60]})")
+                continue
+            stores[name] = os.path.join(tmp, name)
+            ModelStore(stores[name]).publish(model)
+
+        # 변경 전처럼 models 모듈을 모두 import하는 경우를 기준선으로 측정
+        eager = ("import models.deep_autoencoder, models.vae_detector, models.lstm_detector"
+                 if 'isolation_forest' in stores else '')
+        rows = [('isolation_forest (eager models import)', stores.get('isolation_forest'), eager)]
+        rows += [(name, store, '') for name, store in stores.items()]
+        for label, store, extra in rows:
+            if store is None:
+                continue
+            start = time.perf_counter()
+            r = probe(store, args.features, extra)
+            print(f"{label:40s} import {r['import']:5.2f}s  ready {r['total']:5.2f}s  "
+                  f"wall {time.perf_counter() - start:5.2f}s  rss {r['rss_mb']:6.0f}MB  tensorflow={r['tensorflow']}")
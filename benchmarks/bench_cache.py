@@ -0,0 +1,32 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+from anomaly_detection import AnomalyDetector
+from benchmarks.fake_prometheus import FakePrometheus
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SeriesCache 증분 조회 벤치마크 (연속 실행 2회)')
+    parser.add_argument('--metrics', type=int, default=50)
+    parser.add_argument('--window-minutes', type=int, default=1440)
+    args = parser.parse_args()
+
+    with FakePrometheus(latency=0.0) as prom, tempfile.TemporaryDirectory() as cache_dir:
+        for label, extra in (('no cache', {}), ('cache', {'cache_dir': cache_dir})):
+            cfg = {
+                'prometheus_url': prom.url,
+                'metrics': [f'metric_{i}' for i in range(args.metrics)],
+                'window_minutes': args.window_minutes,
+                'step': '60s',
+                **extra,
+            }
+            for run in ('cold', 'warm'):
+                detector = AnomalyDetector(cfg)
+                served = prom.samples
+                start = time.perf_counter()
+                df = detector.fetch_data()
+                print(f"{label:8s} {run}: {time.perf_counter() - start:7.3f}s  rows={len(df)}  samples served={prom.samples - served}")
@@ -0,0 +1,66 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+from streaming.checkpoint import load_checkpoints
+from streaming.sharded import ShardedStreamingEngine
+
+
+def total_size(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='스트리밍 모델 checkpoint 기록·재시작 복원 시간 벤치마크')
+    parser.add_argument('--entities', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--features', type=int, default=4)
+    parser.add_argument('--n-trees', type=int, default=10)
+    parser.add_argument('--height', type=int, default=6)
+    parser.add_argument('--window-size', type=int, default=32)
+    parser.add_argument('--changed', type=float, default=0.05, help='두 번째 checkpoint 전에 갱신되는 entity 비율')
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(0)
+    names = [f'svc-{i:06d}' for i in range(args.entities)]
+    features = [f'f{i}' for i in range(args.features)]
+    kwargs = dict(n_workers=args.workers, n_trees=args.n_trees, height=args.height, window_size=args.window_size)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = ShardedStreamingEngine(features, checkpoint_dir=directory, **kwargs)
+        rows = names * (2 * args.window_size)
+        engine.submit(rows, np.arange(len(rows)), rng.rand(len(rows), args.features))
+        engine.flush()
+
+        start = time.perf_counter()
+        written = engine.checkpoint()
+        pause = time.perf_counter() - start
+        engine.flush()
+        print(f"full checkpoint: {written} models, scoring paused {pause * 1000:.1f}ms")
+
+        changed = names[:int(args.entities * args.changed)]
+        engine.submit(changed, np.arange(len(changed)), rng.rand(len(changed), args.features))
+        start = time.perf_counter()
+        written = engine.checkpoint()
+        pause = time.perf_counter() - start
+        engine.close()
+        print(f"incremental checkpoint: {written} models, scoring paused {pause * 1000:.1f}ms, "
+              f"files on disk {total_size(directory) / 1e6:.1f}MB")
+
+        meta = {'features': features, 'n_trees': args.n_trees, 'height': args.height,
+                'window_size': args.window_size, 'seed': 42}
+        start = time.perf_counter()
+        loaded, _, _ = load_checkpoints(directory, meta, prefix='shard-*')
+        print(f"read + merge: {len(loaded)} models in {time.perf_counter() - start:.3f}s")
+
+        start = time.perf_counter()
+        restored = ShardedStreamingEngine(features, checkpoint_dir=directory, **kwargs)
+        stats = restored.flush()
+        print(f"restart (spawn {args.workers} workers + restore): {time.perf_counter() - start:.3f}s, "
+              f"{sum(s['entities'] for s in stats.values())} models")
+        restored.close()
@@ -0,0 +1,61 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.abspath(__file__)) + '/../'
+sys.path.insert(0, ROOT)
+from anomaly_detection import PrometheusClient
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(port: int):
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError('fake prometheus did not start')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='긴 구간 query_range chunk 분할·병렬 조회 벤치마크')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--series', type=int, default=2)
+    parser.add_argument('--latency', type=float, default=0.3)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    end = datetime(2025, 6, 1)
+    start = end - timedelta(days=args.days)
+    # fake 서버는 별도 프로세스: 응답 생성 CPU가 클라이언트 측 측정에 섞이지 않도록
+    port = free_port()
+    server = subprocess.Popen([
+        sys.executable, '-m', 'benchmarks.fake_prometheus',
+        '--port', str(port), '--latency', str(args.latency), '--series', str(args.series)
+    ], cwd=ROOT)
+    try:
+        wait_ready(port)
+        url = f'http://127.0.0.1:{port}'
+        with PrometheusClient(url, max_points_per_query=10**9, max_retries=0) as single:
+            try:
+                single.query_range('up', start, end, '60s')
+                print("single request: accepted")
+            except Exception as e:
+                print(f"single request: rejected ({e.__class__.__name__})")
+        for c in args.concurrency:
+            with PrometheusClient(url, chunk_concurrency=c, max_points_per_query=2000) as client:
+                t = time.perf_counter()
+                matrix = client.query_range('up', start, end, '60s')
+            print(f"chunk_concurrency={c:2d}  {time.perf_counter() - t:6.2f}s  shape={matrix.values.shape}")
+    finally:
+        server.terminate()
@@ -0,0 +1,47 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__)) + '/../'
+sys.path.insert(0, ROOT)
+from models.ensemble import anomaly_score, train_ensemble
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='앙상블 member 병렬 점수 계산 지연 (member 합 대비) 벤치마크')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--features', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--executor', choices=['thread', 'process'], default='thread')
+    parser.add_argument('--lstm', action='store_true', help='lstm_autoencoder member 추가 (TensorFlow 추론)')
+    args = parser.parse_args()
+
+    X = np.random.RandomState(0).rand(args.rows, args.features)
+    members = [{'detector': 'isolation_forest', 'params': {'n_estimators': 200}},
+               {'detector': 'deep_autoencoder', 'params': {'encoding_dim': 4, 'epochs': 2}}]
+    if args.lstm:
+        members.append({'detector': 'lstm_autoencoder', 'params': {'timesteps': 10, 'latent_dim': 16, 'epochs': 1}})
+    ensemble = train_ensemble(X, 0.01, members, executor=args.executor)
+
+    serial = 0.0
+    for name, member in zip(ensemble.names, ensemble.members):
+        elapsed = best_of(lambda: anomaly_score(member, X), args.repeat)
+        serial += elapsed
+        print(f"{name:>18}: {elapsed * 1000:8.1f} ms")
+    ensemble.predict(X[:10])  # pool 생성 (process는 worker에 member 전달)
+    concurrent = best_of(lambda: ensemble.predict(X), args.repeat)
+    print(f"{'sum of members':>18}: {serial * 1000:8.1f} ms")
+    print(f"{'ensemble':>18}: {concurrent * 1000:8.1f} ms  ({args.executor}, {os.cpu_count()} CPU)")
+    ensemble.close()
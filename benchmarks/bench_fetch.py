@@ -0,0 +1,39 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+from anomaly_detection import AnomalyDetector
+from benchmarks.fake_prometheus import FakePrometheus
+
+
+def bench(url: str, n_metrics: int, concurrency: int) -> float:
+    cfg = {
+        'prometheus_url': url,
+        'metrics': [f'metric_{i}' for i in range(n_metrics)],
+        'window_minutes': 60,
+        'step': '60s',
+        'fetch_concurrency': concurrency,
+    }
+    detector = AnomalyDetector(cfg)
+    start = time.perf_counter()
+    df = detector.fetch_data()
+    elapsed = time.perf_counter() - start
+    assert df.shape[1] == n_metrics
+    return elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='fetch_data 순차 vs 동시 조회 벤치마크')
+    parser.add_argument('--metrics', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 32])
+    args = parser.parse_args()
+
+    with FakePrometheus(latency=args.latency) as prom:
+        baseline = None
+        for c in args.concurrency:
+            elapsed = bench(prom.url, args.metrics, c)
+            baseline = baseline or elapsed
+            print(f"concurrency={c:3d}  {elapsed:7.3f}s  speedup x{baseline / elapsed:5.1f}")
@@ -0,0 +1,32 @@
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+from alerting.suppression import Deduplicator, FlappingSuppressor, MuteList, filter_alerts, filter_alerts_batch
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='filter_alerts 건별 경로 vs batch 경로 벤치마크 (alert storm)')
+    parser.add_argument('--alerts', type=int, default=50000)
+    parser.add_argument('--alertnames', type=int, default=2000)
+    parser.add_argument('--mutes', type=int, default=1000)
+    args = parser.parse_args()
+    # 운영과 같이 INFO 로그를 실제로 포맷·기록
+    logging.basicConfig(level=logging.INFO, stream=open(os.devnull, 'w'))
+
+    rng = random.Random(0)
+    alerts = [{'labels': {'alertname': f'AnomalyDetected{rng.randrange(args.alertnames)}',
+                          'severity': rng.choice(['warning', 'info']),
+                          'instance': f'node{rng.randrange(200):03d}'}} for _ in range(args.alerts)]
+    mutes = [{'alertname': f'AnomalyDetected{i}', 'severity': 'info'} for i in range(args.mutes)]
+    for name, fn in (('per-alert', filter_alerts), ('batch', filter_alerts_batch)):
+        state = (FlappingSuppressor(timedelta(minutes=5), threshold=3),
+                 Deduplicator(timedelta(minutes=10)), MuteList(mutes))
+        start = time.perf_counter()
+        sent = fn(alerts, *state)
+        print(f"{name:9s}  {args.alerts} alerts  {time.perf_counter() - start:6.3f}s  sent={len(sent)}")
@@ -0,0 +1,48 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__)) + '/../'
+sys.path.insert(0, ROOT)
+from models.backends import train_isolation_forest
+from models.flat_iforest import FlatIsolationForest
+
+
+def per_call(fn, X, budget: float) -> float:
+    # budget초 안에서 반복 (최소 1회), 호출당 평균 시간
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn(X)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget:
+            return elapsed / calls
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='평탄 배열 IsolationForest 점수 계산기 vs sklearn predict 마이크로벤치마크 '
+                                                 '(batch 크기별)')
+    parser.add_argument('--features', type=int, default=8)
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--train-rows', type=int, default=10000)
+    parser.add_argument('--sizes', default='1,10,60,256,1000,10000,100000,1000000')
+    parser.add_argument('--budget', type=float, default=1.0, help='크기별 측정 시간(초)')
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(0)
+    # 저장소 기본 설정(n_jobs=-1)으로 학습한 모델
+    model = train_isolation_forest(rng.randn(args.train_rows, args.features), 0.01, n_estimators=args.trees)
+    flat = FlatIsolationForest.from_sklearn(model, large_batch=None)
+    dispatch = FlatIsolationForest.from_sklearn(model)
+    print(f"{'rows':>8} {'sklearn':>12} {'flat':>12} {'flat+dispatch':>14} {'speedup':>8}  labels")
+    for n in map(int, args.sizes.split(',')):
+        X = rng.randn(n, args.features)
+        same = np.array_equal(model.predict(X), flat.predict(X))
+        t_sk = per_call(model.predict, X, args.budget)
+        t_flat = per_call(flat.predict, X, args.budget)
+        t_dispatch = per_call(dispatch.predict, X, args.budget)
+        print(f"{n:>8} {t_sk * 1e3:>10.3f}ms {t_flat * 1e3:>10.3f}ms {t_dispatch * 1e3:>12.3f}ms "
+              f"{t_sk / t_dispatch:>7.1f}x  {'identical' if same else 'DIFFERENT'}")
@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__)) + '/../'
+sys.path.insert(0, ROOT)
+from models.backends import train_isolation_forest
+from models.fleet import train_fleet
+
+
+def peak_rss_mb() -> float:
+    with open('/proc/self/status') as f:
+        return int(next(l for l in f if l.startswith('VmHWM')).split()[1]) / 1024
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='entity별 IsolationForest fleet 학습(process pool + pack 파일)과 '
+                                                 'LRU 임의 접근 벤치마크 (파일별 joblib 순차 학습 대비)')
+    parser.add_argument('--entities', type=int, default=10000)
+    parser.add_argument('--rows', type=int, default=60, help='entity당 행 수')
+    parser.add_argument('--features', type=int, default=4)
+    parser.add_argument('--trees', type=int, default=25)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--baseline-entities', type=int, default=200, help='순차 baseline은 일부만 학습해 외삽')
+    parser.add_argument('--lookups', type=int, default=20000)
+    parser.add_argument('--cache-size', type=int, default=1024)
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(0)
+    X = rng.rand(args.entities * args.rows, args.features)
+    entities = np.repeat([f'host-{i:05d}' for i in range(args.entities)], args.rows)
+    params = {'n_estimators': args.trees}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # baseline: entity마다 순차 학습 + joblib 파일 하나
+        n = min(args.baseline_entities, args.entities)
+        start = time.perf_counter()
+        for i in range(n):
+            model = train_isolation_forest(X[i * args.rows:(i + 1) * args.rows], 0.01, n_jobs=1, **params)
+            joblib.dump(model, os.path.join(tmp, f'host-{i:05d}.joblib'))
+        per_entity = (time.perf_counter() - start) / n
+        files_mb = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp)) / n * args.entities / 2 ** 20
+        print(f"serial joblib files : {per_entity * args.entities:8.1f}s (extrapolated from {n}), "
+              f"{args.entities} files, ~{files_mb:,.0f} MiB")
+
+        path = os.path.join(tmp, 'fleet.pack')
+        start = time.perf_counter()
+        fleet = train_fleet(X, entities, 0.01, path, params=params, n_workers=args.workers,
+                            cache_size=args.cache_size)
+        elapsed = time.perf_counter() - start
+        print(f"fleet pack          : {elapsed:8.1f}s with {args.workers} workers, 1 file, "
+              f"{os.path.getsize(path) / 2 ** 20:,.0f} MiB, parent peak RSS {peak_rss_mb():.0f} MiB")
+
+        # 임의 접근: 일부 entity에 조회가 몰리는 분포 (Zipf)
+        keys = np.array([f'host-{i:05d}' for i in range(args.entities)])
+        picks = keys[np.minimum(rng.zipf(1.2, args.lookups) - 1, args.entities - 1)]
+        start = time.perf_counter()
+        for key in picks:
+            fleet.model_for(key)
+        elapsed = time.perf_counter() - start
+        pack = fleet.pack
+        print(f"lookups             : {elapsed / args.lookups * 1e6:8.1f}us mean over {args.lookups}, "
+              f"LRU {args.cache_size} hit rate {pack.hits / (pack.hits + pack.misses):.1%}")
+        fleet.close()
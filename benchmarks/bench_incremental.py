@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__)) + '/../'
+sys.path.insert(0, ROOT)
+from anomaly_detection import _train_and_publish
+from models.backends import train_isolation_forest
+from storage.model_store import ModelStore
+
+
+def window(rng, i: int, rows: int, features: int, regimes: int) -> np.ndarray:
+    # 재학습 window i: regime(정상 수준)이 주기적으로 바뀜
+    return (i % regimes) + 0.1 * rng.randn(rows, features)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='증분 재학습(tree 교체 + reservoir) vs 전체 이력 재학습 vs '
+                                                 'window만 재학습: 재학습 시간과 과거 정상 패턴 유지')
+    parser.add_argument('--retrains', type=int, default=30)
+    parser.add_argument('--window', type=int, default=20000, help='재학습 window 행 수')
+    parser.add_argument('--features', type=int, default=8)
+    parser.add_argument('--regimes', type=int, default=3)
+    parser.add_argument('--reservoir', type=int, default=20000)
+    parser.add_argument('--replace-fraction', type=float, default=0.25)
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(0)
+    windows = [window(rng, i, args.window, args.features, args.regimes) for i in range(args.retrains)]
+    # 모든 regime의 정상 데이터: 오탐률(-1 비율)이 낮을수록 과거 패턴을 기억
+    holdout = np.vstack([window(rng, r, 2000, args.features, args.regimes) for r in range(args.regimes)])
+    incremental = {'reservoir_size': args.reservoir, 'replace_fraction': args.replace_fraction}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ModelStore(tmp, keep_versions=2)
+        times = {'full history': [], 'window only': [], 'incremental': []}
+        for i, X in enumerate(windows):
+            history = np.vstack(windows[:i + 1])
+            start = time.perf_counter()
+            full = train_isolation_forest(history, 0.01)
+            times['full history'].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            window_only = train_isolation_forest(X, 0.01)
+            times['window only'].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            _train_and_publish(tmp, 0.01, X, incremental=incremental)
+            times['incremental'].append(time.perf_counter() - start)
+        models = {'full history': full, 'window only': window_only, 'incremental': store.load_current()}
+        print(f"{args.retrains} retrains x {args.window} rows ({args.regimes} regimes, reservoir {args.reservoir})")
+        print(f"{'':>14} {'first':>9} {'last':>9} {'total':>9}  false positives on all regimes")
+        for name, t in times.items():
+            fp = (models[name].predict(holdout) == -1).mean()
+            print(f"{name:>14} {t[0]:>8.2f}s {t[-1]:>8.2f}s {sum(t):>8.1f}s  {fp:.1%}")
@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+from models.lstm_detector import LSTMAutoencoderDetector, sliding_windows
+
+
+def measure(fn):
+    # NumPy 할당 최대치 (tracemalloc, TensorFlow 내부 버퍼 제외)와 경과 시간
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='LSTM 오토인코더 window 구성 복사 vs strided view + chunk 추론 메모리·시간 벤치마크')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--features', type=int, default=8)
+    parser.add_argument('--timesteps', type=int, default=30)
+    parser.add_argument('--chunk-size', type=int, default=4096)
+    args = parser.parse_args()
+
+    X = np.random.RandomState(0).rand(args.rows, args.features)
+    detector = LSTMAutoencoderDetector(args.timesteps, args.features, latent_dim=16)
+    detector.compute_reconstruction_error(sliding_windows(X[:args.timesteps * 2], args.timesteps))
+
+    def copied():
+        # window마다 행을 복사해 (n, timesteps, features) 배열을 만든 뒤 한 번에 predict
+        windows = np.stack([X[i:i + args.timesteps] for i in range(len(X) - args.timesteps + 1)])
+        reconstructions = detector.autoencoder.predict(windows, batch_size=args.chunk_size, verbose=0)
+        return np.mean(np.square(windows - reconstructions), axis=(1, 2))
+
+    def chunked():
+        return detector.compute_reconstruction_error(sliding_windows(X, args.timesteps), args.chunk_size)
+
+    print(f"{args.rows} rows x {args.features} features, timesteps={args.timesteps} "
+          f"(input matrix {X.nbytes / 1e6:.0f}MB)")
+    base, t_copy, m_copy = measure(copied)
+    print(f"copied windows : {t_copy:6.2f}s  peak numpy {m_copy / 1e6:8.1f}MB")
+    errors, t_view, m_view = measure(chunked)
+    print(f"view + chunks  : {t_view:6.2f}s  peak numpy {m_view / 1e6:8.1f}MB  "
+          f"max |diff| {np.abs(errors - base).max():.2e}")
@@ -0,0 +1,26 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+from alerting.suppression import MuteList
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='MuteList rule 수 증가에 따른 is_muted 비용 벤치마크')
+    parser.add_argument('--rules', type=int, nargs='+', default=[10, 1000, 10000, 100000])
+    parser.add_argument('--alerts', type=int, default=50000)
+    args = parser.parse_args()
+
+    alerts = [{'alertname': 'AnomalyDetected', 'severity': 'warning', 'instance': f'node{i % 20000:05d}'}
+              for i in range(args.alerts)]
+    for n in args.rules:
+        # 유지보수 window: 인스턴스별 뮤트 + 소수의 정규식 뮤트
+        mutes = [{'alertname': 'AnomalyDetected', 'instance': f'node{i:05d}'} for i in range(n)]
+        mutes += [{'matchers': ['severity="info"', 'instance=~"canary-.*"']} for _ in range(5)]
+        mute_list = MuteList(mutes)
+        start = time.perf_counter()
+        muted = sum(mute_list.is_muted(labels) for labels in alerts)
+        elapsed = time.perf_counter() - start
+        print(f"rules={n:7d}  {elapsed / len(alerts) * 1e6:7.2f} us/alert  muted={muted}")
@@ -0,0 +1,40 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+from streaming.online_iforest import OnlineIsolationForestDetector
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='OnlineIsolationForestDetector 샘플 단위 vs mini-batch 처리량 벤치마크')
+    parser.add_argument('--samples', type=int, default=100000)
+    parser.add_argument('--features', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--n-trees', type=int, default=25)
+    parser.add_argument('--height', type=int, default=8)
+    args = parser.parse_args()
+
+    X = np.random.RandomState(0).rand(args.samples, args.features)
+    features = [f'f{i}' for i in range(args.features)]
+    kwargs = dict(n_trees=args.n_trees, height=args.height, seed=42)
+
+    # 샘플 단위 dict API는 일부만 측정 후 처리량 환산
+    n = min(args.samples, 10000)
+    detector = OnlineIsolationForestDetector(**kwargs)
+    start = time.perf_counter()
+    for row in X[:n]:
+        detector.detect(dict(zip(features, row)), threshold=0.8)
+    elapsed = time.perf_counter() - start
+    print(f"detect (dict)      {n:7d} samples  {n / elapsed:10.0f} samples/s")
+
+    for size in args.batch_size:
+        detector = OnlineIsolationForestDetector(features=features, **kwargs)
+        start = time.perf_counter()
+        for i in range(0, args.samples, size):
+            detector.detect_many(X[i:i + size], threshold=0.8)
+        elapsed = time.perf_counter() - start
+        print(f"detect_many b={size:5d} {args.samples:7d} samples  {args.samples / elapsed:10.0f} samples/s")
@@ -0,0 +1,53 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+from streaming.sharded import ShardedStreamingEngine
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='entity별 스트리밍 모델 multi-process sharding 처리량 벤치마크')
+    parser.add_argument('--entities', type=int, default=20000)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--features', type=int, default=4)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--chunk', type=int, default=20000)
+    parser.add_argument('--n-trees', type=int, default=10)
+    parser.add_argument('--height', type=int, default=6)
+    parser.add_argument('--window-size', type=int, default=32)
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(0)
+    names = [f'svc-{i:06d}' for i in range(args.entities)]
+    entities = [names[i] for i in rng.randint(0, args.entities, args.rows)]
+    X = rng.rand(args.rows, args.features)
+    timestamps = np.arange(args.rows)
+    features = [f'f{i}' for i in range(args.features)]
+
+    base = None
+    for n in args.workers:
+        engine = ShardedStreamingEngine(features, n_workers=n, n_trees=args.n_trees, height=args.height,
+                                        window_size=args.window_size, ring_capacity=4 * args.chunk)
+        # 모델 생성·첫 window는 측정에서 제외
+        engine.submit(names, np.zeros(args.entities), rng.rand(args.entities, args.features))
+        engine.flush()
+        start = time.perf_counter()
+        for i in range(0, args.rows, args.chunk):
+            engine.submit(entities[i:i + args.chunk], timestamps[i:i + args.chunk], X[i:i + args.chunk])
+        engine.flush()
+        elapsed = time.perf_counter() - start
+        anomalies = len(engine.results())
+        rate = args.rows / elapsed
+        base = base or rate
+        print(f"workers={n:2d}  {args.rows} rows / {args.entities} entities  {elapsed:6.2f}s  "
+              f"{rate:10,.0f} rows/s  x{rate / base:4.2f}  anomalies={anomalies}")
+
+        # 상태 이전 비용: worker 하나 추가 (소유권이 바뀌는 약 1/(n+1)의 entity만 이동)
+        start = time.perf_counter()
+        engine.add_worker()
+        print(f"           add_worker: {time.perf_counter() - start:.2f}s")
+        engine.close()
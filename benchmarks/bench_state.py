@@ -0,0 +1,40 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+from alerting.suppression import Deduplicator, FlappingSuppressor, MuteList, filter_alerts
+from storage.state_store import SQLiteStateStore
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SQLiteStateStore 상태 크기별 시작·filter_alerts 비용 벤치마크')
+    parser.add_argument('--keys', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--alerts', type=int, default=1000)
+    args = parser.parse_args()
+
+    alerts = [{'labels': {'alertname': f'AnomalyDetected/node{i:07d}'}} for i in range(args.alerts)]
+    now = time.time()
+    for n in args.keys:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'state.db')
+            store = SQLiteStateStore(path)
+            for i in range(0, n, 100000):
+                store.put_many('dedup', {f'AnomalyDetected/node{j:07d}': (now, b'')
+                                         for j in range(i, min(n, i + 100000))})
+            store.close()
+
+            # 새 pod: store 열기 + 첫 batch 처리
+            start = time.perf_counter()
+            store = SQLiteStateStore(path)
+            opened = time.perf_counter() - start
+            ded = Deduplicator(timedelta(minutes=10), store=store)
+            flapping = FlappingSuppressor(timedelta(minutes=5), threshold=3, store=store)
+            sent = filter_alerts(alerts, flapping, ded, MuteList([]))
+            total = time.perf_counter() - start
+            store.close()
+            print(f"state={n:8d} keys  open={opened * 1e3:6.2f} ms  open+filter {args.alerts} alerts="
+                  f"{total * 1e3:7.2f} ms  sent={len(sent)}  db={os.path.getsize(path) / 2**20:6.1f} MiB")
@@ -0,0 +1,96 @@
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import requests
+import yaml
+
+ROOT = os.path.dirname(os.path.abspath(__file__)) + '/../'
+sys.path.insert(0, ROOT)
+from benchmarks.bench_chunked import free_port, wait_ready
+from streaming.remote_write import encode_write_request
+
+
+def push(args):
+    # 클라이언트 하나: rows_per_request행씩 현재 시각 timestamp로 remote-write, 503이면 잠시 후 재전송
+    port, client, requests_per_client, rows, features, anomaly_every = args
+    rng = np.random.RandomState(client)
+    session = requests.Session()
+    url = f'http://127.0.0.1:{port}/api/v1/write'
+    accepted = rejected = 0
+    for r in range(requests_per_client):
+        ts = int(time.time() * 1000)
+        X = 0.3 + 0.2 * rng.rand(rows, len(features))
+        X[::anomaly_every] = 0.99
+        entities = [f'c{client}-r{r}-{i}' for i in range(rows)]
+        series = [({'__name__': f, 'instance': e}, [(ts, float(X[i, j]))])
+                  for j, f in enumerate(features) for i, e in enumerate(entities)]
+        body = encode_write_request(series)
+        while session.post(url, data=body).status_code == 503:
+            rejected += 1
+            time.sleep(0.05)
+        accepted += 1
+    return accepted, rejected
+
+
+def scrape(port: int) -> dict:
+    values = {}
+    for line in requests.get(f'http://127.0.0.1:{port}/metrics').text.splitlines():
+        if line.startswith('anomaly_detection_stream'):
+            name, value = line.rsplit(' ', 1)
+            values[name] = float(value)
+    return values
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='스트리밍 탐지 서비스 remote-write 수신 처리량·알림 지연 벤치마크')
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--features', type=int, default=4)
+    parser.add_argument('--anomaly-every', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--queue-size', type=int, default=100000)
+    args = parser.parse_args()
+    features = [f'f{i}' for i in range(args.features)]
+
+    port, metrics_port = free_port(), free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        config = os.path.join(tmp, 'config.yaml')
+        with open(config, 'w') as f:
+            yaml.safe_dump({
+                'metrics': features, 'stream_host': '127.0.0.1', 'stream_port': port,
+                'stream_metrics_port': metrics_port, 'stream_batch_size': args.batch_size,
+                'stream_queue_size': args.queue_size, 'stream_threshold': 0.8, 'stream_window_size': 1000,
+                'flapping_threshold': 10 ** 6
+            }, f)
+        daemon = subprocess.Popen([sys.executable, '-m', 'streaming.daemon', '--config', config], cwd=ROOT)
+        try:
+            wait_ready(port)
+            wait_ready(metrics_port)
+            total_rows = args.clients * args.requests * args.rows
+            start = time.perf_counter()
+            with multiprocessing.Pool(args.clients) as pool:
+                results = pool.map(push, [(port, c, args.requests, args.rows, features, args.anomaly_every)
+                                          for c in range(args.clients)])
+            sent = time.perf_counter() - start
+            while scrape(metrics_port).get('anomaly_detection_stream_queue_depth', 0) > 0:
+                time.sleep(0.05)
+            elapsed = time.perf_counter() - start
+            m = scrape(metrics_port)
+            count = m.get('anomaly_detection_stream_alert_latency_seconds_count', 0)
+            print(f"{total_rows} rows x {args.features} features from {args.clients} clients: "
+                  f"sent {sent:.2f}s, scored {elapsed:.2f}s, {total_rows * args.features / elapsed:,.0f} samples/s")
+            print(f"503 retries={sum(r for _, r in results)}  alerts={count:.0f}  "
+                  f"mean alert latency={m.get('anomaly_detection_stream_alert_latency_seconds_sum', 0) / max(count, 1):.3f}s")
+            for le in ('0.1', '0.25', '0.5', '1.0', '2.5'):
+                key = f'anomaly_detection_stream_alert_latency_seconds_bucket{{le="{le}"}}'
+                print(f"  <= {le}s: {m.get(key, 0) / max(count, 1):6.1%}")
+        finally:
+            daemon.terminate()
+            daemon.wait()
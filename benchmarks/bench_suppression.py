@@ -0,0 +1,32 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+from alerting.suppression import Deduplicator, FlappingSuppressor
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='FlappingSuppressor·Deduplicator 고유 alert_id 증가 시 비용·메모리 벤치마크')
+    parser.add_argument('--ids', type=int, default=1000000)
+    parser.add_argument('--max-keys', type=int, default=100000)
+    parser.add_argument('--report-every', type=int, default=200000)
+    args = parser.parse_args()
+
+    flapping = FlappingSuppressor(window=timedelta(minutes=5), threshold=3, max_keys=args.max_keys)
+    dedup = Deduplicator(dedup_window=timedelta(minutes=10), max_keys=args.max_keys)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(args.ids):
+        alert_id = f"AnomalyDetected/node{i:07d}/metric_{i % 50}"
+        dedup.is_duplicate(alert_id)
+        flapping.should_suppress(alert_id)
+        if (i + 1) % args.report_every == 0:
+            elapsed = time.perf_counter() - start
+            current, _ = tracemalloc.get_traced_memory()
+            print(f"{i + 1:8d} ids  {elapsed / args.report_every * 1e6:6.2f} us/alert  "
+                  f"keys={len(flapping.history)}/{len(dedup.last_seen)}  traced={current / 2**20:7.1f} MiB")
+            start = time.perf_counter()
@@ -0,0 +1,67 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeAlertmanager:
+    # 벤치마크용 로컬 Alertmanager: POST /api/v2/alerts 수신 개수만 세고 200 응답, GET /stats로 누적 개수 조회
+    def __init__(self, latency: float = 0.0, port: int = 0, reject: int = 0):
+        self.latency = latency
+        # 처음 reject개 요청은 400으로 거부 (영구 실패 처리 테스트용)
+        self.reject = reject
+        self.requests = 0
+        self.alerts = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                if self.path != '/api/v2/alerts' or not isinstance(body, list) or fake.reject > 0:
+                    fake.reject = max(0, fake.reject - 1)
+                    self._reply(400, b'{"message": "bad request"}')
+                    return
+                time.sleep(fake.latency)
+                fake.requests += 1
+                fake.alerts += len(body)
+                self._reply(200, b'')
+
+            def do_GET(self):
+                self._reply(200, json.dumps({'requests': fake.requests, 'alerts': fake.alerts}).encode())
+
+            def _reply(self, status: int, body: bytes):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == '__main__':
+    # 별도 프로세스로 실행: 요청 파싱이 부하 생성 프로세스의 GIL을 점유하지 않도록
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, required=True)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    with FakeAlertmanager(latency=args.latency, port=args.port) as am:
+        am._thread.join()
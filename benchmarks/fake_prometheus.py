@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakePrometheus:
+    # 벤치마크용 로컬 Prometheus: /api/v1/query_range 에 대해 고정 지연 후 matrix 응답
+    def __init__(self, latency: float = 0.02, n_series: int = 1, port: int = 0, max_points: int = 11000):
+        self.latency = latency
+        self.max_points = max_points
+        self.n_series = n_series
+        self.requests = 0
+        self.samples = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                fake.requests += 1
+                time.sleep(fake.latency)
+                start, end = float(params['start']), float(params['end'])
+                if (end - start) / float(params['step'].rstrip('s')) + 1 > fake.max_points:
+                    # 실제 Prometheus와 동일하게 포인트 수 초과 요청은 400으로 거절
+                    status, payload = 400, {'status': 'error', 'errorType': 'bad_data',
+                                            'error': 'exceeded maximum resolution of 11,000 points per timeseries'}
+                else:
+                    status, payload = 200, fake.matrix(params)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def matrix(self, params: dict) -> dict:
+        start, end = float(params['start']), float(params['end'])
+        step = float(params['step'].rstrip('s'))
+        first = start - start % step + (step if start % step else 0)
+        result = []
+        for i in range(self.n_series):
+            values = []
+            t = first
+            while t <= end:
+                values.append([t, str((t / step + i) % 97)])
+                t += step
+            self.samples += len(values)
+            result.append({
+                'metric': {'__name__': params['query'], 'instance': f'node{i:05d}'},
+                'values': values
+            })
+        return {'status': 'success', 'data': {'resultType': 'matrix', 'result': result}}
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == '__main__':
+    # 별도 프로세스로 실행: 응답 생성이 벤치마크 대상 프로세스의 GIL을 점유하지 않도록
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, required=True)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--series', type=int, default=1)
+    args = parser.parse_args()
+    with FakePrometheus(latency=args.latency, n_series=args.series, port=args.port) as prom:
+        prom._thread.join()
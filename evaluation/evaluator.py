@@ -2,6 +2,8 @@ import pandas as pd
 from sklearn.metrics import precision_score, recall_score, f1_score, classification_report
 import logging
 
+from storage.metric_archive import MetricArchive
+
 # 로깅 Configure
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
@@ -11,6 +13,13 @@ class AccuracyEvaluator:
         self.y_true = self.df[label_col].astype(int)
         self.y_pred = self.df[score_col].astype(int)
 
+    @classmethod
+    def from_archive(cls, archive: MetricArchive, start=None, end=None,
+                     label_col: str = 'true_label', score_col: str = 'anomaly', dataset: str = 'results'):
+        # CSV 대신 archive에서 필요한 두 컬럼만 읽어 백테스트
+        df = archive.read(dataset, start=start, end=end, columns=[label_col, score_col])
+        return cls(df, label_col=label_col, score_col=score_col)
+
     def compute_metrics(self):
         precision = precision_score(self.y_true, self.y_pred)
         recall = recall_score(self.y_true, self.y_pred)
@@ -0,0 +1,108 @@
+import numpy as np
+
+# models.registry의 detector별 학습 함수, 무거운 프레임워크는 각 함수 안에서만 import
+
+
+class ReconstructionModel:
+    # 오토인코더 재구성 오차 기반 탐지 모델 (IsolationForest.predict와 같은 -1/1 라벨)
+    # 입력은 학습 데이터의 min/max로 [0, 1] 정규화, 오차가 학습 데이터의 (1 - contamination) 분위수를 넘으면 이상
+    # detector: 학습한 backend 이름 (증분 재학습 시 이어서 학습할 방법 선택)
+    detector = None
+    def __init__(self, scorer, low: np.ndarray, span: np.ndarray, threshold: float = np.inf):
+        self.scorer = scorer
+        self.low = low
+        self.span = span
+        self.threshold = threshold
+
+    @classmethod
+    def fit_scaler(cls, scorer, X: np.ndarray) -> 'ReconstructionModel':
+        low, high = np.nanmin(X, axis=0), np.nanmax(X, axis=0)
+        return cls(scorer, low, np.where(high > low, high - low, 1.0))
+
+    @property
+    def sequential(self) -> bool:
+        # 행 순서(window)에 의존하는 모델이면 predict에 구간 경계(segments)를 넘길 수 있음
+        return getattr(self.scorer, 'sequential', False)
+
+    def scale(self, X: np.ndarray) -> np.ndarray:
+        return ((np.asarray(X, dtype=np.float64) - self.low) / self.span).astype(np.float32)
+
+    def score_samples(self, X: np.ndarray, segments=None) -> np.ndarray:
+        # 행별 재구성 오차 (클수록 이상)
+        if segments is not None and self.sequential:
+            return np.asarray(self.scorer.compute_reconstruction_error(self.scale(X), segments=segments))
+        return np.asarray(self.scorer.compute_reconstruction_error(self.scale(X)))
+
+    def anomaly_score(self, X: np.ndarray, segments=None) -> np.ndarray:
+        # 앙상블 공통 점수 (클수록 이상)
+        return self.score_samples(X, segments)
+
+    def calibrate(self, X: np.ndarray, contamination: float) -> 'ReconstructionModel':
+        self.threshold = float(np.quantile(self.score_samples(X), 1 - contamination))
+        return self
+
+    def predict(self, X: np.ndarray, segments=None) -> np.ndarray:
+        return np.where(self.score_samples(X, segments) > self.threshold, -1, 1)
+
+
+def train_isolation_forest(X: np.ndarray, contamination: float, n_estimators: int = 100,
+                           random_state: int = 42, n_jobs: int = -1):
+    from sklearn.ensemble import IsolationForest
+
+    model = IsolationForest(
+        n_estimators=n_estimators,
+        contamination=contamination,
+        random_state=random_state,
+        n_jobs=n_jobs
+    )
+    return model.fit(X)
+
+
+def train_deep_autoencoder(X: np.ndarray, contamination: float, encoding_dim: int = 32,
+                           epochs: int = 50, batch_size: int = 32) -> ReconstructionModel:
+    # Keras로 학습 후 NumPy 추론 모델만 저장 → 탐지 프로세스는 TensorFlow를 import하지 않음
+    from models.deep_autoencoder import DeepAutoencoderDetector
+
+    model = ReconstructionModel.fit_scaler(None, X)
+    detector = DeepAutoencoderDetector(input_dim=X.shape[1], encoding_dim=encoding_dim)
+    detector.fit(model.scale(X), epochs=epochs, batch_size=batch_size)
+    model.scorer = detector.export_numpy()
+    model.detector = 'deep_autoencoder'
+    return model.calibrate(X, contamination)
+
+
+def train_vae(X: np.ndarray, contamination: float, latent_dim: int = 16,
+              epochs: int = 50, batch_size: int = 32) -> ReconstructionModel:
+    from models.vae_detector import VariationalAutoencoderDetector
+
+    model = ReconstructionModel.fit_scaler(None, X)
+    detector = VariationalAutoencoderDetector(input_dim=X.shape[1], latent_dim=latent_dim)
+    detector.fit(model.scale(X), epochs=epochs, batch_size=batch_size)
+    model.scorer = detector.export_numpy()
+    model.detector = 'vae'
+    return model.calibrate(X, contamination)
+
+
+class RowWindowScorer:
+    # 행 단위 입력을 LSTM 오토인코더의 window 점수로 변환 (entity 경계는 segments로 전달)
+    sequential = True
+
+    def __init__(self, detector):
+        self.detector = detector
+
+    def compute_reconstruction_error(self, X: np.ndarray, segments=None) -> np.ndarray:
+        return self.detector.score_rows(X, segments)
+
+
+def train_lstm_autoencoder(X: np.ndarray, contamination: float, timesteps: int = 10, latent_dim: int = 64,
+                           epochs: int = 50, batch_size: int = 32) -> ReconstructionModel:
+    # LSTM은 NumPy 추론 모델이 없어 탐지 시에도 TensorFlow 필요
+    # 학습 window는 정규화한 행렬 위의 view, batch 단위로만 복사
+    from models.lstm_detector import LSTMAutoencoderDetector, sliding_windows
+
+    model = ReconstructionModel.fit_scaler(None, X)
+    detector = LSTMAutoencoderDetector(timesteps, X.shape[1], latent_dim)
+    detector.fit(sliding_windows(model.scale(X), timesteps), epochs=epochs, batch_size=batch_size)
+    model.scorer = RowWindowScorer(detector)
+    model.detector = 'lstm_autoencoder'
+    return model.calibrate(X, contamination)
@@ -1,15 +1,19 @@
 import tensorflow as tf
 from tensorflow.keras import layers, models
 
+from models.numpy_inference import NumpyAutoencoder, dense_layer
+
 class DeepAutoencoderDetector:   
 # Keras 기반 다변량 이상 탐지용 오토인코더 모델  
     def __init__(self, input_dim: int, encoding_dim: int = 32):
         # 입력 레이어
         input_layer = layers.Input(shape=(input_dim,))
         # 인코딩 레이어
-        encoded = layers.Dense(encoding_dim, activation='relu')(input_layer)
+        self.encoder_layer = layers.Dense(encoding_dim, activation='relu')
+        encoded = self.encoder_layer(input_layer)
         # 디코딩 레이어
-        decoded = layers.Dense(input_dim, activation='sigmoid')(encoded)
+        self.decoder_layer = layers.Dense(input_dim, activation='sigmoid')
+        decoded = self.decoder_layer(encoded)
 
         # 모델 생성
         self.autoencoder = models.Model(inputs=input_layer, outputs=decoded)
@@ -36,6 +40,13 @@ class DeepAutoencoderDetector:
         mse = tf.keras.losses.mse(X, reconstructions)
         return mse
 
+    def export_numpy(self, path: str = None) -> NumpyAutoencoder:
+        # 학습된 가중치를 TensorFlow 없이 점수 내는 NumpyAutoencoder로 추출 (path가 있으면 파일로도 저장)
+        model = NumpyAutoencoder([dense_layer(self.encoder_layer), dense_layer(self.decoder_layer)])
+        if path:
+            model.save(path)
+        return model
+
     def detect(self, X, threshold: float):
         # 이상치 감지 - threshold 이상인 샘플은 1, 아니면 0 반환
         mse = self.compute_reconstruction_error(X)
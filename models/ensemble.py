@@ -0,0 +1,135 @@
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+# 점수 정규화용 학습 점수 분위수 개수
+_QUANTILES = 1001
+
+
+def anomaly_score(model, X: np.ndarray, segments=None) -> np.ndarray:
+    # detector 공통 점수 (클수록 이상): anomaly_score가 있으면 그대로, sklearn 모델은 -decision_function
+    if hasattr(model, 'anomaly_score'):
+        if segments is not None and getattr(model, 'sequential', False):
+            return np.asarray(model.anomaly_score(X, segments=segments))
+        return np.asarray(model.anomaly_score(X))
+    return -np.asarray(model.decision_function(X))
+
+
+_worker_members: list = []
+
+
+def _init_worker(members: list):
+    global _worker_members
+    _worker_members = members
+
+
+def _score_in_worker(i: int, X: np.ndarray, segments) -> np.ndarray:
+    return anomaly_score(_worker_members[i], X, segments)
+
+
+class EnsembleModel:
+    # 여러 detector를 같은 window에 동시에 점수 내고 합치는 모델 (predict는 -1/1)
+    # 각 member 점수는 학습 데이터 점수 분포의 백분위(0~1)로 정규화해 단위·방향을 맞춤
+    # combine='mean': 정규화 점수의 가중 평균이 학습 데이터 기준 (1 - contamination) 분위수를 넘으면 이상
+    # combine='vote': member별 백분위가 (1 - contamination)을 넘으면 표 하나(가중치만큼), min_votes 이상이면 이상
+    # (min_votes가 없으면 가중치 합의 과반, 즉 절반을 넘어야 이상)
+    # executor='thread'|'process': member 점수 계산 병렬화 방식 (process는 worker마다 member를 한 번만 전달,
+    # TensorFlow 등 fork에 안전하지 않은 member가 있을 수 있어 spawn으로 시작)
+    detector = 'ensemble'
+
+    def __init__(self, names: Sequence[str], members: Sequence, weights: Optional[Sequence[float]] = None,
+                 combine: str = 'mean', min_votes: Optional[float] = None, executor: str = 'thread'):
+        if combine not in ('mean', 'vote'):
+            raise ValueError(f"unknown combine mode: {combine}")
+        if executor not in ('thread', 'process'):
+            raise ValueError(f"unknown executor: {executor}")
+        self.names = list(names)
+        self.members = list(members)
+        self.weights = np.asarray(weights if weights is not None else np.ones(len(self.members)), dtype=np.float64)
+        self.combine = combine
+        self.min_votes = min_votes
+        self.executor = executor
+        self.quantiles = np.zeros((len(self.members), _QUANTILES))
+        self.cutoff = 1.0
+        self.threshold = 1.0
+        self._pool: Optional[Executor] = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_pool'] = None
+        return state
+
+    @property
+    def sequential(self) -> bool:
+        return any(getattr(m, 'sequential', False) for m in self.members)
+
+    def _executor(self) -> Executor:
+        if self._pool is None:
+            if self.executor == 'process':
+                self._pool = ProcessPoolExecutor(max_workers=len(self.members),
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=_init_worker, initargs=(self.members,))
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=len(self.members), thread_name_prefix='ensemble')
+        return self._pool
+
+    def member_scores(self, X: np.ndarray, segments=None) -> np.ndarray:
+        # (member x 행) 원 점수, member들을 동시에 실행 → 지연은 가장 느린 member 수준
+        pool = self._executor()
+        if self.executor == 'process':
+            futures = [pool.submit(_score_in_worker, i, X, segments) for i in range(len(self.members))]
+        else:
+            futures = [pool.submit(anomaly_score, m, X, segments) for m in self.members]
+        return np.vstack([f.result() for f in futures])
+
+    def normalize(self, scores: np.ndarray) -> np.ndarray:
+        # member별 학습 점수 분포에서의 백분위 (0~1)
+        levels = np.linspace(0, 1, _QUANTILES)
+        return np.vstack([np.interp(s, q, levels) for s, q in zip(scores, self.quantiles)])
+
+    def _combined(self, normalized: np.ndarray) -> np.ndarray:
+        if self.combine == 'vote':
+            return self.weights @ (normalized > self.cutoff)
+        return self.weights @ normalized / self.weights.sum()
+
+    def calibrate(self, X: np.ndarray, contamination: float, segments=None) -> 'EnsembleModel':
+        scores = self.member_scores(X, segments)
+        self.quantiles = np.quantile(scores, np.linspace(0, 1, _QUANTILES), axis=1).T
+        self.cutoff = 1 - contamination
+        if self.combine == 'mean':
+            self.threshold = float(np.quantile(self._combined(self.normalize(scores)), 1 - contamination))
+        return self
+
+    def anomaly_score(self, X: np.ndarray, segments=None) -> np.ndarray:
+        return self._combined(self.normalize(self.member_scores(X, segments)))
+
+    def predict(self, X: np.ndarray, segments=None) -> np.ndarray:
+        score = self.anomaly_score(X, segments)
+        if self.combine == 'mean':
+            anomalous = score > self.threshold
+        elif self.min_votes is None:
+            anomalous = score > self.weights.sum() / 2
+        else:
+            anomalous = score >= self.min_votes
+        return np.where(anomalous, -1, 1)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def train_ensemble(X: np.ndarray, contamination: float, members: List[dict], combine: str = 'mean',
+                   min_votes: Optional[float] = None, executor: str = 'thread') -> EnsembleModel:
+    # members: [{'detector': 'isolation_forest', 'weight': 1.0, 'params': {...}}, ...]
+    from models.registry import get_detector
+
+    models = [get_detector(m['detector'])(X, contamination, **m.get('params', {})) for m in members]
+    ensemble = EnsembleModel([m.get('name', m['detector']) for m in members], models,
+                             [m.get('weight', 1.0) for m in members], combine, min_votes, executor)
+    try:
+        return ensemble.calibrate(X, contamination)
+    finally:
+        ensemble.close()
@@ -0,0 +1,132 @@
+import logging
+import sys
+from typing import Optional
+
+import numpy as np
+
+# 점수 계산 시 (행 x tree) 임시 배열 크기 상한용 행 chunk
+_CHUNK_ROWS = 1024
+
+
+class FlatIsolationForest:
+    # 학습된 sklearn IsolationForest를 node 단위 평탄 배열로 변환한 점수 계산기
+    # 모든 tree를 한 번에 depth 단위로 내려가며(반복 = 최대 depth) 행 전체를 벡터 연산으로 처리
+    # sklearn과 같은 연산 순서(float32 입력, tree 순서대로 누적)라 score/label이 bit 단위로 같음
+    # 호출당 overhead가 없는 대신 원소당 비용은 sklearn의 컴파일된 순회보다 커서,
+    # large_batch행 이상은 원래 모델(model)로 계산 (None이면 항상 평탄 배열)
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children: np.ndarray,
+                 missing_left: np.ndarray, leaf_value: np.ndarray, roots: np.ndarray, max_depth: int,
+                 denominator: float, offset: float, n_features: int, model=None,
+                 large_batch: Optional[int] = 1024):
+        self.feature = feature
+        self.threshold = threshold
+        # node i의 왼쪽/오른쪽 자식이 children[2i] / children[2i + 1]
+        self.children = children
+        # 결측값을 왼쪽으로 보내는 node가 없으면 NaN은 비교(False)대로 오른쪽 → 별도 처리 생략
+        self.missing_left = missing_left if missing_left.any() else None
+        self.leaf_value = leaf_value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.denominator = denominator
+        self.offset_ = offset
+        self.n_features_in_ = n_features
+        self.model = model
+        self.large_batch = large_batch if model is not None else None
+
+    @classmethod
+    def from_sklearn(cls, model, large_batch: Optional[int] = 1024) -> 'FlatIsolationForest':
+        from sklearn.ensemble._iforest import _average_path_length
+
+        # 공개 속성(estimators_, estimators_features_, max_samples_, tree_ 배열)만 사용 (sklearn 버전 무관)
+        # tree별 node 배열을 이어 붙이고 자식 index를 전체 배열 기준으로 변환
+        # leaf는 자기 자신을 가리켜 남은 반복 동안 제자리에 머묾
+        # tree의 feature 번호는 estimators_features_로 입력 컬럼 번호로 변환 (max_features < 전체인 경우)
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        for estimator, columns in zip(model.estimators_, model.estimators_features_):
+            tree = estimator.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+            idx = np.arange(n)
+            feature = np.where(is_leaf, 0, tree.feature)
+            features.append(np.asarray(columns)[feature])
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, idx, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, idx, tree.children_right) + offset)
+            # 결측값 분기가 없는 버전(< 1.3)은 NaN이 비교대로 오른쪽
+            missing_left = getattr(tree, 'missing_go_to_left', None)
+            missing.append(np.zeros(n, dtype=bool) if missing_left is None else missing_left.astype(bool))
+            # sklearn이 leaf마다 더하는 값과 같은 식: path의 node 수 + 남은 평균 path 길이 - 1
+            values.append(_node_depths(tree) + _average_path_length(tree.n_node_samples) - 1.0)
+            roots.append(offset)
+            offset += n
+        denominator = len(model.estimators_) * _average_path_length([model.max_samples_])
+        children = np.stack([np.concatenate(lefts), np.concatenate(rights)], axis=1).ravel()
+        return cls(np.concatenate(features).astype(np.int32), np.concatenate(thresholds),
+                   children.astype(np.int32), np.concatenate(missing), np.concatenate(values),
+                   np.asarray(roots, dtype=np.int32),
+                   max(e.tree_.max_depth for e in model.estimators_), float(denominator[0]), float(model.offset_),
+                   model.n_features_in_, model, large_batch)
+
+    def _depths(self, X: np.ndarray) -> np.ndarray:
+        # 행별 입력 시작 위치 + node의 feature 번호로 평탄화된 X에서 값을 읽음
+        flat = X.ravel()
+        row_start = (np.arange(len(X), dtype=np.int32) * X.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            x = flat[row_start + self.feature[nodes]]
+            go_right = ~(x <= self.threshold[nodes])
+            if self.missing_left is not None:
+                go_right &= ~(np.isnan(x) & self.missing_left[nodes])
+            nodes = self.children[2 * nodes + go_right]
+        # tree 순서대로 누적 (sklearn의 tree별 += 와 같은 합산 순서)
+        return np.cumsum(self.leaf_value[nodes], axis=1)[:, -1]
+
+    def score_samples(self, X) -> np.ndarray:
+        # sklearn과 같이 float32로 변환한 입력으로 비교
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"expected {self.n_features_in_} features, got shape {X.shape}")
+        if self.large_batch is not None and len(X) >= self.large_batch:
+            return self.model.score_samples(X)
+        depths = np.empty(len(X))
+        for start in range(0, len(X), _CHUNK_ROWS):
+            depths[start:start + _CHUNK_ROWS] = self._depths(X[start:start + _CHUNK_ROWS])
+        denominator = self.denominator
+        scores = 2 ** (-np.divide(depths, denominator, out=np.ones_like(depths), where=denominator != 0))
+        return -scores
+
+    def decision_function(self, X) -> np.ndarray:
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X) -> np.ndarray:
+        decision = self.decision_function(X)
+        labels = np.ones_like(decision, dtype=int)
+        labels[decision < 0] = -1
+        return labels
+
+
+def _node_depths(tree) -> np.ndarray:
+    # node별 root부터의 path node 수 (root = 1), depth 단위로 부모 값에서 자식 값을 채움
+    depths = np.zeros(tree.node_count)
+    depths[0] = 1.0
+    parents = np.array([0])
+    while len(parents):
+        parents = parents[tree.children_left[parents] != -1]
+        children = np.concatenate([tree.children_left[parents], tree.children_right[parents]])
+        depths[children] = np.tile(depths[parents] + 1.0, 2)
+        parents = children
+    return depths
+
+
+def compile_model(model, large_batch: Optional[int] = 1024):
+    # IsolationForest면 평탄 점수 계산기로, 그 외 모델은 그대로
+    # (IsolationForest를 unpickle했다면 sklearn은 이미 로드됨 → 다른 모델에는 sklearn을 import하지 않음)
+    # 변환할 수 없는 모델(예: tree_ 배열 구조가 다른 sklearn 버전)은 원래 모델로 계산
+    ensemble = sys.modules.get('sklearn.ensemble')
+    if ensemble is not None and isinstance(model, ensemble.IsolationForest):
+        try:
+            return FlatIsolationForest.from_sklearn(model, large_batch)
+        except (AttributeError, ImportError) as e:
+            logging.warning("Flat scoring unavailable (%s); using the sklearn model", e)
+    return model
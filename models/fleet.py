@@ -0,0 +1,124 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from storage.model_pack import ModelPack, ModelPackWriter
+
+# entity 모델이 없을 때(새 entity, 행이 너무 적은 entity) 쓰는 전체 데이터 모델의 key
+GLOBAL_KEY = '__global__'
+
+
+def _fit_chunk(detector: str, contamination: float, params: dict,
+               chunk: List[Tuple[str, np.ndarray]]) -> List[Tuple[str, bytes]]:
+    # worker 프로세스: entity 여러 개를 학습하고 압축된 blob만 반환
+    from models.registry import get_detector
+
+    train = get_detector(detector)
+    return [(key, ModelPackWriter.encode(train(X, contamination, **params))) for key, X in chunk]
+
+
+def _entity_chunks(X: np.ndarray, keys: np.ndarray, chunk_entities: int,
+                   min_rows: int) -> Iterator[List[Tuple[str, np.ndarray]]]:
+    # entity key로 정렬한 행 구간을 chunk_entities개씩 묶음 (행은 chunk를 보낼 때만 복사)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    bounds = np.r_[starts, len(keys)]
+    chunk = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if end - start < min_rows:
+            continue
+        chunk.append((str(sorted_keys[start]), X[order[start:end]]))
+        if len(chunk) == chunk_entities:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def train_fleet(X: np.ndarray, entities: np.ndarray, contamination: float, path: str,
+                detector: str = 'isolation_forest', params: Optional[dict] = None,
+                n_workers: Optional[int] = None, chunk_entities: int = 32, min_rows: int = 10,
+                cache_size: int = 1024) -> 'EntityModelFleet':
+    # entity별 모델을 worker 프로세스에서 병렬 학습해 pack 파일 하나(path)에 기록
+    # 동시에 처리 중인 chunk는 worker당 2개까지 (메모리 상한), 끝난 chunk는 바로 pack에 추가
+    params = dict(params or {})
+    if detector == 'isolation_forest':
+        # 병렬화는 entity 단위로, 모델 하나는 단일 스레드
+        params.setdefault('n_jobs', 1)
+    keys = np.asarray(entities).astype(str)
+    n_workers = n_workers or os.cpu_count() or 1
+    with ModelPackWriter(path) as writer:
+        writer.add_encoded(GLOBAL_KEY, _fit_chunk(detector, contamination, params, [(GLOBAL_KEY, X)])[0][1])
+        chunks = _entity_chunks(X, keys, chunk_entities, min_rows)
+        if n_workers <= 1:
+            for chunk in chunks:
+                for key, blob in _fit_chunk(detector, contamination, params, chunk):
+                    writer.add_encoded(key, blob)
+        else:
+            # spawn: fetch용 스레드가 있는 프로세스를 fork하지 않도록
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                pending = set()
+                for chunk in chunks:
+                    if len(pending) >= 2 * n_workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            for key, blob in future.result():
+                                writer.add_encoded(key, blob)
+                    pending.add(pool.submit(_fit_chunk, detector, contamination, params, chunk))
+                for future in pending:
+                    for key, blob in future.result():
+                        writer.add_encoded(key, blob)
+        logging.info("Trained %d entity models into %s", len(writer) - 1, path)
+    return EntityModelFleet(path, cache_size)
+
+
+class EntityModelFleet:
+    # entity별 모델 묶음 (pack 파일 참조만 가지며, 모델은 처음 쓸 때 pack에서 읽어 LRU cache)
+    # predict는 entity별 행 구간(segments)과 그 entity key를 받아 -1/1 라벨 반환
+    per_entity = True
+    transform: Optional[Callable] = None
+
+    def __init__(self, path: str, cache_size: int = 1024):
+        self.path = os.path.abspath(path)
+        self.cache_size = cache_size
+        self._pack: Optional[ModelPack] = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_pack'] = None
+        return state
+
+    @property
+    def pack(self) -> ModelPack:
+        if self._pack is None:
+            self._pack = ModelPack(self.path, self.cache_size, self.transform)
+        return self._pack
+
+    def set_transform(self, transform: Optional[Callable]):
+        # pack에서 읽은 모델에 적용할 변환 (예: flat_iforest.compile_model), 이미 cache된 모델은 다시 읽음
+        self.transform = transform
+        self.close()
+
+    def model_for(self, key) -> object:
+        model = self.pack.get(str(key))
+        return model if model is not None else self.pack.get(GLOBAL_KEY)
+
+    def predict(self, X: np.ndarray, segments: Optional[np.ndarray] = None,
+                entities: Optional[np.ndarray] = None) -> np.ndarray:
+        if segments is None or entities is None:
+            return self.pack.get(GLOBAL_KEY).predict(X)
+        bounds = np.r_[segments, len(X)]
+        labels = np.empty(len(X), dtype=int)
+        for key, start, end in zip(entities, bounds[:-1], bounds[1:]):
+            labels[start:end] = self.model_for(key).predict(X[start:end])
+        return labels
+
+    def close(self):
+        if self._pack is not None:
+            self._pack.close()
+            self._pack = None
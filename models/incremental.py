@@ -0,0 +1,111 @@
+import copy
+import logging
+import sys
+from typing import Optional
+
+import numpy as np
+
+from models.backends import ReconstructionModel
+
+# 이전 모델에 새 데이터(+ 과거 reservoir 표본)만으로 증분 학습, 비용은 새 데이터 양에 비례
+# 지원하지 않는 모델이면 None → 호출 측에서 전체 재학습
+
+
+def update_isolation_forest(model, X: np.ndarray, contamination: float, replace_fraction: float = 0.25):
+    # 새 tree k개를 X로 학습해 추가하고 가장 오래된 tree k개를 제거, offset_은 X로 다시 계산
+    model = copy.deepcopy(model)
+    n = len(model.estimators_)
+    k = min(n, max(1, int(round(n * replace_fraction))))
+    # 재학습마다 다른 seed로 새 tree 생성
+    generation = getattr(model, 'incremental_generation_', 0) + 1
+    base = model.random_state if isinstance(model.random_state, int) else 0
+    # 점수 정규화 c(max_samples)는 모든 tree가 공유 → X가 작아도 기존 tree 기준의 max_samples를 유지
+    max_samples, params = model._max_samples, model.get_params()
+    # fit 안의 offset_ 계산(n + k개 tree로 X 점수)은 건너뛰고 남길 tree로만 계산
+    model.set_params(warm_start=True, n_estimators=n + k, contamination='auto',
+                     max_samples=min(max_samples, len(X)), random_state=(base + generation) % 2 ** 31)
+    model.fit(X)
+    model._max_samples = model.max_samples_ = max_samples
+    model.estimators_ = model.estimators_[k:]
+    model.estimators_features_ = model.estimators_features_[k:]
+    # tree별 점수 계산용 cache (sklearn >= 1.3에만 있음)는 남길 tree와 같이 자름
+    for attr in ('_decision_path_lengths', '_average_path_length_per_tree'):
+        if hasattr(model, attr):
+            setattr(model, attr, getattr(model, attr)[k:])
+    # _seeds(→ estimators_samples_)는 warm_start fit에서 새 tree k개 것만 남고, 이전 tree의 seed는
+    # 이전 재학습의 X 기준이라 다시 만들 수 없음 → 잘못된 표본을 돌려주지 않도록 삭제 (점수 계산에는 쓰지 않음)
+    if hasattr(model, '_seeds'):
+        del model._seeds
+    model.set_params(warm_start=False, n_estimators=n, contamination=contamination, random_state=base,
+                     max_samples=params['max_samples'])
+    model.incremental_generation_ = generation
+    if contamination != 'auto':
+        model.offset_ = np.percentile(model.score_samples(X), 100.0 * contamination)
+    return model
+
+
+def update_deep_autoencoder(model: ReconstructionModel, X: np.ndarray, contamination: float,
+                            epochs: int = 5, batch_size: int = 32) -> ReconstructionModel:
+    # 저장된 NumPy 가중치로 Keras 모델을 다시 구성해 이어서 학습 (정규화 범위는 이전 모델 유지)
+    from models.deep_autoencoder import DeepAutoencoderDetector
+
+    (enc_kernel, enc_bias, _), (dec_kernel, dec_bias, _) = model.scorer.layers
+    detector = DeepAutoencoderDetector(input_dim=enc_kernel.shape[0], encoding_dim=enc_kernel.shape[1])
+    detector.encoder_layer.set_weights([enc_kernel, enc_bias])
+    detector.decoder_layer.set_weights([dec_kernel, dec_bias])
+    detector.fit(model.scale(X), epochs=epochs, batch_size=batch_size)
+    updated = ReconstructionModel(detector.export_numpy(), model.low, model.span)
+    updated.detector = model.detector
+    return updated.calibrate(X, contamination)
+
+
+def update_lstm_autoencoder(model: ReconstructionModel, X: np.ndarray, contamination: float,
+                            epochs: int = 5, batch_size: int = 32) -> ReconstructionModel:
+    # window는 연속된 행이어야 하므로 새 window(X)만으로 이어서 학습
+    # 이전 모델(MODEL_CACHE에 cache된 객체)은 그대로 두고 같은 구조의 Keras 모델에 가중치를 복사해 학습
+    from models.backends import RowWindowScorer
+    from models.lstm_detector import LSTMAutoencoderDetector, sliding_windows
+
+    previous = model.scorer.detector
+    detector = LSTMAutoencoderDetector(previous.timesteps, previous.n_features, previous.latent_dim)
+    detector.autoencoder.set_weights(previous.autoencoder.get_weights())
+    detector.fit(sliding_windows(model.scale(X), detector.timesteps), epochs=epochs, batch_size=batch_size)
+    updated = ReconstructionModel(RowWindowScorer(detector), model.low, model.span)
+    updated.detector = model.detector
+    return updated.calibrate(X, contamination)
+
+
+# 이전 가중치에서 이어서 학습할 수 있는 backend (그 외는 전체 재학습)
+WARM_START_DETECTORS = ('isolation_forest', 'deep_autoencoder', 'lstm_autoencoder')
+
+
+def model_kind(model) -> Optional[str]:
+    # 모델을 만든 backend 이름 (models.registry 기준), 알 수 없으면 None
+    ensemble = sys.modules.get('sklearn.ensemble')
+    if ensemble is not None and isinstance(model, ensemble.IsolationForest):
+        return 'isolation_forest'
+    return getattr(model, 'detector', None)
+
+
+def can_update(model, detector: str) -> bool:
+    # 이전 모델이 설정된 detector와 같은 종류이고 증분 학습을 지원하면 True
+    return detector in WARM_START_DETECTORS and model_kind(model) == detector
+
+
+def update_model(model, detector: str, X_new: np.ndarray, past: Optional[np.ndarray], contamination: float,
+                 replace_fraction: float = 0.25, epochs: int = 5, batch_size: int = 32):
+    # X_new: 이번 재학습의 새 window, past: reservoir의 과거 표본 (없으면 None)
+    # 이전 모델이 설정된 detector와 다른 종류면 None (전체 재학습)
+    kind = model_kind(model)
+    if kind != detector:
+        logging.info("Previous model is %s, configured detector is %s; refitting", kind, detector)
+        return None
+    if not can_update(model, detector):
+        logging.info("Incremental update not supported for %s; refitting", kind)
+        return None
+    X = X_new if past is None or not len(past) else np.vstack([X_new, past])
+    if kind == 'isolation_forest':
+        return update_isolation_forest(model, X, contamination, replace_fraction)
+    if kind == 'deep_autoencoder':
+        return update_deep_autoencoder(model, X, contamination, epochs, batch_size)
+    return update_lstm_autoencoder(model, X_new, contamination, epochs, batch_size)
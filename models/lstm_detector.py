@@ -1,7 +1,44 @@
+from typing import Optional, Sequence
+
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras import layers, models
 
+# Keras 3: PyDataset, Keras 2: Sequence
+_BatchSource = getattr(tf.keras.utils, 'PyDataset', tf.keras.utils.Sequence)
+
+
+def sliding_windows(X: np.ndarray, timesteps: int) -> np.ndarray:
+    # (n_rows, n_features) → (n_rows - timesteps + 1, timesteps, n_features) strided view (복사 없음, 읽기 전용)
+    X = np.asarray(X)
+    if len(X) < timesteps:
+        raise ValueError(f"need at least {timesteps} rows, got {len(X)}")
+    return np.lib.stride_tricks.sliding_window_view(X, timesteps, axis=0).transpose(0, 2, 1)
+
+
+class _WindowBatches(_BatchSource):
+    # window view에서 batch 단위로만 복사해 Keras에 공급 (전체 window 배열을 만들지 않음)
+    def __init__(self, windows: np.ndarray, batch_size: int, shuffle: bool, seed: Optional[int] = None):
+        super().__init__()
+        self.windows = windows
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.RandomState(seed)
+        self.order = np.arange(len(windows))
+        self.on_epoch_end()
+
+    def __len__(self) -> int:
+        return -(-len(self.windows) // self.batch_size)
+
+    def __getitem__(self, i: int):
+        batch = self.windows[np.sort(self.order[i * self.batch_size:(i + 1) * self.batch_size])].astype(np.float32)
+        return batch, batch
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.order)
+
+
 class LSTMAutoencoderDetector:
 # LSTM Autoencoder 기반 시계열 이상 탐지 입력: (n_samples, timesteps, n_features)
     def __init__(self, timesteps: int, n_features: int, latent_dim: int = 64):
@@ -24,6 +61,16 @@ class LSTMAutoencoderDetector:
 
     def fit(self, X: np.ndarray, epochs: int = 50, batch_size: int = 32, validation_split: float = 0.1):
         # 모델 학습 - X: numpy array of shape (n_samples, timesteps, n_features)
+        if not X.flags['C_CONTIGUOUS']:
+            # sliding_windows view: batch마다 복사, 검증은 Keras validation_split처럼 뒤쪽 window
+            split = int(len(X) * (1 - validation_split))
+            self.autoencoder.fit(
+                _WindowBatches(X[:split], batch_size, shuffle=True),
+                validation_data=_WindowBatches(X[split:], batch_size, shuffle=False) if split < len(X) else None,
+                epochs=epochs,
+                verbose=1
+            )
+            return
         self.autoencoder.fit(
             X, X,
             epochs=epochs,
@@ -33,13 +80,56 @@ class LSTMAutoencoderDetector:
             verbose=1
         )
 
-    def compute_reconstruction_error(self, X: np.ndarray) -> np.ndarray:
+    def compute_reconstruction_error(self, X: np.ndarray, chunk_size: int = 4096,
+                                     index: Optional[np.ndarray] = None) -> np.ndarray:
         # 입력 X에 대한 재구성 오차(MSE) 계산 / 반환값: shape (n_samples,) 재구성 평균 오차
-        reconstructions = self.autoencoder.predict(X)
-        # 샘플별 MSE 평균
-        mse = np.mean(np.mean(np.square(X - reconstructions), axis=2), axis=1)
+        # X가 sliding_windows view여도 chunk_size개 window씩만 복사해 추론, index가 있으면 그 window들만
+        count = len(X) if index is None else len(index)
+        mse = np.empty(count)
+        for start in range(0, count, chunk_size):
+            if index is None:
+                chunk = np.ascontiguousarray(X[start:start + chunk_size], dtype=np.float32)
+            else:
+                chunk = X[index[start:start + chunk_size]].astype(np.float32)
+            reconstructions = np.asarray(self.autoencoder.predict_on_batch(chunk))
+            # 샘플별 MSE 평균
+            mse[start:start + len(chunk)] = np.mean(np.square(chunk - reconstructions), axis=(1, 2))
         return mse
 
+    def score_rows(self, X: np.ndarray, segments: Optional[Sequence[int]] = None,
+                   chunk_size: int = 4096) -> np.ndarray:
+        # (n_rows, n_features) 행렬의 행별 오차: 그 행으로 끝나는 window의 오차 (결과는 X의 행·timestamp와 정렬)
+        # segments: 독립 구간(예: entity)의 시작 행, 구간 경계를 넘는 window는 만들지 않음
+        # 구간의 앞쪽 timesteps - 1개 행은 첫 window 오차, timesteps보다 짧은 구간은 첫 행을 반복해 채움
+        X = np.asarray(X)
+        n, t = len(X), self.timesteps
+        starts = np.unique(np.r_[0, np.asarray(segments if segments is not None else [], dtype=np.int64)])
+        starts = starts[starts < n]
+        ends = np.r_[starts[1:], n]
+        rows = np.arange(n)
+        seg = np.searchsorted(starts, rows, side='right') - 1
+        long_rows = (ends - starts)[seg] >= t
+        errors = np.empty(n)
+        if long_rows.any():
+            first_end = starts[seg] + t - 1
+            valid = long_rows & (rows >= first_end)
+            at_end = np.empty(n)
+            at_end[valid] = self.compute_reconstruction_error(
+                sliding_windows(X, t), chunk_size, index=rows[valid] - t + 1
+            )
+            errors[long_rows] = at_end[np.maximum(rows, first_end)[long_rows]]
+        short = np.flatnonzero(ends - starts < t)
+        if len(short):
+            padded = np.stack([
+                np.concatenate([np.repeat(X[starts[i]:starts[i] + 1], t - (ends[i] - starts[i]), axis=0),
+                                X[starts[i]:ends[i]]])
+                for i in short
+            ])
+            errors[~long_rows] = self.compute_reconstruction_error(padded, chunk_size)[
+                np.searchsorted(short, seg[~long_rows])
+            ]
+        return errors
+
     def detect(self, X: np.ndarray, threshold: float) -> np.ndarray:
         # 재구성 오차가 threshold 초과 시 이상치(1), 아니면 정상(0)
         errors = self.compute_reconstruction_error(X)
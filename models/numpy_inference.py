@@ -0,0 +1,64 @@
+import json
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# TensorFlow 없이 학습된 Dense 오토인코더로 점수 계산 (점수 전용 프로세스는 이 모듈만 import)
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    # exp overflow 없이 계산되는 sigmoid 등가식
+    'sigmoid': lambda x: 0.5 * (1 + np.tanh(0.5 * x)),
+    'tanh': np.tanh,
+}
+
+# (kernel, bias, activation 이름)
+DenseLayer = Tuple[np.ndarray, np.ndarray, str]
+
+
+class NumpyAutoencoder:
+    # Dense layer 순차 적용만으로 재구성, Keras 모델과 같은 float32 연산
+    # DeepAutoencoderDetector / VariationalAutoencoderDetector의 export_numpy()로 생성 (VAE는 z_mean 경로)
+    def __init__(self, layers: Sequence[DenseLayer]):
+        for _, _, activation in layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"unsupported activation: {activation}")
+        self.layers: List[DenseLayer] = [
+            (np.asarray(kernel, dtype=np.float32), np.asarray(bias, dtype=np.float32), activation)
+            for kernel, bias, activation in layers
+        ]
+
+    def predict(self, X) -> np.ndarray:
+        out = np.asarray(X, dtype=np.float32)
+        for kernel, bias, activation in self.layers:
+            out = ACTIVATIONS[activation](out @ kernel + bias)
+        return out
+
+    def compute_reconstruction_error(self, X) -> np.ndarray:
+        # 입력 X에 대한 재구성 오차(MSE), Keras 경로와 같은 (샘플,) 배열
+        X = np.asarray(X, dtype=np.float32)
+        return np.mean(np.square(X - self.predict(X)), axis=-1)
+
+    def detect(self, X, threshold: float) -> np.ndarray:
+        return (self.compute_reconstruction_error(X) > threshold).astype(int)
+
+    def save(self, path: str):
+        arrays = {}
+        for i, (kernel, bias, _) in enumerate(self.layers):
+            arrays[f'kernel_{i}'] = kernel
+            arrays[f'bias_{i}'] = bias
+        activations = json.dumps([activation for _, _, activation in self.layers])
+        with open(path, 'wb') as f:
+            np.savez(f, activations=np.array(activations), **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyAutoencoder':
+        with np.load(path) as data:
+            activations = json.loads(str(data['activations']))
+            return cls([(data[f'kernel_{i}'], data[f'bias_{i}'], a) for i, a in enumerate(activations)])
+
+
+def dense_layer(layer) -> DenseLayer:
+    # Keras Dense layer → (kernel, bias, activation 이름)
+    kernel, bias = layer.get_weights()
+    return kernel, bias, layer.get_config()['activation']
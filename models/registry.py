@@ -0,0 +1,31 @@
+import importlib
+from typing import Callable, Dict, List, Union
+
+# detector 이름 → 학습 함수 'module:function' (처음 사용할 때 import, TensorFlow 등은 선택된 경우에만 로드)
+# 학습 함수: (X, contamination, **detector_params) → predict(X)가 -1(이상)/1(정상)을 반환하는 picklable 모델
+_DETECTORS: Dict[str, Union[str, Callable]] = {
+    'isolation_forest': 'models.backends:train_isolation_forest',
+    'deep_autoencoder': 'models.backends:train_deep_autoencoder',
+    'vae': 'models.backends:train_vae',
+    'lstm_autoencoder': 'models.backends:train_lstm_autoencoder',
+    'ensemble': 'models.ensemble:train_ensemble',
+}
+
+
+def register_detector(name: str, target: Union[str, Callable]):
+    _DETECTORS[name] = target
+
+
+def available_detectors() -> List[str]:
+    return sorted(_DETECTORS)
+
+
+def get_detector(name: str) -> Callable:
+    try:
+        target = _DETECTORS[name]
+    except KeyError:
+        raise ValueError(f"unknown detector {name!r}; available: {available_detectors()}") from None
+    if isinstance(target, str):
+        module, _, attr = target.partition(':')
+        target = _DETECTORS[name] = getattr(importlib.import_module(module), attr)
+    return target
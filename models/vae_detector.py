@@ -1,13 +1,17 @@
 import tensorflow as tf
 from tensorflow.keras import layers, models, backend as K
 
+from models.numpy_inference import NumpyAutoencoder, dense_layer
+
 class VariationalAutoencoderDetector:
     # TensorFlow Keras 기반 변분 오토인코더(VAE)로 이상 탐지 구현
     def __init__(self, input_dim: int, latent_dim: int = 16):
         # 인코더
         inputs = layers.Input(shape=(input_dim,))
-        x = layers.Dense(64, activation='relu')(inputs)
-        z_mean = layers.Dense(latent_dim, name='z_mean')(x)
+        self.encoder_hidden = layers.Dense(64, activation='relu')
+        x = self.encoder_hidden(inputs)
+        self.z_mean_layer = layers.Dense(latent_dim, name='z_mean')
+        z_mean = self.z_mean_layer(x)
         z_log_var = layers.Dense(latent_dim, name='z_log_var')(x)
 
         # 샘플링 레이어
@@ -20,8 +24,10 @@ class VariationalAutoencoderDetector:
 
         # 디코더
         decoder_input = layers.Input(shape=(latent_dim,))
-        x_dec = layers.Dense(64, activation='relu')(decoder_input)
-        outputs = layers.Dense(input_dim, activation='sigmoid')(x_dec)
+        self.decoder_hidden = layers.Dense(64, activation='relu')
+        x_dec = self.decoder_hidden(decoder_input)
+        self.decoder_output = layers.Dense(input_dim, activation='sigmoid')
+        outputs = self.decoder_output(x_dec)
         decoder = models.Model(decoder_input, outputs, name='decoder')
 
         # VAE 모델
@@ -53,6 +59,15 @@ class VariationalAutoencoderDetector:
         mse = tf.keras.losses.mse(X, reconstructions)
         return mse
 
+    def export_numpy(self, path: str = None) -> NumpyAutoencoder:
+        # 점수용 NumPy 추론 모델 추출: 샘플링 대신 z_mean으로 디코딩 (결정적 점수)
+        model = NumpyAutoencoder([dense_layer(layer) for layer in (
+            self.encoder_hidden, self.z_mean_layer, self.decoder_hidden, self.decoder_output
+        )])
+        if path:
+            model.save(path)
+        return model
+
     def detect(self, X, threshold: float):
         #재구성 오차가 threshold 초과 시 이상치(1), 아니면 정상(0)
         mse = self.compute_reconstruction_error(X)
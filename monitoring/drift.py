@@ -0,0 +1,129 @@
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+from storage.state_store import StateStore
+
+# metric별 상태 컬럼: 샘플 수, 평균, 편차 제곱합, 상승 누적합·최솟값, 하강 누적합·최댓값
+_N, _MEAN, _M2, _UP, _UP_MIN, _DOWN, _DOWN_MAX = range(7)
+_FIELDS = 7
+
+
+class MetricDriftDetector:
+    # metric마다 독립적인 양방향 Page-Hinkley drift 검출기
+    # 각 값은 그 metric의 누적 평균·표준편차로 표준화하므로 단위(초, bytes)가 다른 metric끼리 서로 가리지 않음
+    # window 전체(T x M)를 누적합으로 한 번에 갱신하고, drift가 난 metric만 해당 시점 이후로 다시 계산
+    # store가 있으면 metric별 상태(7개 float + 마지막 처리 timestamp)를 실행 간에 이어서 사용
+    # timestamp를 넘기면 이미 처리한 시점 이하의 행은 건너뜀 (겹치는 조회 window의 같은 샘플을 다시 세지 않음)
+    # state_ttl초 동안 갱신되지 않은 metric(사라진 entity 등)의 상태는 save() 때 store에서 삭제
+    def __init__(self, delta: float = 0.5, threshold: float = 25.0, min_samples: int = 30,
+                 store: Optional[StateStore] = None, namespace: str = 'metric_drift',
+                 state_ttl: Optional[float] = 7 * 86400):
+        self.delta = delta
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.store = store
+        self.namespace = namespace
+        self.state_ttl = state_ttl
+        self._rows: Dict[str, int] = {}
+        self._state = np.zeros((0, _FIELDS))
+        self._last = np.zeros(0)
+        self._touched: Set[str] = set()
+
+    def _rows_for(self, names: Sequence[str]) -> np.ndarray:
+        new = [n for n in dict.fromkeys(names) if n not in self._rows]
+        if new:
+            state = np.zeros((len(new), _FIELDS))
+            last = np.full(len(new), -np.inf)
+            if self.store is not None:
+                for name, (_, blob) in self.store.get_many(self.namespace, new).items():
+                    saved = np.frombuffer(blob, dtype=np.float64)
+                    state[new.index(name)] = saved[:_FIELDS]
+                    # 이전 형식(timestamp 없음)은 처음 보는 것처럼 모든 행 처리
+                    if len(saved) > _FIELDS:
+                        last[new.index(name)] = saved[_FIELDS]
+            base = len(self._state)
+            self._rows.update((n, base + i) for i, n in enumerate(new))
+            self._state = np.vstack([self._state, state])
+            self._last = np.concatenate([self._last, last])
+        return np.fromiter((self._rows[n] for n in names), dtype=np.int64, count=len(names))
+
+    def _process(self, state: np.ndarray, X: np.ndarray):
+        # state(M x 7)에 X(T x M, NaN은 건너뜀)를 이어 붙였을 때의 최종 상태와 metric별 첫 drift 위치(-1: 없음)
+        T, M = X.shape
+        valid = ~np.isnan(X)
+        n0, mean0, m20 = state[:, _N], state[:, _MEAN], state[:, _M2]
+        # 큰 값(bytes)에서 제곱합 상쇄 오차를 줄이려 기존 평균(없으면 첫 값) 기준으로 이동
+        first = X[valid.argmax(axis=0), np.arange(M)]
+        shift = np.where(n0 > 0, mean0, np.nan_to_num(first))
+        y = np.where(valid, X - shift, 0.0)
+        count = n0 + np.cumsum(valid, axis=0)
+        total = n0 * (mean0 - shift) + np.cumsum(y, axis=0)
+        squares = m20 + n0 * (mean0 - shift) ** 2 + np.cumsum(y * y, axis=0)
+        safe = np.maximum(count, 1)
+        mean = total / safe
+        var = np.maximum(squares / safe - mean ** 2, 0.0)
+        std = np.sqrt(var)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = np.where(valid & (std > 0), (y - mean) / std, 0.0)
+        up = state[:, _UP] + np.cumsum(np.where(valid, z - self.delta, 0.0), axis=0)
+        up_min = np.minimum(state[:, _UP_MIN], np.minimum.accumulate(up, axis=0))
+        down = state[:, _DOWN] + np.cumsum(np.where(valid, z + self.delta, 0.0), axis=0)
+        down_max = np.maximum(state[:, _DOWN_MAX], np.maximum.accumulate(down, axis=0))
+        drift = (np.maximum(up - up_min, down_max - down) > self.threshold) & (count >= self.min_samples) & valid
+        first_drift = np.where(drift.any(axis=0), drift.argmax(axis=0), -1)
+        out = np.column_stack([count[-1], mean[-1] + shift, var[-1] * count[-1],
+                               up[-1], up_min[-1], down[-1], down_max[-1]])
+        return out, first_drift
+
+    def update(self, names: Sequence[str], values: np.ndarray,
+               timestamps: Optional[np.ndarray] = None) -> List[str]:
+        # values: (시점 x metric) window, 이번 window에서 drift가 감지된 metric 이름 반환
+        # timestamps: 행별 epoch 초 (오름차순), metric마다 마지막으로 처리한 시점 이후의 행만 반영
+        X = np.asarray(values, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(names):
+            raise ValueError(f"values shape {X.shape} does not match {len(names)} metrics")
+        rows = self._rows_for(names)
+        self._touched.update(names)
+        if len(X) == 0:
+            return []
+        if timestamps is not None:
+            ts = np.asarray(timestamps, dtype=np.float64)
+            if ts.shape != (len(X),):
+                raise ValueError(f"timestamps shape {ts.shape} does not match {len(X)} rows")
+            seen = ts[:, None] <= self._last[rows]
+            X = np.where(seen, np.nan, X)
+            fresh = ~seen & ~np.isnan(X)
+            self._last[rows] = np.where(fresh.any(axis=0), np.max(np.where(fresh, ts[:, None], -np.inf), axis=0),
+                                        self._last[rows])
+        state, first = self._process(self._state[rows], X)
+        drifted = np.zeros(len(names), dtype=bool)
+        # drift 시점에서 상태를 초기화하고 그 이후 구간만으로 다시 계산 (한 window 안의 여러 번 drift 포함)
+        while (first >= 0).any():
+            cols = np.flatnonzero(first >= 0)
+            drifted[cols] = True
+            tail = X[:, cols].copy()
+            tail[np.arange(len(X))[:, None] <= first[cols]] = np.nan
+            state[cols], again = self._process(np.zeros((len(cols), _FIELDS)), tail)
+            first = np.full(len(names), -1)
+            first[cols] = again
+        self._state[rows] = state
+        result = [names[i] for i in np.flatnonzero(drifted)]
+        if result:
+            logging.info("Drift detected in %d/%d metrics: %s", len(result), len(names), result[:10])
+        return result
+
+    def save(self):
+        # 이번 실행에서 갱신한 metric만 기록하고 state_ttl이 지난 상태는 정리
+        if self.store is None:
+            return
+        now = time.time()
+        self.store.put_many(self.namespace, {
+            name: (now, np.append(self._state[self._rows[name]], self._last[self._rows[name]]).tobytes())
+            for name in self._touched
+        })
+        self._touched.clear()
+        if self.state_ttl:
+            self.store.prune(self.namespace, now - self.state_ttl)
@@ -0,0 +1,68 @@
+from prometheus_client import Counter, Histogram, Gauge
+
+# Metric 정의
+REQUEST_LATENCY = Histogram(
+    'anomaly_detection_request_latency_seconds',
+    'Latency of anomaly detection run'
+)
+ERROR_COUNT = Counter(
+    'anomaly_detection_errors_total',
+    'Total number of errors during anomaly detection'
+)
+DETECTED_ANOMALIES = Counter(
+    'anomaly_detection_anomalies_total',
+    'Total number of anomalies detected'
+)
+LAST_RUN = Gauge(
+    'anomaly_detection_last_run_timestamp',
+    'Timestamp of the last anomaly detection run'
+)
+MODEL_LOAD_LATENCY = Histogram(
+    'anomaly_detection_model_load_seconds',
+    'Time spent deserializing the model file'
+)
+MODEL_CACHE_HITS = Counter(
+    'anomaly_detection_model_cache_hits_total',
+    'Number of model loads served from the in-process cache'
+)
+PROCESS_RSS = Gauge(
+    'anomaly_detection_process_rss_bytes',
+    'Resident set size of the detector process after the last model load'
+)
+ALERTMANAGER_SENT = Counter(
+    'anomaly_detection_alertmanager_sent_total',
+    'Alerts delivered to Alertmanager'
+)
+ALERTMANAGER_SPOOLED = Counter(
+    'anomaly_detection_alertmanager_spooled_total',
+    'Alerts written to the on-disk spool while Alertmanager was unavailable'
+)
+ALERTMANAGER_DROPPED = Counter(
+    'anomaly_detection_alertmanager_dropped_total',
+    'Alerts dropped because the queue was full and no spool directory is configured'
+)
+ALERTMANAGER_QUEUE_DEPTH = Gauge(
+    'anomaly_detection_alertmanager_queue_depth',
+    'Alerts waiting in the in-memory send queue'
+)
+ALERTMANAGER_BATCH_LATENCY = Histogram(
+    'anomaly_detection_alertmanager_batch_seconds',
+    'Latency of one batched POST to /api/v2/alerts'
+)
+STREAM_SAMPLES = Counter(
+    'anomaly_detection_stream_samples_total',
+    'Samples received on the streaming remote-write endpoint'
+)
+STREAM_REJECTED = Counter(
+    'anomaly_detection_stream_rejected_rows_total',
+    'Assembled rows rejected with 503 because the scoring queue stayed full'
+)
+STREAM_QUEUE_DEPTH = Gauge(
+    'anomaly_detection_stream_queue_depth',
+    'Rows waiting to be scored by the streaming detector'
+)
+STREAM_ALERT_LATENCY = Histogram(
+    'anomaly_detection_stream_alert_latency_seconds',
+    'Time from sample timestamp to alert hand-off in the streaming detector',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
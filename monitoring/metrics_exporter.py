@@ -1,23 +1,13 @@
-from prometheus_client import start_http_server, Counter, Histogram, Gauge
+from prometheus_client import start_http_server
 import time
 import threading
 
-# Metric 정의
-REQUEST_LATENCY = Histogram(
-    'anomaly_detection_request_latency_seconds',
-    'Latency of anomaly detection run'
-)
-ERROR_COUNT = Counter(
-    'anomaly_detection_errors_total',
-    'Total number of errors during anomaly detection'
-)
-DETECTED_ANOMALIES = Counter(
-    'anomaly_detection_anomalies_total',
-    'Total number of anomalies detected'
-)
-LAST_RUN = Gauge(
-    'anomaly_detection_last_run_timestamp',
-    'Timestamp of the last anomaly detection run'
+# Metric 정의는 monitoring/metrics.py (스크립트 실행 시 중복 등록 방지)
+from monitoring.metrics import (
+    REQUEST_LATENCY,
+    ERROR_COUNT,
+    DETECTED_ANOMALIES,
+    LAST_RUN
 )
 
 def run_metrics_server(port: int = 8000):
@@ -5,6 +5,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime
 
+from storage.metric_archive import MetricArchive
+
 # 로깅 Configure 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
@@ -38,6 +40,15 @@ class ReportGenerator:
         if not isinstance(self.results.index, pd.DatetimeIndex):
             self.results.index = pd.to_datetime(self.results.index)
 
+    @classmethod
+    def from_archive(cls, archive: MetricArchive, start: datetime = None, end: datetime = None,
+                     dataset: str = 'results'):
+        # 리포트에 필요한 anomaly 컬럼만 archive에서 읽음
+        df = archive.read(dataset, start=start, end=end, columns=['anomaly'])
+        if isinstance(df.index, pd.MultiIndex):
+            df.index = df.index.get_level_values('timestamp')
+        return cls(df)
+
     def generate_time_series_plot(self, output_path: str):
         counts = self.results['anomaly'].resample('D').sum()
         plt.figure()
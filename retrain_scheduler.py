@@ -81,13 +81,11 @@ if __name__ == '__main__':
     cfg = ConfigLoader.load('config.yaml')
     detector = AnomalyDetector(cfg)
 
-    # 재학습 함수: 모델 피팅 로직
+    # 재학습 함수: 별도 프로세스에서 학습 후 새 버전 publish, 탐지 루프는 기존 버전으로 계속 진행
     def retrain_model():
         df = detector.fetch_data()
-        X = detector.preprocess(df)
-        # 강제 재학습
-        detector.model = None  # 기존 모델 버림
-        detector.load_or_train(X)
+        train = detector.training_frame(df)
+        detector.retrain_async(train.values, detector.training_entities(train), history=train is not df).result()
 
     # RetrainScheduler 설정 (매 24시간, 10분 window에 5회 이상 이벤트 시)
     scheduler = RetrainScheduler(
@@ -107,4 +105,5 @@ if __name__ == '__main__':
                 scheduler.record_event()
             time.sleep(cfg.get('run_interval_seconds', 3600))  # 기본 1시간 주기
     except KeyboardInterrupt:
-        scheduler.shutdown()
\ No newline at end of file
+        scheduler.shutdown()
+        detector.close()
\ No newline at end of file
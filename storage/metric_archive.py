@@ -0,0 +1,224 @@
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+TIMESTAMP = 'timestamp'
+
+
+class MetricArchive:
+    # dataset/key/일(day) 단위로 파티션된 컬럼 저장소
+    # root/<dataset>/<key>/<YYYY-MM-DD>/seg-<seq>/{meta.json, ts.npy, c<i>.npy}
+    # 각 segment는 컬럼별 .npy 파일이라 읽을 때 필요한 컬럼만 mmap으로 열고 시간 범위만 잘라냄
+    # segment마다 컬럼 구성이 다를 수 있음 (읽을 때 없는 컬럼은 NaN)
+    def __init__(self, root: str, compact_threshold: int = 64):
+        self.root = root
+        # 파티션의 segment 수가 이 값을 넘으면 하나로 병합 (분 단위 실행 시 파일 수 폭증 방지)
+        self.compact_threshold = compact_threshold
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def _safe(name: str) -> str:
+        # PromQL 표현식도 key로 쓸 수 있도록 파일명 안전 문자열로 변환
+        return ''.join(c if c.isalnum() or c in '-_.' else f'%{ord(c):02X}' for c in name)[:200]
+
+    def _key_dir(self, dataset: str, key: str) -> str:
+        return os.path.join(self.root, self._safe(dataset), self._safe(key))
+
+    @staticmethod
+    def _segments(day_dir: str) -> List[str]:
+        if not os.path.isdir(day_dir):
+            return []
+        return sorted(os.path.join(day_dir, d) for d in os.listdir(day_dir) if d.startswith('seg-'))
+
+    def keys(self, dataset: str) -> List[str]:
+        path = os.path.join(self.root, self._safe(dataset))
+        keys = []
+        for d in sorted(os.listdir(path)) if os.path.isdir(path) else []:
+            meta = self._first_meta(os.path.join(path, d))
+            if meta:
+                keys.append(meta['key'])
+        return keys
+
+    def _first_meta(self, key_dir: str) -> Optional[dict]:
+        for day in sorted(os.listdir(key_dir)):
+            for _, meta in self._live_segments(os.path.join(key_dir, day)):
+                return meta
+        return None
+
+    def _live_segments(self, day_dir: str) -> List[Tuple[str, dict]]:
+        # (segment 경로, meta), compact 도중 병합본과 원본이 함께 보이면 병합본(meta['replaces'])만 사용
+        found = []
+        for seg in self._segments(day_dir):
+            try:
+                with open(os.path.join(seg, 'meta.json')) as f:
+                    found.append((seg, json.load(f)))
+            except FileNotFoundError:
+                # compact가 방금 삭제한 원본
+                continue
+        replaced = {name for _, meta in found for name in meta.get('replaces', [])}
+        return [(seg, meta) for seg, meta in found if os.path.basename(seg) not in replaced]
+
+    @staticmethod
+    def _load_columns(seg: str, meta: dict, wanted: List[str], lo: int, hi: int) -> Dict[str, np.ndarray]:
+        # segment에 없는 컬럼은 NaN
+        out = {}
+        for c in wanted:
+            if c in meta['columns']:
+                i = meta['columns'].index(c)
+                out[c] = np.array(np.load(os.path.join(seg, f'c{i}.npy'), mmap_mode='r')[lo:hi])
+            else:
+                out[c] = np.full(hi - lo, np.nan)
+        return out
+
+    def append(self, dataset: str, frame: pd.DataFrame, key: str = 'default') -> int:
+        # frame index는 DatetimeIndex 또는 timestamp 레벨을 포함한 MultiIndex
+        # 이미 보관된 마지막 시각 이후의 행만 추가 (실행마다 window가 겹쳐도 중복 저장 없음)
+        if frame.empty:
+            return 0
+        index_names = [n or TIMESTAMP for n in frame.index.names]
+        if TIMESTAMP not in index_names:
+            index_names[-1] = TIMESTAMP
+        flat = frame.copy()
+        flat.index.names = index_names
+        flat = flat.reset_index()
+        ts = ((pd.to_datetime(flat[TIMESTAMP]) - pd.Timestamp(0)) // pd.Timedelta('1ms')).to_numpy(dtype=np.int64)
+        columns = [c for c in flat.columns if c != TIMESTAMP]
+        days = (ts // 86_400_000).astype(np.int64)
+        key_dir = self._key_dir(dataset, key)
+        written = 0
+        for day in np.unique(days):
+            rows = np.flatnonzero(days == day)
+            day_dir = os.path.join(key_dir, datetime.utcfromtimestamp(int(day) * 86400).strftime('%Y-%m-%d'))
+            segments = self._segments(day_dir)
+            next_seq = 0
+            if segments:
+                next_seq = int(os.path.basename(segments[-1])[4:]) + 1
+                last = np.load(os.path.join(segments[-1], 'ts.npy'), mmap_mode='r')
+                if len(last):
+                    rows = rows[ts[rows] > last[-1]]
+            if not len(rows):
+                continue
+            order = rows[np.argsort(ts[rows], kind='stable')]
+            self._write_segment(day_dir, next_seq, dataset, key, index_names, columns,
+                                ts[order], [flat[c].to_numpy()[order] for c in columns])
+            written += len(order)
+            if len(segments) + 1 > self.compact_threshold:
+                self.compact(dataset, key, os.path.basename(day_dir))
+        logging.debug("Archived %d rows to %s/%s", written, dataset, key)
+        return written
+
+    def _write_segment(self, day_dir: str, seq: int, dataset: str, key: str, index_names: List[str],
+                       columns: List[str], ts: np.ndarray, arrays: List[np.ndarray],
+                       replaces: Optional[List[str]] = None):
+        # 임시 디렉터리에 모두 쓴 뒤 rename → 읽는 쪽은 완성된 segment만 봄
+        # replaces: 이 segment가 병합한 원본 segment 이름 (원본이 지워지기 전까지 읽는 쪽이 건너뜀)
+        os.makedirs(day_dir, exist_ok=True)
+        final = os.path.join(day_dir, f'seg-{seq:06d}')
+        tmp = os.path.join(day_dir, f'.tmp-{seq:06d}-{os.getpid()}')
+        os.makedirs(tmp)
+        np.save(os.path.join(tmp, 'ts.npy'), np.ascontiguousarray(ts, dtype=np.int64))
+        dtypes = []
+        for i, arr in enumerate(arrays):
+            if arr.dtype == object:
+                arr = arr.astype(str)
+            np.save(os.path.join(tmp, f'c{i}.npy'), np.ascontiguousarray(arr))
+            dtypes.append(arr.dtype.str)
+        meta = {'dataset': dataset, 'key': key, 'index': index_names, 'columns': columns,
+                'dtypes': dtypes, 'rows': int(len(ts))}
+        if replaces:
+            meta['replaces'] = replaces
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        os.rename(tmp, final)
+
+    def read(self, dataset: str, key: str = 'default', start: Optional[datetime] = None,
+             end: Optional[datetime] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        # [start, end] 구간 행을 읽음. columns를 주면 해당 컬럼 파일만 연다 (column projection)
+        # 읽는 도중 compact가 원본 segment를 지우면 목록부터 다시 읽음
+        for attempt in range(3):
+            try:
+                return self._read(dataset, key, start, end, columns)
+            except FileNotFoundError:
+                if attempt == 2:
+                    raise
+                logging.debug("Archive segment of %s/%s removed during read; retrying", dataset, key)
+
+    def _read(self, dataset: str, key: str, start: Optional[datetime], end: Optional[datetime],
+              columns: Optional[List[str]]) -> pd.DataFrame:
+        key_dir = self._key_dir(dataset, key)
+        if not os.path.isdir(key_dir):
+            return pd.DataFrame()
+        start_ms = None if start is None else int(pd.Timestamp(start).value // 10**6)
+        end_ms = None if end is None else int(pd.Timestamp(end).value // 10**6)
+        first_day = None if start is None else pd.Timestamp(start).strftime('%Y-%m-%d')
+        last_day = None if end is None else pd.Timestamp(end).strftime('%Y-%m-%d')
+
+        meta = None
+        ts_parts, col_parts = [], []
+        wanted: List[str] = []
+        for day in sorted(os.listdir(key_dir)):
+            if (first_day and day < first_day) or (last_day and day > last_day):
+                continue
+            for seg, seg_meta in self._live_segments(os.path.join(key_dir, day)):
+                if meta is not None and seg_meta['index'] != meta['index']:
+                    logging.warning("Skipping archive segment %s with index %s (expected %s)",
+                                    seg, seg_meta['index'], meta['index'])
+                    continue
+                meta = seg_meta
+                ts = np.load(os.path.join(seg, 'ts.npy'), mmap_mode='r')
+                lo = 0 if start_ms is None else int(np.searchsorted(ts, start_ms, side='left'))
+                hi = len(ts) if end_ms is None else int(np.searchsorted(ts, end_ms, side='right'))
+                if lo >= hi:
+                    continue
+                # index 레벨(entity 등)은 projection과 무관하게 항상 읽음, 컬럼은 segment들의 합집합
+                wanted += [c for c in meta['columns'] if c not in wanted and (
+                    columns is None or c in columns or c in meta['index'])]
+                ts_parts.append(np.array(ts[lo:hi]))
+                col_parts.append((seg, meta, lo, hi))
+        if not ts_parts:
+            return pd.DataFrame(columns=columns or [])
+
+        loaded = [self._load_columns(seg, seg_meta, wanted, lo, hi) for seg, seg_meta, lo, hi in col_parts]
+        data = {c: np.concatenate([part[c] for part in loaded]) for c in wanted}
+        timestamps = pd.to_datetime(np.concatenate(ts_parts), unit='ms')
+        index_names = meta['index']
+        if len(index_names) == 1:
+            index = pd.DatetimeIndex(timestamps, name=TIMESTAMP)
+        else:
+            levels = [timestamps if n == TIMESTAMP else data.pop(n) for n in index_names]
+            index = pd.MultiIndex.from_arrays(levels, names=index_names)
+        frame = pd.DataFrame(data, index=index)
+        if isinstance(index, pd.MultiIndex):
+            # segment는 시각순으로 저장되므로 fetch_data와 같은 (entity, timestamp) 순서로 정렬
+            frame = frame.sort_index()
+        return frame
+
+    def compact(self, dataset: str, key: str, day: str):
+        # 하루 파티션의 segment들을 하나로 병합 (컬럼은 합집합, 없는 값은 NaN)
+        # 병합본이 replaces로 원본을 가리므로 원본 삭제 전에 읽어도 중복 행이 없음
+        # 중단된 이전 compact가 남긴 원본(이미 병합본에 가려진 segment)도 함께 삭제
+        day_dir = os.path.join(self._key_dir(dataset, key), day)
+        live = self._live_segments(day_dir)
+        stale = sorted(set(self._segments(day_dir)) - {seg for seg, _ in live})
+        if len(live) <= 1:
+            return
+        index = live[-1][1]['index']
+        segments = [(seg, meta) for seg, meta in live if meta['index'] == index]
+        columns: List[str] = []
+        for _, meta in segments:
+            columns += [c for c in meta['columns'] if c not in columns]
+        ts = np.concatenate([np.load(os.path.join(s, 'ts.npy')) for s, _ in segments])
+        parts = [self._load_columns(s, meta, columns, 0, meta['rows']) for s, meta in segments]
+        arrays = [np.concatenate([part[c] for part in parts]) for c in columns]
+        merged_seq = int(os.path.basename(self._segments(day_dir)[-1])[4:]) + 1
+        self._write_segment(day_dir, merged_seq, dataset, key, segments[-1][1]['index'], columns, ts, arrays,
+                            replaces=[os.path.basename(s) for s, _ in segments])
+        for seg in [s for s, _ in segments] + stale:
+            shutil.rmtree(seg, ignore_errors=True)
+        logging.info("Compacted %d segments of %s/%s/%s", len(segments), dataset, key, day)
@@ -0,0 +1,100 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import joblib
+
+# 모델 로드 지연·RSS 메트릭 (prometheus_client 미설치 시 생략)
+try:
+    from monitoring.metrics import MODEL_LOAD_LATENCY, MODEL_CACHE_HITS, PROCESS_RSS
+except ImportError:
+    MODEL_LOAD_LATENCY = MODEL_CACHE_HITS = PROCESS_RSS = None
+
+
+def current_rss_bytes() -> int:
+    # 현재 프로세스 RSS (Linux는 /proc, 그 외는 최대 RSS로 대체)
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _file_digest(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ModelCache:
+    # 프로세스 내 모델 캐시: 파일의 (mtime, size)가 그대로면 로드된 객체를 재사용
+    # stat이 바뀌어도 내용 해시가 같으면(touch, 재복사 등) 역직렬화하지 않음
+    # mmap_mode로 로드하면 모델 안의 일반 numpy 배열(예: NumPy 오토인코더 가중치)은 page cache를 공유하므로
+    # 여러 worker 프로세스가 한 벌의 물리 메모리를 사용
+    # sklearn tree(IsolationForest 등)는 Tree.__setstate__가 node 배열을 복사하므로 프로세스마다 별도 메모리
+    def __init__(self, mmap_mode: Optional[str] = 'r'):
+        self.mmap_mode = mmap_mode
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: str) -> Any:
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stat_key = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry['stat'] == stat_key:
+                if MODEL_CACHE_HITS:
+                    MODEL_CACHE_HITS.inc()
+                return entry['model']
+            digest = _file_digest(path)
+            if entry and entry['digest'] == digest:
+                entry['stat'] = stat_key
+                if MODEL_CACHE_HITS:
+                    MODEL_CACHE_HITS.inc()
+                return entry['model']
+
+            start = time.perf_counter()
+            model = joblib.load(path, mmap_mode=self.mmap_mode)
+            elapsed = time.perf_counter() - start
+            self._entries[path] = {'stat': stat_key, 'digest': digest, 'model': model}
+        rss = current_rss_bytes()
+        if MODEL_LOAD_LATENCY:
+            MODEL_LOAD_LATENCY.observe(elapsed)
+            PROCESS_RSS.set(rss)
+        logging.info("Loaded model from %s in %.3fs (rss=%.1f MiB)", path, elapsed, rss / 2**20)
+        return model
+
+    def store(self, path: str, model: Any):
+        # 모델 저장 후 캐시에 바로 등록 (다음 load에서 다시 읽지 않도록)
+        # mmap 로드가 가능하도록 비압축으로, 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 write-temp-then-rename
+        path = os.path.abspath(path)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        joblib.dump(model, tmp)
+        with open(tmp, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        st = os.stat(path)
+        with self._lock:
+            self._entries[path] = {
+                'stat': (st.st_mtime_ns, st.st_size),
+                'digest': _file_digest(path),
+                'model': model
+            }
+
+    def invalidate(self, path: Optional[str] = None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+
+# 프로세스 전역 캐시: 같은 프로세스의 AnomalyDetector 인스턴스들이 공유
+MODEL_CACHE = ModelCache()
@@ -0,0 +1,122 @@
+import json
+import os
+import pickle
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_MAGIC = b'MODLPAK1'
+# footer: index offset, index 길이, magic
+_FOOTER = struct.Struct('<QQ8s')
+
+
+class ModelPackWriter:
+    # 여러 모델을 한 파일에: [magic][zlib(pickle) blob ...][JSON index][footer]
+    # 임시 파일에 순서대로 추가한 뒤 close()에서 index를 쓰고 rename (읽는 쪽은 완성된 pack만 봄)
+    def __init__(self, path: str, level: int = 1):
+        self.path = path
+        self.level = level
+        self._tmp = f"{path}.{os.getpid()}.tmp"
+        self._file = open(self._tmp, 'wb')
+        self._file.write(_MAGIC)
+        self._index: Dict[str, Tuple[int, int]] = {}
+
+    @staticmethod
+    def encode(model: Any, level: int = 1) -> bytes:
+        # worker 프로세스에서 직렬화·압축까지 끝내고 bytes만 넘길 때 사용
+        return zlib.compress(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL), level)
+
+    def add(self, key: str, model: Any):
+        self.add_encoded(key, self.encode(model, self.level))
+
+    def add_encoded(self, key: str, blob: bytes):
+        if key in self._index:
+            raise ValueError(f"duplicate model key: {key}")
+        self._index[key] = (self._file.tell(), len(blob))
+        self._file.write(blob)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self):
+        index = json.dumps(self._index).encode()
+        offset = self._file.tell()
+        self._file.write(index)
+        self._file.write(_FOOTER.pack(offset, len(index), _MAGIC))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        self._file.close()
+        os.remove(self._tmp)
+
+    def __enter__(self) -> 'ModelPackWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ModelPack:
+    # pack 파일의 key별 임의 접근 (index만 메모리에, 모델은 pread로 필요할 때 읽음)
+    # 최근 사용한 cache_size개 모델은 LRU로 유지, transform이 있으면 읽은 모델을 변환해 cache
+    def __init__(self, path: str, cache_size: int = 1024, transform: Optional[Callable[[Any], Any]] = None):
+        self.path = path
+        self.cache_size = max(1, cache_size)
+        self.transform = transform
+        self._fd = os.open(path, os.O_RDONLY)
+        size = os.fstat(self._fd).st_size
+        head = os.pread(self._fd, len(_MAGIC), 0)
+        if size < len(_MAGIC) + _FOOTER.size or head != _MAGIC:
+            os.close(self._fd)
+            raise ValueError(f"not a model pack: {path}")
+        offset, length, magic = _FOOTER.unpack(os.pread(self._fd, _FOOTER.size, size - _FOOTER.size))
+        if magic != _MAGIC:
+            os.close(self._fd)
+            raise ValueError(f"truncated model pack: {path}")
+        self._index = {k: tuple(v) for k, v in json.loads(os.pread(self._fd, length, offset)).items()}
+        self._cache: 'OrderedDict[str, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def keys(self) -> List[str]:
+        return list(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        offset, length = entry
+        model = pickle.loads(zlib.decompress(os.pread(self._fd, length, offset)))
+        if self.transform is not None:
+            model = self.transform(model)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = model
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return model
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._cache.clear()
@@ -0,0 +1,81 @@
+import logging
+import os
+from datetime import datetime
+from typing import Any, List, Optional
+
+from storage.model_cache import MODEL_CACHE
+
+
+class ModelStore:
+    # 버전별 모델 저장소
+    # root/versions/<version>.joblib 에 새 버전을 원자적으로 쓰고, root/CURRENT 포인터를 rename으로 교체
+    # 읽는 쪽은 항상 완성된 버전 하나를 보며, 학습 중이어도 이전 버전으로 계속 탐지할 수 있음
+    def __init__(self, root: str, keep_versions: int = 5):
+        self.root = root
+        self.versions_dir = os.path.join(root, 'versions')
+        self.pointer = os.path.join(root, 'CURRENT')
+        self.keep_versions = max(1, keep_versions)
+        os.makedirs(self.versions_dir, exist_ok=True)
+
+    def _version_path(self, version: str) -> str:
+        return os.path.join(self.versions_dir, f'{version}.joblib')
+
+    @staticmethod
+    def new_version() -> str:
+        return f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{os.getpid()}"
+
+    def attachment_path(self, version: str, suffix: str) -> str:
+        # 버전에 딸린 파일 (예: entity 모델 pack), 버전이 정리될 때 함께 삭제
+        return os.path.join(self.versions_dir, f'{version}.{suffix}')
+
+    def versions(self) -> List[str]:
+        return sorted(f[:-len('.joblib')] for f in os.listdir(self.versions_dir) if f.endswith('.joblib'))
+
+    def current_version(self) -> Optional[str]:
+        try:
+            with open(self.pointer) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version if version and os.path.exists(self._version_path(version)) else None
+
+    def current_path(self) -> Optional[str]:
+        version = self.current_version()
+        return self._version_path(version) if version else None
+
+    def load_current(self) -> Optional[Any]:
+        path = self.current_path()
+        return MODEL_CACHE.load(path) if path else None
+
+    def publish(self, model: Any, version: Optional[str] = None) -> str:
+        # 1) 버전 파일을 temp에 쓰고 rename  2) CURRENT 포인터를 temp에 쓰고 rename
+        # attachment가 있으면 new_version()으로 받은 version에 먼저 기록한 뒤 publish
+        version = version or self.new_version()
+        MODEL_CACHE.store(self._version_path(version), model)
+        tmp = f"{self.pointer}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.pointer)
+        logging.info("Published model version %s", version)
+        self._prune(version)
+        return version
+
+    def _prune(self, current: str):
+        # 최근 keep_versions개만 유지 (현재 버전은 항상 유지)
+        # publish되지 못한 학습(실패·중단)의 attachment/temp도 유지 대상보다 오래되면 함께 삭제
+        # (그보다 새 것은 다른 프로세스에서 학습 중일 수 있어 남겨둠)
+        keep = set(self.versions()[-self.keep_versions:]) | {current}
+        oldest = min(keep)
+        for name in os.listdir(self.versions_dir):
+            version = name.split('.', 1)[0]
+            if version in keep or version >= oldest:
+                continue
+            path = os.path.join(self.versions_dir, name)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            if name.endswith('.joblib'):
+                MODEL_CACHE.invalidate(path)
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+
+
+class Reservoir:
+    # 지금까지 본 모든 학습 행에서 균등하게 뽑은 최대 capacity개 표본 (Algorithm R)
+    # 증분 재학습이 새 window와 함께 쓰는 과거 데이터, 크기가 고정이라 재학습 비용이 이력 길이와 무관
+    def __init__(self, capacity: int, n_features: int, seed: int = 0):
+        self.capacity = max(1, capacity)
+        self.seed = seed
+        self.rows = np.empty((0, n_features))
+        self.seen = 0
+
+    def add(self, X: np.ndarray):
+        # t번째(0부터) 행은 t < capacity면 그대로 추가, 아니면 확률 capacity/(t+1)로 임의 슬롯 교체
+        # 같은 슬롯을 여러 번 교체하면 나중 행이 남음 (순차 처리와 같은 결과)
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.rows.shape[1]:
+            raise ValueError(f"expected {self.rows.shape[1]} features, got shape {X.shape}")
+        fill = min(len(X), self.capacity - len(self.rows))
+        if fill > 0:
+            self.rows = np.vstack([self.rows, X[:fill]])
+        rest = X[fill:]
+        if len(rest):
+            # 본 행 수로 seed를 정해 저장 없이도 같은 입력이면 같은 표본
+            rng = np.random.default_rng([self.seed, self.seen])
+            t = self.seen + fill + np.arange(len(rest))
+            slots = (rng.random(len(rest)) * (t + 1)).astype(np.int64)
+            keep = slots < self.capacity
+            self.rows[slots[keep]] = rest[keep]
+        self.seen += len(X)
+
+    def save(self, path: str):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, rows=self.rows, seen=self.seen, capacity=self.capacity, seed=self.seed)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, capacity: int, n_features: int, seed: int = 0) -> 'Reservoir':
+        # 파일이 없거나 feature 수가 다르면 빈 표본, capacity가 줄었으면 앞에서부터 자름
+        reservoir = cls(capacity, n_features, seed)
+        try:
+            with np.load(path) as data:
+                rows, seen = data['rows'], int(data['seen'])
+        except (OSError, KeyError, ValueError):
+            return reservoir
+        if rows.ndim == 2 and rows.shape[1] == n_features:
+            reservoir.rows = rows[:reservoir.capacity].astype(np.float64)
+            reservoir.seen = seen
+        return reservoir
+
+
+def reservoir_path(store_root: str) -> str:
+    return os.path.join(store_root, 'reservoir.npz')
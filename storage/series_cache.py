@@ -0,0 +1,63 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+CacheEntry = Tuple[np.ndarray, np.ndarray, List[Dict[str, str]]]
+
+
+class SeriesCache:
+    # query별로 step 정렬된 (timestamp_ms, series x timestamp 값 행렬, series 라벨)을 로컬 디스크에 보관하는 캐시
+    # 같은 프로세스 안에서는 메모리 사본을 재사용하고, 새 프로세스(CronJob)는 디스크에서 읽어옴
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._mem: Dict[str, CacheEntry] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, digest)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            cached = self._mem.get(key)
+        if cached is not None:
+            return cached
+        path = self._path(key)
+        try:
+            timestamps = np.load(path + '.ts.npy')
+            values = np.load(path + '.val.npy')
+            with open(path + '.labels.json') as f:
+                labels = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if values.ndim != 2 or values.shape != (len(labels), len(timestamps)):
+            logging.warning("Discarding inconsistent cache entry for %s", key)
+            return None
+        entry = (timestamps, values, labels)
+        with self._lock:
+            self._mem[key] = entry
+        return entry
+
+    def put(self, key: str, timestamps: np.ndarray, values: np.ndarray, labels: List[Dict[str, str]]):
+        timestamps = np.ascontiguousarray(timestamps, dtype=np.int64)
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        path = self._path(key)
+        # write-temp-then-rename: 동시에 읽는 프로세스가 반쯤 쓰인 파일을 보지 않도록
+        # labels를 마지막에 교체하므로 도중에 중단돼도 shape 검사에서 걸러짐
+        for suffix, arr in (('.ts.npy', timestamps), ('.val.npy', values), ('.labels.json', labels)):
+            tmp = f"{path}{suffix}.{os.getpid()}.{threading.get_ident()}.tmp"
+            if suffix.endswith('.json'):
+                with open(tmp, 'w') as f:
+                    json.dump(arr, f)
+            else:
+                with open(tmp, 'wb') as f:
+                    np.save(f, arr)
+            os.replace(tmp, path + suffix)
+        with self._lock:
+            self._mem[key] = (timestamps, values, labels)
@@ -0,0 +1,92 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+# (마지막 갱신 epoch 초, 인코딩된 값)
+StateEntry = Tuple[float, bytes]
+
+
+class StateStore:
+    # namespace별 key → (갱신 시각, bytes) 저장소 인터페이스, 기본 구현은 프로세스 메모리
+    # suppressor 등은 필요한 key만 get_many로 읽고, 변경분은 put_many로 한 번에 기록
+    def __init__(self):
+        self._data: Dict[str, Dict[str, StateEntry]] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, StateEntry]:
+        with self._lock:
+            ns = self._data.get(namespace, {})
+            return {k: ns[k] for k in keys if k in ns}
+
+    def put_many(self, namespace: str, items: Dict[str, StateEntry]):
+        if items:
+            with self._lock:
+                self._data.setdefault(namespace, {}).update(items)
+
+    def prune(self, namespace: str, before: float) -> int:
+        # 갱신 시각이 before 이전인 key 삭제
+        with self._lock:
+            ns = self._data.get(namespace, {})
+            stale = [k for k, (updated, _) in ns.items() if updated < before]
+            for k in stale:
+                del ns[k]
+        return len(stale)
+
+    def close(self):
+        pass
+
+
+class SQLiteStateStore(StateStore):
+    # CronJob pod 간 공유용 로컬 SQLite (WAL) 저장소
+    # 여는 비용은 상태 크기와 무관하고(전체 로드 없음), 조회는 (namespace, key) primary key로 필요한 key만 읽음
+    _BATCH = 500
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        super().__init__()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # WAL에서는 NORMAL로도 crash 시 일관성 유지 (마지막 commit만 유실 가능)
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS state ('
+                ' namespace TEXT NOT NULL, key TEXT NOT NULL, updated REAL NOT NULL, value BLOB NOT NULL,'
+                ' PRIMARY KEY (namespace, key)) WITHOUT ROWID'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS state_updated ON state (namespace, updated)')
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, StateEntry]:
+        keys = list(keys)
+        out: Dict[str, StateEntry] = {}
+        with self._lock:
+            for i in range(0, len(keys), self._BATCH):
+                chunk = keys[i:i + self._BATCH]
+                rows = self._conn.execute(
+                    f"SELECT key, updated, value FROM state WHERE namespace = ? AND key IN ({','.join('?' * len(chunk))})",
+                    [namespace, *chunk]
+                )
+                out.update((key, (updated, bytes(value))) for key, updated, value in rows)
+        return out
+
+    def put_many(self, namespace: str, items: Dict[str, StateEntry]):
+        if not items:
+            return
+        rows: List[Tuple[str, str, float, bytes]] = [
+            (namespace, key, updated, value) for key, (updated, value) in items.items()
+        ]
+        # 변경분 전체를 한 transaction으로 기록
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?)', rows)
+
+    def prune(self, namespace: str, before: float) -> int:
+        with self._lock, self._conn:
+            cur = self._conn.execute('DELETE FROM state WHERE namespace = ? AND updated < ?', (namespace, before))
+        return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,147 @@
+import glob
+import json
+import logging
+import os
+import queue
+import re
+import struct
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_MAGIC = b'HSTCKPT1'
+_NAME = re.compile(r'^(?P<prefix>.+)-(?P<seq>\d{10})\.ckpt$')
+
+# (l_mass, r_mass, counter, first_window): 모델 n개의 (n x tree x node) mass와 window 위치
+State = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def checkpoint_path(directory: str, prefix: str, seq: int) -> str:
+    return os.path.join(directory, f"{prefix}-{seq:010d}.ckpt")
+
+
+def write_checkpoint(path: str, names: Sequence[str], state: State, meta: dict, seq: int, full: bool):
+    # JSON 헤더 + mass 원시 배열 (window_size < 65536이면 uint16), 임시 파일에 쓴 뒤 rename으로 교체
+    l_mass, r_mass, counter, first_window = state
+    dtype = np.uint16 if meta['window_size'] < 2 ** 16 else np.uint32
+    header = json.dumps({
+        'names': list(names), 'shape': list(l_mass.shape), 'dtype': np.dtype(dtype).name,
+        'meta': meta, 'seq': seq, 'full': full
+    }).encode()
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(_MAGIC + struct.pack('<I', len(header)) + header)
+        for array in (l_mass.astype(dtype), r_mass.astype(dtype), counter.astype(np.int64),
+                      first_window.astype(np.uint8)):
+            f.write(np.ascontiguousarray(array).data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_checkpoint(path: str) -> Tuple[dict, State]:
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(_MAGIC)] != _MAGIC:
+        raise ValueError(f"not a streaming checkpoint: {path}")
+    size, = struct.unpack_from('<I', data, len(_MAGIC))
+    offset = len(_MAGIC) + 4
+    header = json.loads(data[offset:offset + size])
+    offset += size
+    shape = tuple(header['shape'])
+    n = shape[0]
+    arrays = []
+    for dtype, count, dims in ((header['dtype'], int(np.prod(shape)), shape),
+                               (header['dtype'], int(np.prod(shape)), shape),
+                               ('int64', n, (n,)), ('uint8', n, (n,))):
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += array.nbytes
+        arrays.append(array.reshape(dims))
+    l_mass, r_mass, counter, first_window = arrays
+    return header, (l_mass, r_mass, counter, first_window.astype(bool))
+
+
+def list_checkpoints(directory: str, prefix: str = '*') -> List[Tuple[int, str]]:
+    found = []
+    for path in glob.glob(os.path.join(directory, f"{prefix}-*.ckpt")):
+        match = _NAME.match(os.path.basename(path))
+        if match:
+            found.append((int(match.group('seq')), path))
+    return sorted(found)
+
+
+def load_checkpoints(directory: str, meta: dict, prefix: str = '*') -> Tuple[List[str], Optional[State], int]:
+    # 디렉터리의 모든 snapshot을 seq 순으로 합침 (같은 모델은 나중 seq가 우선), (이름, 상태, 마지막 seq) 반환
+    # 모델 구성(meta)이 다른 파일은 tree 구조가 달라 건너뜀
+    latest: Dict[str, Tuple[int, int]] = {}
+    parts: List[State] = []
+    last_seq = -1
+    for seq, path in list_checkpoints(directory, prefix):
+        try:
+            header, state = read_checkpoint(path)
+        except (OSError, ValueError) as e:
+            logging.warning("Skipping unreadable checkpoint %s: %s", path, e)
+            continue
+        if header['meta'] != meta:
+            logging.warning("Skipping checkpoint %s built with a different model config", path)
+            continue
+        for i, name in enumerate(header['names']):
+            latest[name] = (len(parts), i)
+        parts.append(state)
+        last_seq = max(last_seq, seq)
+    if not latest:
+        return [], None, last_seq
+    names = list(latest)
+    part = np.fromiter((latest[n][0] for n in names), dtype=np.intp, count=len(names))
+    row = np.fromiter((latest[n][1] for n in names), dtype=np.intp, count=len(names))
+    merged = []
+    for k in range(4):
+        sample = parts[0][k]
+        out = np.empty((len(names),) + sample.shape[1:], dtype=sample.dtype)
+        for p, state in enumerate(parts):
+            sel = part == p
+            if sel.any():
+                out[sel] = state[k][row[sel]]
+        merged.append(out)
+    return names, tuple(merged), last_seq
+
+
+def remove_older(directory: str, seq: int, prefix: str = '*'):
+    # full snapshot(seq)이 모두 기록된 뒤 그 이전 파일 정리
+    for old, path in list_checkpoints(directory, prefix):
+        if old < seq:
+            os.remove(path)
+
+
+class CheckpointWriter:
+    # snapshot 기록 전용 백그라운드 스레드: submit()은 복사된 상태를 넘기고 바로 반환
+    # 이전 기록이 밀려 있으면 새 요청이 대기 (최대 1개)
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue(maxsize=1)
+        self.written = 0
+        self._thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, path: str, names: Sequence[str], state: State, meta: dict, seq: int, full: bool):
+        self._queue.put((path, names, state, meta, seq, full))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                write_checkpoint(*item)
+                self.written += 1
+            except OSError as e:
+                logging.error("Checkpoint write to %s failed: %s", item[0], e)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
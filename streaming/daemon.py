@@ -0,0 +1,358 @@
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import struct
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from alerting.alerting_manager import AlertmanagerClient
+from alerting.dispatcher import SlackDispatcher
+from alerting.suppression import Deduplicator, FlappingSuppressor, MuteList, suppression_mask
+from monitoring.metrics import STREAM_ALERT_LATENCY, STREAM_QUEUE_DEPTH, STREAM_REJECTED, STREAM_SAMPLES
+from storage.state_store import SQLiteStateStore
+from streaming.checkpoint import CheckpointWriter, checkpoint_path, load_checkpoints, remove_older
+from streaming.online_iforest import OnlineIsolationForestDetector
+from streaming.remote_write import decode_write_request
+from streaming.sharded import ShardedStreamingEngine
+
+# (entity, timestamp_ms, features 순서의 값)
+Row = Tuple[str, int, np.ndarray]
+
+
+class StreamingService:
+    # Prometheus remote-write(POST /api/v1/write)로 push된 샘플을 받아 실시간 탐지하는 asyncio 서비스
+    # series 이름(__name__)이 features 중 하나인 샘플을 (entity, timestamp)별 행으로 모아, 모든 feature가 채워진
+    # 행만 큐에 넣음. worker는 batch_size개 또는 flush_interval초 단위 mini-batch로 detect_many 후
+    # 이상치를 suppression(mute·dedup·flapping) → Alertmanager/Slack으로 전달
+    # 큐가 queue_size 행을 넘으면 backpressure_seconds까지 기다린 뒤 503 응답 (remote-write 클라이언트가 재전송)
+    # 요청 body가 max_body_bytes를 넘으면 읽지 않고 413 응답 후 연결 종료
+    def __init__(self, cfg: dict):
+        self.features = list(cfg.get('stream_features') or cfg['metrics'])
+        self.entity_label = cfg.get('stream_entity_label') or cfg.get('entity_label') or 'instance'
+        self.host = cfg.get('stream_host', '0.0.0.0')
+        self.port = cfg.get('stream_port', 9201)
+        self.batch_size = cfg.get('stream_batch_size', 1000)
+        self.flush_interval = cfg.get('stream_flush_seconds', 0.5)
+        self.queue_size = cfg.get('stream_queue_size', 100000)
+        self.backpressure_seconds = cfg.get('stream_backpressure_seconds', 5.0)
+        self.max_pending = cfg.get('stream_max_pending', 100000)
+        self.max_body_bytes = cfg.get('stream_max_body_bytes', 16 * 2 ** 20)
+        self.threshold = cfg.get('stream_threshold', 0.8)
+        # HalfSpaceTrees는 [0, 1] 범위를 가정하므로 feature별 [min, max]로 정규화
+        limits = cfg.get('stream_limits', {})
+        self._low = np.array([float(limits.get(f, (0.0, 1.0))[0]) for f in self.features])
+        span = np.array([float(limits.get(f, (0.0, 1.0))[1]) for f in self.features]) - self._low
+        self._span = np.where(span > 0, span, 1.0)
+        model = dict(
+            n_trees=cfg.get('stream_n_trees', 25),
+            height=cfg.get('stream_height', 8),
+            window_size=cfg.get('stream_window_size', 250),
+            seed=cfg.get('stream_seed', 42)
+        )
+        # stream_workers가 있으면 entity별 모델을 worker 프로세스들에 나눠 보관, 없으면 전체 entity 공용 모델 하나
+        # stream_checkpoint_dir가 있으면 모델 상태를 주기적으로 저장하고 재시작 시 이어서 사용
+        self.checkpoint_dir = cfg.get('stream_checkpoint_dir')
+        self.checkpoint_seconds = cfg.get('stream_checkpoint_seconds', 60)
+        self.engine = ShardedStreamingEngine(
+            self.features, n_workers=cfg['stream_workers'], threshold=self.threshold,
+            checkpoint_dir=self.checkpoint_dir, **model
+        ) if cfg.get('stream_workers') else None
+        self.detector = OnlineIsolationForestDetector(features=self.features, **model) if self.engine is None else None
+        self._meta = {'features': self.features, **model}
+        self._writer: Optional[CheckpointWriter] = None
+        self._seq = 0
+        if self.detector and self.checkpoint_dir:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            names, state, self._seq = load_checkpoints(self.checkpoint_dir, self._meta, prefix='detector')
+            self._seq += 1
+            if names:
+                self.detector.restore(state)
+                logging.info("Restored streaming model state from %s", self.checkpoint_dir)
+        self.state = SQLiteStateStore(cfg['state_path']) if cfg.get('state_path') else None
+        self.mutes = MuteList(cfg.get('mutes', []))
+        self.deduplicator = Deduplicator(timedelta(minutes=cfg.get('alert_dedup_minutes', 10)), store=self.state)
+        self.flapping = FlappingSuppressor(timedelta(minutes=cfg.get('flapping_window_minutes', 5)),
+                                           cfg.get('flapping_threshold', 3), store=self.state)
+        self.alertmanager = AlertmanagerClient(
+            cfg['alertmanager_url'],
+            max_batch_size=cfg.get('alertmanager_batch_size', 500),
+            flush_interval=cfg.get('alertmanager_flush_seconds', 1.0),
+            spool_dir=cfg.get('alertmanager_spool_dir')
+        ) if cfg.get('alertmanager_url') else None
+        self.dispatcher = SlackDispatcher(
+            cfg['slack_webhook_url'],
+            min_interval=cfg.get('slack_min_interval_seconds', 1.0)
+        ) if cfg.get('slack_webhook_url') else None
+        self.alert_batch_size = cfg.get('alert_batch_size', 50)
+        self._column = {f: i for i, f in enumerate(self.features)}
+        # (entity, timestamp) → [값 배열, feature별 채워짐 여부, 채워진 feature 수]
+        self._pending: 'OrderedDict[Tuple[str, int], list]' = OrderedDict()
+        self.rows_scored = 0
+        self.alerts_sent = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._space: Optional[asyncio.Condition] = None
+        self._depth = 0
+        self._server = None
+        self._worker_task = None
+
+    def assemble(self, series) -> List[Row]:
+        # 샘플을 (entity, timestamp) 행에 채우고 완성된 행 반환, 오래된 미완성 행은 max_pending을 넘으면 버림
+        # NaN 샘플(remote-write staleness marker 등)은 값이 없는 것으로 보고 건너뜀 → 그 feature는 빈 채로 남음
+        rows = []
+        n = len(self.features)
+        for labels, samples in series:
+            col = self._column.get(labels.get('__name__'))
+            if col is None:
+                continue
+            entity = labels.get(self.entity_label, '')
+            for ts, value in samples:
+                if value != value:
+                    continue
+                key = (entity, ts)
+                slot = self._pending.get(key)
+                if slot is None:
+                    slot = self._pending[key] = [np.full(n, np.nan), np.zeros(n, dtype=bool), 0]
+                    if len(self._pending) > self.max_pending:
+                        self._pending.popitem(last=False)
+                if not slot[1][col]:
+                    slot[1][col] = True
+                    slot[2] += 1
+                slot[0][col] = value
+                if slot[2] == n:
+                    rows.append((entity, ts, slot[0]))
+                    del self._pending[key]
+        return rows
+
+    async def _reserve(self, n: int) -> bool:
+        # 큐에 n행을 넣을 자리가 생길 때까지 대기 (빈 큐에는 크기와 무관하게 허용)
+        async with self._space:
+            try:
+                await asyncio.wait_for(
+                    self._space.wait_for(lambda: self._depth == 0 or self._depth + n <= self.queue_size),
+                    self.backpressure_seconds
+                )
+            except asyncio.TimeoutError:
+                return False
+            self._depth += n
+            return True
+
+    async def handle_write(self, body: bytes) -> Tuple[int, str]:
+        try:
+            series = decode_write_request(body)
+        except (ValueError, IndexError, struct.error, UnicodeDecodeError) as e:
+            return 400, f"invalid remote-write body: {e}"
+        STREAM_SAMPLES.inc(sum(len(samples) for _, samples in series))
+        rows = self.assemble(series)
+        if not rows:
+            return 204, ''
+        if not await self._reserve(len(rows)):
+            STREAM_REJECTED.inc(len(rows))
+            return 503, 'scoring queue is full'
+        self._queue.put_nowait(rows)
+        STREAM_QUEUE_DEPTH.set(self._depth)
+        return 204, ''
+
+    async def _next_batch(self) -> Optional[List[Row]]:
+        # 첫 chunk 이후 flush_interval이 지나거나 batch_size행이 모이면 반환, 종료 신호면 None
+        loop = asyncio.get_running_loop()
+        chunk = await self._queue.get()
+        if chunk is None:
+            return None
+        rows = list(chunk)
+        deadline = loop.time() + self.flush_interval
+        while len(rows) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                chunk = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if chunk is None:
+                # 종료 신호는 현재 batch를 처리한 뒤 받도록 되돌려 놓음
+                self._queue.put_nowait(None)
+                break
+            rows.extend(chunk)
+        async with self._space:
+            self._depth -= len(rows)
+            self._space.notify_all()
+        STREAM_QUEUE_DEPTH.set(self._depth)
+        return rows
+
+    def _score(self, rows: List[Row]) -> np.ndarray:
+        X = (np.vstack([values for _, _, values in rows]) - self._low) / self._span
+        if self.engine is None:
+            return self.detector.detect_many(X, self.threshold)
+        entities = [entity for entity, _, _ in rows]
+        timestamps = [ts for _, ts, _ in rows]
+        self.engine.submit(entities, timestamps, X)
+        self.engine.flush()
+        hits = {(entity, ts) for entity, ts, _ in self.engine.results()}
+        return np.array([key in hits for key in zip(entities, timestamps)], dtype=bool)
+
+    def checkpoint(self) -> int:
+        # 모델 상태 복사 후 기록은 백그라운드 스레드에서 (sharded면 worker별로), 저장한 모델 수 반환
+        if self.engine is not None:
+            return self.engine.checkpoint()
+        if self._writer is None:
+            self._writer = CheckpointWriter()
+        previous = checkpoint_path(self.checkpoint_dir, 'detector', self._seq - 1)
+        if os.path.exists(previous):
+            remove_older(self.checkpoint_dir, self._seq - 1, prefix='detector')
+        self._writer.submit(checkpoint_path(self.checkpoint_dir, 'detector', self._seq), ['*'],
+                            self.detector.state(), self._meta, self._seq, True)
+        self._seq += 1
+        return 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_checkpoint = loop.time() + self.checkpoint_seconds
+        while True:
+            if self.checkpoint_dir and loop.time() >= next_checkpoint:
+                await loop.run_in_executor(None, self.checkpoint)
+                next_checkpoint = loop.time() + self.checkpoint_seconds
+            rows = await self._next_batch()
+            if rows is None:
+                if self.checkpoint_dir:
+                    await loop.run_in_executor(None, self.checkpoint)
+                return
+            # tree 탐색은 executor에서 수행해 수신 처리를 막지 않음
+            flags = await loop.run_in_executor(None, self._score, rows)
+            self.rows_scored += len(rows)
+            hits = np.flatnonzero(flags)
+            if len(hits):
+                self._alert([rows[i] for i in hits])
+
+    def _alert(self, rows: List[Row]):
+        labels = [{'alertname': 'AnomalyDetected', 'severity': 'warning', self.entity_label: entity}
+                  for entity, _, _ in rows]
+        alert_ids = [f"AnomalyDetected/{entity}" for entity, _, _ in rows]
+        keep = suppression_mask(alert_ids, labels, self.flapping, self.deduplicator, self.mutes)
+        alerts: List[Dict] = []
+        lines = []
+        for (entity, ts, values), item, send in zip(rows, labels, keep):
+            if not send:
+                continue
+            description = ", ".join(f"{f}={v:.2f}" for f, v in zip(self.features, values))
+            alerts.append({
+                'labels': item,
+                'annotations': {'description': description},
+                'startsAt': datetime.utcfromtimestamp(ts / 1000).strftime('%Y-%m-%dT%H:%M:%SZ')
+            })
+            lines.append(f"{entity} -> {description}")
+        if not alerts:
+            return
+        if self.alertmanager:
+            self.alertmanager.send_alerts(alerts)
+        if self.dispatcher:
+            for i in range(0, len(lines), self.alert_batch_size):
+                chunk = lines[i:i + self.alert_batch_size]
+                self.dispatcher.submit(f"[ALERT] {len(chunk)} streaming anomalies\n" + "\n".join(chunk))
+        now = time.time()
+        for (_, ts, _), send in zip(rows, keep):
+            if send:
+                STREAM_ALERT_LATENCY.observe(max(0.0, now - ts / 1000))
+        self.alerts_sent += len(alerts)
+        logging.info("Streaming: %d anomalies alerted (%d suppressed)", len(alerts), len(rows) - len(alerts))
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # keep-alive를 지원하는 최소 HTTP/1.1 처리
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, path, _ = line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    name, value = header.decode('latin-1').split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length > self.max_body_bytes:
+                    writer.write(b"HTTP/1.1 413 Payload Too Large\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length)
+                if method == 'POST' and path == '/api/v1/write':
+                    status, text = await self.handle_write(body)
+                elif method == 'GET' and path in ('/-/healthy', '/-/ready'):
+                    status, text = 200, 'OK'
+                else:
+                    status, text = 404, 'not found'
+                payload = text.encode()
+                reason = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+                          503: 'Service Unavailable'}[status]
+                head = f"HTTP/1.1 {status} {reason}\r\nContent-Length: {len(payload)}\r\n"
+                if status == 503:
+                    head += "Retry-After: 1\r\n"
+                writer.write(head.encode() + b"\r\n" + payload)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._space = asyncio.Condition()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._worker_task = asyncio.create_task(self._run())
+        logging.info("Streaming detector listening on %s:%d (features=%s)", self.host, self.port, self.features)
+
+    async def stop(self, timeout: Optional[float] = 30.0):
+        # 수신 중단 → 큐에 남은 행 처리 → 알림 전송 마무리
+        self._server.close()
+        await self._server.wait_closed()
+        self._queue.put_nowait(None)
+        await asyncio.wait_for(self._worker_task, timeout)
+        if self.alertmanager:
+            self.alertmanager.close(timeout)
+        if self.dispatcher:
+            self.dispatcher.close(timeout)
+        if self.engine:
+            self.engine.close()
+        if self._writer:
+            self._writer.close()
+            remove_older(self.checkpoint_dir, self._seq - 1, prefix='detector')
+        if self.state:
+            self.state.close()
+
+    async def serve_forever(self):
+        await self.start()
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stopping.set)
+        await stopping.wait()
+        logging.info("Shutting down streaming detector")
+        await self.stop()
+
+
+def main(config_path: str = 'config.yaml'):
+    from anomaly_detection import ConfigLoader, setup_logging
+
+    setup_logging()
+    cfg = ConfigLoader.load(config_path)
+    if cfg.get('stream_metrics_port'):
+        from prometheus_client import start_http_server
+        start_http_server(cfg['stream_metrics_port'])
+    asyncio.run(StreamingService(cfg).serve_forever())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Prometheus remote-write 기반 스트리밍 이상 탐지 서비스')
+    parser.add_argument('--config', default='config.yaml')
+    args = parser.parse_args()
+    main(args.config)
@@ -0,0 +1,224 @@
+from typing import List, Sequence
+
+import numpy as np
+from river import anomaly
+from river.tree.padded import PaddedBranch, make_padded_tree
+
+
+class HalfSpaceTreesArray:
+    # river HalfSpaceTrees와 같은 tree·mass를 (tree x node) 배열로 보관하고 mini-batch 단위로 점수·학습
+    # node는 heap 순서(자식 2i+1, 2i+2)이고 feature는 생성 시 주어진 컬럼 순서의 index
+    # 점수는 r_mass만, 학습은 l_mass만 사용하므로 window pivot 사이에서는 batch 전체를 점수 낸 뒤 한 번에
+    # 학습해도 샘플 단위로 score→learn 한 것과 결과가 같음
+    def __init__(self, trees: List[PaddedBranch], features: Sequence[str], height: int,
+                 window_size: int, counter: int = 0, first_window: bool = True):
+        self.features = list(features)
+        self.height = height
+        self.window_size = window_size
+        self.size_limit = 0.1 * window_size
+        self.max_score = len(trees) * window_size * (2 ** (height + 1) - 1)
+        self.counter = counter
+        self.first_window = first_window
+        n_nodes = 2 ** (height + 1) - 1
+        n_branches = 2 ** height - 1
+        index = {name: i for i, name in enumerate(self.features)}
+        self.feature = np.zeros((len(trees), max(n_branches, 1)), dtype=np.intp)
+        self.threshold = np.zeros((len(trees), max(n_branches, 1)))
+        self.l_mass = np.zeros((len(trees), n_nodes), dtype=np.int64)
+        self.r_mass = np.zeros((len(trees), n_nodes), dtype=np.int64)
+        for t, root in enumerate(trees):
+            stack = [(root, 0)]
+            while stack:
+                node, i = stack.pop()
+                self.l_mass[t, i] = node.l_mass
+                self.r_mass[t, i] = node.r_mass
+                if isinstance(node, PaddedBranch):
+                    self.feature[t, i] = index[node.feature]
+                    self.threshold[t, i] = node.threshold
+                    stack.append((node.children[0], 2 * i + 1))
+                    stack.append((node.children[1], 2 * i + 2))
+
+    @classmethod
+    def build(cls, features: Sequence[str], n_trees: int, height: int, window_size: int,
+              seed: int = None) -> 'HalfSpaceTreesArray':
+        # river가 첫 learn_one에서 만드는 것과 같은 tree (같은 seed·정렬된 feature 이름·[0, 1] 범위)
+        model = anomaly.HalfSpaceTrees(n_trees=n_trees, height=height, window_size=window_size, seed=seed)
+        trees = [
+            make_padded_tree(limits={f: model.limits[f] for f in sorted(features)}, height=height,
+                             padding=0.15, rng=model.rng, r_mass=0, l_mass=0)
+            for _ in range(n_trees)
+        ]
+        return cls(trees, features, height, window_size)
+
+    @classmethod
+    def from_river(cls, model: anomaly.HalfSpaceTrees, features: Sequence[str]) -> 'HalfSpaceTreesArray':
+        # 이미 학습 중인 river 모델의 tree·mass·window 위치를 그대로 옮김
+        return cls(model.trees, features, model.height, model.window_size,
+                   counter=model.counter, first_window=model._first_window)
+
+    def _paths(self, X: np.ndarray) -> np.ndarray:
+        # (depth + 1, tree, sample): 각 tree에서 샘플이 지나는 root → leaf node index
+        n_trees = len(self.feature)
+        trees = np.arange(n_trees)[:, None]
+        samples = np.arange(len(X))[None, :]
+        paths = np.zeros((self.height + 1, n_trees, len(X)), dtype=np.intp)
+        for depth in range(self.height):
+            node = paths[depth]
+            value = X[samples, self.feature[trees, node]]
+            # river PaddedBranch.next와 같은 비교: value < threshold면 왼쪽, 그 외(NaN 포함)는 오른쪽
+            paths[depth + 1] = 2 * node + 1 + ~(value < self.threshold[trees, node])
+        return paths
+
+    def _score(self, paths: np.ndarray) -> np.ndarray:
+        if self.first_window:
+            return np.zeros(paths.shape[2])
+        trees = np.arange(paths.shape[1])[:, None]
+        score = np.zeros(paths.shape[1:])
+        active = np.ones(paths.shape[1:], dtype=bool)
+        # r_mass가 size_limit 미만인 node에서 해당 tree 탐색 중단 (river와 같은 조기 종료)
+        for depth in range(self.height + 1):
+            mass = self.r_mass[trees, paths[depth]]
+            score += np.where(active, mass * float(2 ** depth), 0.0)
+            active &= mass >= self.size_limit
+        return 1 - score.sum(axis=0) / self.max_score
+
+    def _learn(self, paths: np.ndarray):
+        n_trees, n_nodes = self.l_mass.shape
+        flat = (np.arange(n_trees)[:, None] * n_nodes + paths).ravel()
+        self.l_mass += np.bincount(flat, minlength=n_trees * n_nodes).reshape(n_trees, n_nodes)
+        self.counter += paths.shape[2]
+        if self.counter == self.window_size:
+            self.r_mass = self.l_mass
+            self.l_mass = np.zeros_like(self.r_mass)
+            self.first_window = False
+            self.counter = 0
+
+    def score_many(self, X: np.ndarray) -> np.ndarray:
+        return self._score(self._paths(X))
+
+    def state(self) -> tuple:
+        # checkpoint용 상태 복사본 (모델 1개 분량의 HalfSpaceTreesFleet 상태와 같은 형태)
+        return (self.l_mass[None].copy(), self.r_mass[None].copy(),
+                np.array([self.counter]), np.array([self.first_window]))
+
+    def restore(self, state: tuple):
+        l_mass, r_mass, counter, first_window = state
+        self.l_mass = l_mass[0].astype(np.int64)
+        self.r_mass = r_mass[0].astype(np.int64)
+        self.counter = int(counter[0])
+        self.first_window = bool(first_window[0])
+
+    def process(self, X: np.ndarray, score: bool = True, learn: bool = True) -> np.ndarray:
+        # window pivot 경계로 나눈 구간마다 (점수 → 학습), 점수 배열 반환
+        scores = np.zeros(len(X))
+        start = 0
+        while start < len(X):
+            end = min(len(X), start + self.window_size - self.counter)
+            paths = self._paths(X[start:end])
+            if score:
+                scores[start:end] = self._score(paths)
+            if learn:
+                self._learn(paths)
+            start = end
+        return scores
+
+
+class HalfSpaceTreesFleet:
+    # entity마다 독립적인 HalfSpaceTrees 모델 묶음: tree 구조(feature·threshold)는 template 하나를 공유하고
+    # mass·window 위치만 entity(slot)별로 (slot x tree x node) 배열에 보관
+    # 여러 entity가 섞인 batch도 경로 계산은 한 번, 결과는 entity별로 HalfSpaceTreesArray.process와 동일
+    def __init__(self, template: HalfSpaceTreesArray, capacity: int = 1024):
+        self.template = template
+        n_trees, n_nodes = template.l_mass.shape
+        self.l_mass = np.zeros((capacity, n_trees, n_nodes), dtype=np.int32)
+        self.r_mass = np.zeros((capacity, n_trees, n_nodes), dtype=np.int32)
+        self.counter = np.zeros(capacity, dtype=np.int64)
+        self.first_window = np.ones(capacity, dtype=bool)
+        # 마지막 checkpoint 이후 상태가 바뀐 slot
+        self.dirty = np.zeros(capacity, dtype=bool)
+        self._free = list(range(capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self.counter) - len(self._free)
+
+    def allocate(self) -> int:
+        if not self._free:
+            size = len(self.counter)
+            self.l_mass = np.concatenate([self.l_mass, np.zeros_like(self.l_mass)])
+            self.r_mass = np.concatenate([self.r_mass, np.zeros_like(self.r_mass)])
+            self.counter = np.concatenate([self.counter, np.zeros(size, dtype=np.int64)])
+            self.first_window = np.concatenate([self.first_window, np.ones(size, dtype=bool)])
+            self.dirty = np.concatenate([self.dirty, np.zeros(size, dtype=bool)])
+            self._free = list(range(2 * size - 1, size - 1, -1))
+        return self._free.pop()
+
+    def release(self, slot: int):
+        self.l_mass[slot] = 0
+        self.r_mass[slot] = 0
+        self.counter[slot] = 0
+        self.first_window[slot] = True
+        self.dirty[slot] = False
+        self._free.append(slot)
+
+    def export(self, slot: int) -> tuple:
+        return (self.l_mass[slot].copy(), self.r_mass[slot].copy(),
+                int(self.counter[slot]), bool(self.first_window[slot]))
+
+    def restore(self, slot: int, state: tuple, dirty: bool = True):
+        self.l_mass[slot], self.r_mass[slot], self.counter[slot], self.first_window[slot] = state
+        self.dirty[slot] = dirty
+
+    def snapshot(self, slots: np.ndarray) -> tuple:
+        # slots 상태의 복사본 (checkpoint 기록용), dirty 표시 해제
+        self.dirty[slots] = False
+        return self.l_mass[slots], self.r_mass[slots], self.counter[slots], self.first_window[slots]
+
+    def restore_many(self, slots: np.ndarray, state: tuple):
+        l_mass, r_mass, counter, first_window = state
+        self.l_mass[slots] = l_mass
+        self.r_mass[slots] = r_mass
+        self.counter[slots] = counter
+        self.first_window[slots] = first_window
+        self.dirty[slots] = False
+
+    def process(self, slots: np.ndarray, X: np.ndarray) -> np.ndarray:
+        # slots[i]의 모델로 X[i]를 점수 낸 뒤 학습 (같은 slot의 행은 주어진 순서대로)
+        t = self.template
+        slots = np.asarray(slots, dtype=np.intp)
+        paths = t._paths(X)
+        trees = np.arange(paths.shape[1])[:, None]
+        scores = np.zeros(len(X))
+        rows = np.arange(len(X))
+        while len(rows):
+            # 이번 round: 각 slot의 window pivot 전까지의 행 (대부분 batch 전체가 한 round)
+            s = slots[rows]
+            order = np.argsort(s, kind='stable')
+            sorted_s = s[order]
+            starts = np.flatnonzero(np.r_[True, sorted_s[1:] != sorted_s[:-1]])
+            rank = np.empty(len(rows), dtype=np.int64)
+            rank[order] = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+            now = self.counter[s] + rank < t.window_size
+            cur, s = rows[now], s[now]
+            p = paths[:, :, cur]
+            score = np.zeros(p.shape[1:])
+            active = np.ones(p.shape[1:], dtype=bool)
+            for depth in range(t.height + 1):
+                mass = self.r_mass[s[None, :], trees, p[depth]]
+                score += np.where(active, mass * float(2 ** depth), 0.0)
+                active &= mass >= t.size_limit
+            scores[cur] = np.where(self.first_window[s], 0.0, 1 - score.sum(axis=0) / t.max_score)
+            n_trees, n_nodes = self.l_mass.shape[1:]
+            flat = ((s[None, None, :] * n_trees + trees[None]) * n_nodes + p).ravel()
+            index, counts = np.unique(flat, return_counts=True)
+            self.l_mass.reshape(-1)[index] += counts.astype(np.int32)
+            touched, counts = np.unique(s, return_counts=True)
+            self.counter[touched] += counts
+            self.dirty[touched] = True
+            full = touched[self.counter[touched] == t.window_size]
+            if len(full):
+                self.r_mass[full] = self.l_mass[full]
+                self.l_mass[full] = 0
+                self.first_window[full] = False
+                self.counter[full] = 0
+            rows = rows[~now]
+        return scores
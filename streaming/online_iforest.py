@@ -1,20 +1,52 @@
+from typing import Optional, Sequence
+
+import numpy as np
 from river import anomaly
 
+from streaming.half_space_trees import HalfSpaceTreesArray
+
+
 class OnlineIsolationForestDetector:
     # River 기반 스트리밍 이상 탐지용 IsolationForest 유사 모델 -> HalfSpaceTrees 알고리즘을 사용
-    def __init__(self, n_trees: int = 100, height: int = 8, seed: int = 42):
+    # *_many API는 features 순서의 NumPy 배열을 받아 배열 기반 engine(HalfSpaceTreesArray)으로 mini-batch 처리
+    # engine으로 전환되면 dict API도 같은 engine을 사용 (river 경로와 점수 동일)
+    def __init__(self, n_trees: int = 100, height: int = 8, seed: int = 42,
+                 window_size: int = 250, features: Optional[Sequence[str]] = None):
         self.model = anomaly.HalfSpaceTrees(
             n_trees=n_trees,
             height=height,
+            window_size=window_size,
             seed=seed
         )
+        self.features = list(features) if features is not None else None
+        self.engine: Optional[HalfSpaceTreesArray] = None
+
+    def _engine(self) -> HalfSpaceTreesArray:
+        if self.engine is None:
+            if self.features is None:
+                raise ValueError("features must be set to use the array API")
+            if self.model.trees:
+                # 지금까지 dict로 학습한 상태를 그대로 이어받음
+                self.engine = HalfSpaceTreesArray.from_river(self.model, self.features)
+            else:
+                self.engine = HalfSpaceTreesArray.build(self.features, self.model.n_trees, self.model.height,
+                                                        self.model.window_size, self.model.seed)
+        return self.engine
+
+    def _row(self, x: dict) -> np.ndarray:
+        return np.array([[x[f] for f in self.features]], dtype=np.float64)
 
     def score(self, x: dict) -> float:
         # 단일 샘플 x에 대한 이상 점수 반환 -> x: {feature_name: feature_value, ...}
+        if self.engine is not None:
+            return float(self.engine.score_many(self._row(x))[0])
         return self.model.score_one(x)
 
     def learn(self, x: dict):
         # 모델에 단일 샘플 x 학습
+        if self.engine is not None:
+            self.engine.process(self._row(x), score=False)
+            return
         self.model.learn_one(x)
 
     def detect(self, x: dict, threshold: float) -> bool:  
@@ -23,6 +55,26 @@ class OnlineIsolationForestDetector:
         self.learn(x)
         return score > threshold
 
+    def score_many(self, X: np.ndarray) -> np.ndarray:
+        # X: (샘플 x features) 배열, 학습 없이 점수만
+        return self._engine().score_many(np.asarray(X, dtype=np.float64))
+
+    def learn_many(self, X: np.ndarray):
+        self._engine().process(np.asarray(X, dtype=np.float64), score=False)
+
+    def state(self) -> tuple:
+        # checkpoint용 mass·window 위치 복사본 (streaming.checkpoint 형식)
+        return self._engine().state()
+
+    def restore(self, state: tuple):
+        # 같은 설정(seed·features·tree 크기)으로 만든 detector에 저장된 학습 상태를 되살림
+        self._engine().restore(state)
+
+    def detect_many(self, X: np.ndarray, threshold: float) -> np.ndarray:
+        # 샘플마다 detect를 순서대로 호출한 것과 같은 결과 (tree 탐색은 샘플당 한 번)
+        scores = self._engine().process(np.asarray(X, dtype=np.float64))
+        return scores > threshold
+
 if __name__ == '__main__':
     # 2차원 피쳐 스트림
     data_stream = [
@@ -0,0 +1,166 @@
+import struct
+from typing import Dict, List, Tuple
+
+# python-snappy가 있으면 C 구현 사용, 없으면 아래 순수 Python block 디코더 사용
+try:
+    import snappy
+except ImportError:
+    snappy = None
+
+# (series 라벨, [(timestamp_ms, value), ...])
+Series = Tuple[Dict[str, str], List[Tuple[int, float]]]
+
+
+def _varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def snappy_decompress(data: bytes) -> bytes:
+    # snappy block 형식 (remote-write body는 framing 없이 block 하나)
+    if snappy is not None:
+        return snappy.uncompress(data)
+    length, pos = _varint(data, 0)
+    out = bytearray()
+    n = len(data)
+    while pos < n:
+        tag = data[pos]
+        pos += 1
+        kind = tag & 3
+        if kind == 0:
+            size = tag >> 2
+            if size >= 60:
+                extra = size - 59
+                size = int.from_bytes(data[pos:pos + extra], 'little')
+                pos += extra
+            size += 1
+            out += data[pos:pos + size]
+            pos += size
+            continue
+        if kind == 1:
+            size = 4 + ((tag >> 2) & 7)
+            offset = ((tag >> 5) << 8) | data[pos]
+            pos += 1
+        elif kind == 2:
+            size = 1 + (tag >> 2)
+            offset = int.from_bytes(data[pos:pos + 2], 'little')
+            pos += 2
+        else:
+            size = 1 + (tag >> 2)
+            offset = int.from_bytes(data[pos:pos + 4], 'little')
+            pos += 4
+        if offset == 0 or offset > len(out):
+            raise ValueError("invalid snappy copy offset")
+        start = len(out) - offset
+        if offset >= size:
+            out += out[start:start + size]
+        else:
+            # 겹치는 copy는 반복 패턴
+            for i in range(size):
+                out.append(out[start + i])
+    if len(out) != length:
+        raise ValueError(f"snappy length mismatch: {len(out)} != {length}")
+    return bytes(out)
+
+
+def snappy_compress(data: bytes) -> bytes:
+    # 테스트·부하 클라이언트용: literal만으로 구성한 유효한 snappy block
+    if snappy is not None:
+        return snappy.compress(data)
+    out = bytearray(_encode_varint(len(data)))
+    for i in range(0, len(data), 65536):
+        chunk = data[i:i + 65536]
+        size = len(chunk) - 1
+        if size < 60:
+            out.append(size << 2)
+        elif size < 256:
+            out += bytes([60 << 2, size])
+        else:
+            out.append(61 << 2)
+            out += size.to_bytes(2, 'little')
+        out += chunk
+    return bytes(out)
+
+
+def _fields(buf: bytes):
+    # protobuf wire format: (field 번호, wire type, 값 또는 (start, end))
+    pos, n = 0, len(buf)
+    while pos < n:
+        key, pos = _varint(buf, pos)
+        field, wire = key >> 3, key & 7
+        if wire == 0:
+            value, pos = _varint(buf, pos)
+        elif wire == 1:
+            value = buf[pos:pos + 8]
+            pos += 8
+        elif wire == 2:
+            size, pos = _varint(buf, pos)
+            value = buf[pos:pos + size]
+            pos += size
+        elif wire == 5:
+            value = buf[pos:pos + 4]
+            pos += 4
+        else:
+            raise ValueError(f"unsupported protobuf wire type {wire}")
+        yield field, wire, value
+
+
+def decode_write_request(body: bytes) -> List[Series]:
+    # prometheus.WriteRequest: timeseries(1) = {labels(1) = {name(1), value(2)}, samples(2) = {value(1), timestamp(2)}}
+    series = []
+    for field, _, ts in _fields(snappy_decompress(body)):
+        if field != 1:
+            continue
+        labels: Dict[str, str] = {}
+        samples: List[Tuple[int, float]] = []
+        for f, _, value in _fields(ts):
+            if f == 1:
+                label = {lf: lv for lf, _, lv in _fields(value)}
+                labels[bytes(label.get(1, b'')).decode()] = bytes(label.get(2, b'')).decode()
+            elif f == 2:
+                sample_value, timestamp = 0.0, 0
+                for sf, _, sv in _fields(value):
+                    if sf == 1:
+                        sample_value = struct.unpack('<d', sv)[0]
+                    elif sf == 2:
+                        # int64 음수는 2의 보수 varint
+                        timestamp = sv - (1 << 64) if sv >= 1 << 63 else sv
+                samples.append((timestamp, sample_value))
+        series.append((labels, samples))
+    return series
+
+
+def _len_field(field: int, payload: bytes) -> bytes:
+    return _encode_varint(field << 3 | 2) + _encode_varint(len(payload)) + payload
+
+
+def encode_write_request(series: List[Series]) -> bytes:
+    # decode_write_request의 역: snappy 압축된 WriteRequest body
+    out = bytearray()
+    for labels, samples in series:
+        ts = bytearray()
+        for name, value in sorted(labels.items()):
+            ts += _len_field(1, _len_field(1, name.encode()) + _len_field(2, str(value).encode()))
+        for timestamp, value in samples:
+            sample = b'\x09' + struct.pack('<d', value) + b'\x10' + _encode_varint(timestamp & ((1 << 64) - 1))
+            ts += _len_field(2, sample)
+        out += _len_field(1, bytes(ts))
+    return snappy_compress(bytes(out))
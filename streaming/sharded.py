@@ -0,0 +1,391 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from streaming.checkpoint import CheckpointWriter, checkpoint_path, load_checkpoints, remove_older
+from streaming.half_space_trees import HalfSpaceTreesArray, HalfSpaceTreesFleet
+
+
+class SharedRing:
+    # 고정 폭 float64 레코드를 담는 단일 생산자·단일 소비자 shared memory ring buffer
+    # head(누적 기록 수)는 생산자만, tail(누적 소비 수)은 소비자만 갱신
+    # head/tail은 lock이 있는 multiprocessing.Value: lock 획득·해제가 memory barrier라 데이터 기록 → head 공개,
+    # 데이터 읽기 → tail 공개 순서가 CPU 메모리 모델(ARM 등)과 무관하게 보장됨
+    # 다른 프로세스에서 열 때는 name과 함께 생성한 쪽의 indices를 (Process 인자로) 넘김
+    def __init__(self, capacity: int, width: int, name: Optional[str] = None, indices=None, context=None):
+        self.capacity = capacity
+        self.width = width
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=capacity * width * 8)
+        self.name = self.shm.name
+        self._data = np.ndarray((capacity, width), dtype=np.float64, buffer=self.shm.buf)
+        if indices is None:
+            context = context or multiprocessing.get_context('spawn')
+            indices = (context.Value('q', 0), context.Value('q', 0))
+        self.indices = indices
+        self._head, self._tail = indices
+
+    def __len__(self) -> int:
+        return self._head.value - self._tail.value
+
+    def push(self, rows: np.ndarray) -> int:
+        # 빈 자리만큼 기록하고 기록한 행 수 반환
+        head = self._head.value
+        n = min(len(rows), self.capacity - (head - self._tail.value))
+        if n <= 0:
+            return 0
+        start = head % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = rows[:first]
+        self._data[:n - first] = rows[first:n]
+        self._head.value = head + n
+        return n
+
+    def pop(self, limit: Optional[int] = None) -> np.ndarray:
+        tail = self._tail.value
+        n = self._head.value - tail
+        if limit is not None:
+            n = min(n, limit)
+        start = tail % self.capacity
+        first = min(n, self.capacity - start)
+        rows = np.concatenate([self._data[start:start + first], self._data[:n - first]])
+        self._tail.value = tail + n
+        return rows
+
+    def close(self):
+        del self._data
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def _weight(worker: int, entity: str) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{worker}/{entity}".encode(), digest_size=8).digest(), 'little')
+
+
+def owner_of(entity: str, workers: Sequence[int]) -> int:
+    # rendezvous hashing: worker 추가·제거 시 해당 worker로 오가는 entity만 이동
+    return max(workers, key=lambda w: _weight(w, entity))
+
+
+def _push_all(ring: SharedRing, rows: np.ndarray, wait):
+    sent = 0
+    while sent < len(rows):
+        n = ring.push(rows[sent:])
+        sent += n
+        if not n:
+            wait()
+
+
+def _worker_main(key: int, inbox: Tuple[str, tuple], outbox: Tuple[str, tuple], width: int, capacity: int, conn,
+                 params: dict):
+    # worker 프로세스: inbox에서 (entity id, timestamp, features...)를 읽어 entity별 모델로 점수·학습,
+    # threshold를 넘은 행만 outbox에 (entity id, timestamp, score)로 기록, 제어 명령은 pipe로 수신
+    # inbox/outbox: 부모가 만든 ring의 (shared memory 이름, head/tail Value)
+    inbox = SharedRing(capacity, width, name=inbox[0], indices=inbox[1])
+    outbox = SharedRing(capacity, 3, name=outbox[0], indices=outbox[1])
+    template = HalfSpaceTreesArray.build(params['features'], params['n_trees'], params['height'],
+                                         params['window_size'], params['seed'])
+    fleet = HalfSpaceTreesFleet(template)
+    slots: Dict[int, int] = {}
+    writer: Optional[CheckpointWriter] = None
+    threshold = params['threshold']
+    batch_size = params['batch_size']
+    processed = 0
+
+    def slot_of(entity: int) -> int:
+        slot = slots.get(entity)
+        if slot is None:
+            slot = slots[entity] = fleet.allocate()
+        return slot
+
+    def drain() -> int:
+        rows = inbox.pop(batch_size)
+        if len(rows):
+            ids = rows[:, 0].astype(np.int64)
+            scores = fleet.process(np.fromiter(map(slot_of, ids.tolist()), dtype=np.intp, count=len(ids)),
+                                   rows[:, 2:])
+            hits = scores > threshold
+            if hits.any():
+                _push_all(outbox, np.column_stack([rows[hits, 0], rows[hits, 1], scores[hits]]),
+                          lambda: time.sleep(0.0005))
+        return len(rows)
+
+    idle = 0
+    try:
+        while True:
+            n = drain()
+            processed += n
+            if n:
+                idle = 0
+                continue
+            if conn.poll(min(0.002, 0.0001 * idle)):
+                # 명령 전에 보낸 샘플을 모두 처리한 뒤 응답
+                while True:
+                    n = drain()
+                    processed += n
+                    if not n:
+                        break
+                command, arg = conn.recv()
+                if command == 'sync':
+                    conn.send({'entities': len(slots), 'processed': processed})
+                elif command == 'export':
+                    states = {e: fleet.export(slots[e]) for e in arg if e in slots}
+                    for e in states:
+                        fleet.release(slots.pop(e))
+                    conn.send(states)
+                elif command == 'import':
+                    for e, state in arg.items():
+                        fleet.restore(slot_of(e), state)
+                    conn.send(len(arg))
+                elif command == 'restore':
+                    ids, state = arg
+                    fleet.restore_many(np.fromiter(map(slot_of, ids), dtype=np.intp, count=len(ids)), state)
+                    conn.send(len(ids))
+                elif command == 'checkpoint':
+                    # 상태 복사만 하고 파일 기록은 writer 스레드에 맡겨 점수 처리를 계속함
+                    path, names, meta, seq, full = arg
+                    ids = [e for e, slot in slots.items() if full or fleet.dirty[slot]]
+                    state = fleet.snapshot(np.fromiter((slots[e] for e in ids), dtype=np.intp, count=len(ids)))
+                    if writer is None:
+                        writer = CheckpointWriter()
+                    writer.submit(path, [names[e] for e in ids], state, meta, seq, full)
+                    conn.send(len(ids))
+                elif command == 'stop':
+                    if writer is not None:
+                        writer.close()
+                    conn.send(processed)
+                    return
+            else:
+                idle = min(idle + 1, 20)
+    finally:
+        inbox.close()
+        outbox.close()
+
+
+class _Worker:
+    def __init__(self, key: int, width: int, capacity: int, params: dict, context):
+        self.key = key
+        self.inbox = SharedRing(capacity, width, context=context)
+        self.outbox = SharedRing(capacity, 3, context=context)
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, name=f'stream-shard-{key}', daemon=True,
+            args=(key, (self.inbox.name, self.inbox.indices), (self.outbox.name, self.outbox.indices),
+                  width, capacity, child, params)
+        )
+        self.process.start()
+
+    def call(self, command: str, arg=None):
+        self.conn.send((command, arg))
+        return self.conn.recv()
+
+    def close(self):
+        self.process.join()
+        for ring in (self.inbox, self.outbox):
+            ring.close()
+            ring.unlink()
+
+
+class ShardedStreamingEngine:
+    # entity별 HalfSpaceTrees 모델을 여러 worker 프로세스에 나눠 보관·학습 (GIL 우회)
+    # entity는 rendezvous hashing으로 worker에 고정되고, 샘플은 pickle 없이 worker별 shared memory ring으로 전달
+    # worker 추가·제거 시 소유 worker가 바뀌는 entity의 모델 상태(mass·window 위치)만 옮김
+    # 모든 entity가 같은 seed의 tree 구조를 공유하므로 worker가 바뀌어도 점수는 동일
+    # checkpoint_dir가 있으면 시작 시 모델 상태를 복원하고, checkpoint()마다 worker별로 바뀐 모델만 기록
+    # (full_every번째마다 전체 기록 후 이전 파일 정리)
+    def __init__(self, features: Sequence[str], n_workers: Optional[int] = None, threshold: float = 0.8,
+                 n_trees: int = 25, height: int = 8, window_size: int = 250, seed: int = 42,
+                 ring_capacity: int = 65536, batch_size: int = 4096, checkpoint_dir: Optional[str] = None,
+                 full_every: int = 10):
+        self.features = list(features)
+        self.threshold = threshold
+        self.ring_capacity = ring_capacity
+        self._params = {
+            'features': self.features, 'n_trees': n_trees, 'height': height, 'window_size': window_size,
+            'seed': seed, 'threshold': threshold, 'batch_size': batch_size
+        }
+        # spawn: 수신·알림 스레드가 도는 데몬 프로세스를 fork하지 않도록 (retrain_async, train_fleet과 같은 방식)
+        self._context = multiprocessing.get_context('spawn')
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._owner = np.zeros(0, dtype=np.intp)
+        self._results: List[Tuple[str, int, float]] = []
+        self._workers: List[_Worker] = []
+        self._next_key = 0
+        self.checkpoint_dir = checkpoint_dir
+        self.full_every = full_every
+        self._meta = {'features': self.features, 'n_trees': n_trees, 'height': height,
+                      'window_size': window_size, 'seed': seed}
+        self._seq = 0
+        self._last_full: Optional[Tuple[int, List[str]]] = None
+        for _ in range(n_workers or os.cpu_count() or 1):
+            self._spawn()
+        if checkpoint_dir:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+            self._restore()
+
+    @property
+    def workers(self) -> List[int]:
+        return [w.key for w in self._workers]
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._next_key, 2 + len(self.features), self.ring_capacity, self._params, self._context)
+        self._next_key += 1
+        self._workers.append(worker)
+        return worker
+
+    def _assign(self) -> np.ndarray:
+        keys = self.workers
+        return np.fromiter((keys.index(owner_of(name, keys)) for name in self._names),
+                           dtype=np.intp, count=len(self._names))
+
+    def _entity_ids(self, entities: Sequence[str]) -> np.ndarray:
+        ids = np.fromiter((self._ids.get(e, -1) for e in entities), dtype=np.int64, count=len(entities))
+        if (ids < 0).any():
+            keys = self.workers
+            new = [e for e in dict.fromkeys(entities) if e not in self._ids]
+            for e in new:
+                self._ids[e] = len(self._names)
+                self._names.append(e)
+            self._owner = np.concatenate([
+                self._owner,
+                np.fromiter((keys.index(owner_of(e, keys)) for e in new), dtype=np.intp, count=len(new))
+            ])
+            ids = np.fromiter((self._ids[e] for e in entities), dtype=np.int64, count=len(entities))
+        return ids
+
+    def _collect(self):
+        for worker in self._workers:
+            rows = worker.outbox.pop()
+            self._results.extend(
+                (self._names[int(e)], int(ts), float(score)) for e, ts, score in rows.tolist()
+            )
+
+    def _wait(self):
+        # ring이 가득 찬 동안 결과를 비워 worker가 outbox에서 막히지 않게 함
+        self._collect()
+        time.sleep(0.0005)
+
+    def submit(self, entities: Sequence[str], timestamps: Sequence[int], X: np.ndarray):
+        # X: (행 x features), 같은 entity의 행은 주어진 순서대로 처리됨
+        X = np.asarray(X, dtype=np.float64)
+        ids = self._entity_ids(entities)
+        rows = np.column_stack([ids.astype(np.float64), np.asarray(timestamps, dtype=np.float64), X])
+        owners = self._owner[ids]
+        if len(self._workers) == 1:
+            _push_all(self._workers[0].inbox, rows, self._wait)
+            return
+        order = np.argsort(owners, kind='stable')
+        bounds = np.searchsorted(owners[order], np.arange(len(self._workers) + 1))
+        for i, worker in enumerate(self._workers):
+            _push_all(worker.inbox, rows[order[bounds[i]:bounds[i + 1]]], self._wait)
+
+    def results(self) -> List[Tuple[str, int, float]]:
+        # 지금까지 도착한 이상치 (entity, timestamp, score)
+        self._collect()
+        results, self._results = self._results, []
+        return results
+
+    def flush(self) -> Dict[int, dict]:
+        # 제출한 샘플이 모두 처리될 때까지 대기, worker별 entity 수·처리 행 수 반환
+        for worker in self._workers:
+            worker.conn.send(('sync', None))
+        stats = {}
+        for worker in self._workers:
+            while not worker.conn.poll(0.001):
+                self._collect()
+            stats[worker.key] = worker.conn.recv()
+        self._collect()
+        return stats
+
+    def _migrate(self, before: np.ndarray, after: np.ndarray, workers: List[_Worker]):
+        # before/after: entity별 worker index (workers 기준)
+        moved = np.flatnonzero(before != after)
+        for src in np.unique(before[moved]):
+            ids = moved[before[moved] == src]
+            states = workers[src].call('export', ids.tolist())
+            for dst in np.unique(after[ids]):
+                part = {e: states[e] for e in ids[after[ids] == dst].tolist() if e in states}
+                workers[dst].call('import', part)
+        logging.info("Sharded stream engine: migrated %d/%d entities", len(moved), len(before))
+
+    def _restore(self):
+        start = time.perf_counter()
+        names, state, last_seq = load_checkpoints(self.checkpoint_dir, self._meta, prefix='shard-*')
+        self._seq = last_seq + 1
+        if not names:
+            return
+        ids = self._entity_ids(names)
+        owners = self._owner[ids]
+        for i, worker in enumerate(self._workers):
+            sel = np.flatnonzero(owners == i)
+            worker.call('restore', (ids[sel].tolist(), tuple(a[sel] for a in state)))
+        logging.info("Restored %d streaming models from %s in %.2fs",
+                     len(names), self.checkpoint_dir, time.perf_counter() - start)
+
+    def checkpoint(self, full: bool = False) -> int:
+        # 마지막 checkpoint 이후 바뀐 모델 수 반환, worker는 상태 복사 후 바로 점수 처리로 돌아감
+        if not self.checkpoint_dir:
+            raise ValueError("checkpoint_dir is not configured")
+        self._compact()
+        seq = self._seq
+        self._seq += 1
+        full = full or self._last_full is None or seq - self._last_full[0] >= self.full_every
+        paths = [checkpoint_path(self.checkpoint_dir, f"shard-{w.key}", seq) for w in self._workers]
+        for worker, path in zip(self._workers, paths):
+            names = {e: self._names[e] for e in np.flatnonzero(self._owner == self._workers.index(worker)).tolist()}
+            worker.conn.send(('checkpoint', (path, names, self._meta, seq, full)))
+        written = 0
+        for worker in self._workers:
+            while not worker.conn.poll(0.001):
+                self._collect()
+            written += worker.conn.recv()
+        if full:
+            self._last_full = (seq, paths)
+        return written
+
+    def _compact(self):
+        # 마지막 full checkpoint 파일이 모두 기록됐으면 그 이전 파일 삭제
+        if self._last_full and all(os.path.exists(p) for p in self._last_full[1]):
+            remove_older(self.checkpoint_dir, self._last_full[0], prefix='shard-*')
+
+    def add_worker(self) -> int:
+        self.flush()
+        before = self._owner
+        worker = self._spawn()
+        self._owner = self._assign()
+        self._migrate(before, self._owner, self._workers)
+        return worker.key
+
+    def remove_worker(self, key: int):
+        if len(self._workers) == 1:
+            raise ValueError("cannot remove the last worker")
+        self.flush()
+        index = self.workers.index(key)
+        workers = list(self._workers)
+        before = self._owner
+        self._workers.pop(index)
+        after = self._assign()
+        # 남은 worker의 index를 제거 전 목록 기준으로 맞춤
+        after_old = np.where(after >= index, after + 1, after)
+        self._migrate(before, after_old, workers)
+        self._owner = after
+        workers[index].call('stop')
+        workers[index].close()
+
+    def close(self):
+        for worker in self._workers:
+            worker.call('stop')
+        self._collect()
+        for worker in self._workers:
+            worker.close()
+        self._workers = []
+        if self.checkpoint_dir:
+            self._compact()
@@ -0,0 +1,603 @@
+import json
+import os
+import time
+
+import pandas as pd
+
+import numpy as np
+
+from anomaly_detection import AnomalyDetector, PrometheusClient, SeriesMatrix
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def _cfg(**overrides):
+    cfg = {
+        'prometheus_url': 'http://prometheus.test:9090',
+        'metrics': ['m0', 'm1', 'm2', 'm3'],
+        'window_minutes': 5,
+        'step': '60s',
+    }
+    cfg.update(overrides)
+    return cfg
+
+
+def test_query_range_uses_session_with_timeout():
+    client = PrometheusClient('http://prometheus.test:9090/', timeout=3.0)
+    calls = []
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append((url, timeout))
+        return FakeResponse({'data': {'result': [{'metric': {}, 'values': [[60, '1'], [120, '2']]}]}})
+
+    client.session.get = fake_get
+    matrix = client.query_range('up', pd.Timestamp(0).to_pydatetime(), pd.Timestamp(120, unit='s').to_pydatetime(), '60s')
+    assert calls == [('http://prometheus.test:9090/api/v1/query_range', 3.0)]
+    assert matrix.values.tolist() == [[1.0, 2.0]]
+
+
+def test_series_matrix_from_result_keeps_every_series():
+    result = [
+        {'metric': {'instance': 'a'}, 'values': [[60, '1'], [120, '2']]},
+        {'metric': {'instance': 'b'}, 'values': [[120, '5'], [180, 'NaN']]},
+    ]
+    matrix = SeriesMatrix.from_result(result)
+    assert matrix.timestamps.tolist() == [60000, 120000, 180000]
+    assert matrix.label_values('instance').tolist() == ['a', 'b']
+    np.testing.assert_array_equal(matrix.values, [[1, 2, np.nan], [np.nan, 5, np.nan]])
+
+
+def test_fetch_data_concurrent_keeps_metric_order(monkeypatch):
+    idx = pd.date_range('2025-01-01', periods=5, freq='min')
+
+    def fake_query_range(self, metric, start, end, step):
+        n = int(metric[1:])
+        # 앞 metric일수록 늦게 끝나도록 지연
+        time.sleep(0.05 * (4 - n))
+        return SeriesMatrix(idx.asi8 // 10**6, np.full((1, len(idx)), float(n)), [{}])
+
+    monkeypatch.setattr(PrometheusClient, 'query_range', fake_query_range)
+    sequential = AnomalyDetector(_cfg(fetch_concurrency=1)).fetch_data()
+    concurrent = AnomalyDetector(_cfg(fetch_concurrency=4)).fetch_data()
+    assert list(concurrent.columns) == ['m0', 'm1', 'm2', 'm3']
+    pd.testing.assert_frame_equal(sequential, concurrent)
+
+
+def test_fetch_data_averages_multiple_series_per_metric(monkeypatch):
+    ts = np.arange(0, 300, 60) * 1000
+    series = {'cpu': ([{'cpu': '0'}, {'cpu': '1'}], np.array([[1.0, 1, 1, 1, 1], [3.0, 3, np.nan, 3, 3]]))}
+
+    def fake_query_range(self, metric, start, end, step):
+        if metric in series:
+            labels, values = series[metric]
+            return SeriesMatrix(ts, values, labels)
+        return SeriesMatrix(ts, np.full((1, 5), 7.0), [{}])
+
+    monkeypatch.setattr(PrometheusClient, 'query_range', fake_query_range)
+    detector = AnomalyDetector(_cfg(metrics=['cpu', 'mem']))
+    df = detector.fetch_data()
+    assert list(df.columns) == ['cpu', 'mem']
+    # scrape가 한 번 빠진 series는 직전 값으로 채워 평균 (평균 대상이 바뀌어 튀지 않음)
+    assert df['cpu'].tolist() == [2.0] * 5
+    # series가 새로 생겨도 컬럼(모델 입력 폭)은 그대로
+    series['cpu'] = ([{'cpu': '0'}, {'cpu': '1'}, {'cpu': '2'}], np.vstack([series['cpu'][1], np.full(5, 5.0)]))
+    assert list(detector.fetch_data().columns) == ['cpu', 'mem']
+
+
+def test_fetch_data_archives_raw_values_before_imputation(tmp_path, monkeypatch):
+    ts = pd.Timestamp('2025-01-01').value // 10**6 + np.arange(5) * 60_000
+    idx = pd.to_datetime(ts, unit='ms')
+
+    def fake_query_range(self, metric, start, end, step):
+        values = np.array([[1.0, np.nan, 3.0, 4.0, np.nan]]) if metric == 'm1' else np.ones((1, 5))
+        return SeriesMatrix(ts, values, [{}])
+
+    monkeypatch.setattr(PrometheusClient, 'query_range', fake_query_range)
+    detector = AnomalyDetector(_cfg(metrics=['m0', 'm1'], archive_dir=str(tmp_path)))
+    assert detector.fetch_data()['m1'].tolist() == [1.0, 1.0, 3.0, 4.0, 4.0]
+    # 보간한 값은 실제 표본처럼 보관하지 않음, 읽을 때 다시 보간
+    assert detector.archive.read('metrics', key='m1')['m1'].tolist() == [1.0, 3.0, 4.0]
+    history = detector.load_history(idx[0].to_pydatetime(), idx[-1].to_pydatetime())
+    assert history['m1'].tolist() == [1.0, 1.0, 3.0, 4.0, 4.0]
+
+
+def test_caching_client_fetches_only_tail(tmp_path, monkeypatch):
+    from datetime import datetime
+    from anomaly_detection import CachingPrometheusClient
+    from storage.series_cache import SeriesCache
+
+    requested = []
+
+    def fake_query_range(self, metric, start, end, step):
+        requested.append((start.timestamp(), end.timestamp()))
+        ts = np.arange(int(start.timestamp()), int(end.timestamp()) + 1, 60)
+        return SeriesMatrix(ts * 1000, ts.astype(float).reshape(1, -1), [{'instance': 'a'}])
+
+    monkeypatch.setattr(PrometheusClient, 'query_range', fake_query_range)
+    cache = SeriesCache(str(tmp_path))
+    client = CachingPrometheusClient('http://prometheus.test', cache, invalidation_seconds=120)
+
+    t0 = 1_700_000_040
+    first = client.query_range('up', datetime.fromtimestamp(t0), datetime.fromtimestamp(t0 + 3600), '60s')
+    assert len(first.timestamps) == 61
+
+    # 새 프로세스처럼 디스크 캐시만 사용, 1분 뒤 조회
+    client.cache = SeriesCache(str(tmp_path))
+    second = client.query_range('up', datetime.fromtimestamp(t0 + 60), datetime.fromtimestamp(t0 + 3660), '60s')
+    assert requested[-1] == (t0 + 3660 - 120, t0 + 3660)
+    assert second.timestamps.tolist() == list(range((t0 + 60) * 1000, (t0 + 3660) * 1000 + 1, 60000))
+    assert (second.values[0] * 1000 == second.timestamps).all()
+
+
+def test_fetch_data_entity_mode_stacks_all_entities(monkeypatch):
+    ts = np.arange(0, 300, 60) * 1000
+
+    def fake_query_range(self, metric, start, end, step):
+        # cpu는 core별 2개 series → instance 기준 평균
+        if metric == 'cpu':
+            labels = [{'instance': 'a', 'cpu': '0'}, {'instance': 'a', 'cpu': '1'}, {'instance': 'b', 'cpu': '0'}]
+            values = np.array([[1.0] * 5, [3.0] * 5, [10.0] * 5])
+        else:
+            labels = [{'instance': 'b'}, {'instance': 'a'}]
+            values = np.array([[20.0] * 5, [5.0] * 5])
+        return SeriesMatrix(ts, values, labels)
+
+    monkeypatch.setattr(PrometheusClient, 'query_range', fake_query_range)
+    df = AnomalyDetector(_cfg(metrics=['cpu', 'mem'], entity_label='instance')).fetch_data()
+    assert df.index.names == ['instance', 'timestamp']
+    assert df.shape == (10, 2)
+    assert df.loc['a'].iloc[0].tolist() == [2.0, 5.0]
+    assert df.loc['b'].iloc[0].tolist() == [10.0, 20.0]
+
+
+def test_chunked_query_range_stitches_without_gaps_or_duplicates():
+    from datetime import datetime
+
+    def fake_request(metric, start_s, end_s, step):
+        # 포인트 수 제한 검사 + start부터 step 간격 평가 (series b는 후반부에만 존재)
+        n = int(round((end_s - start_s) / 60)) + 1
+        assert n <= 7
+        ts = start_s + 60 * np.arange(n)
+        result = [{'metric': {'instance': 'a'}, 'values': [[t, str(t)] for t in ts]}]
+        late = ts[ts >= 1_000_000 + 60 * 20]
+        if len(late):
+            result.append({'metric': {'instance': 'b'}, 'values': [[t, str(-t)] for t in late]})
+        return result
+
+    client = PrometheusClient('http://prometheus.test', max_points_per_query=7, chunk_concurrency=3)
+    client._request = fake_request
+    matrix = client.query_range('up', datetime.fromtimestamp(1_000_000), datetime.fromtimestamp(1_000_000 + 60 * 30), '1m')
+    expected_ts = 1_000_000 + 60 * np.arange(31)
+    assert matrix.timestamps.tolist() == (expected_ts * 1000).tolist()
+    assert sorted(matrix.label_values('instance')) == ['a', 'b']
+    row_a = matrix.label_values('instance').tolist().index('a')
+    np.testing.assert_array_equal(matrix.values[row_a], expected_ts)
+    assert np.isnan(matrix.values[1 - row_a][:20]).all()
+    np.testing.assert_array_equal(matrix.values[1 - row_a][20:], -expected_ts[20:])
+    # close()가 chunk pool의 worker 스레드를 정리
+    pool = client._chunk_pool
+    client.close()
+    assert client._chunk_pool is None and pool._shutdown
+
+
+def test_drift_retrains_in_background_without_blocking_detection(tmp_path, monkeypatch):
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame(rng.rand(200, 2), columns=['m0', 'm1'],
+                      index=pd.date_range('2025-01-01', periods=200, freq='min'))
+    monkeypatch.setattr(AnomalyDetector, 'fetch_data', lambda self: df)
+
+    detector = AnomalyDetector(_cfg(model_store_dir=str(tmp_path / 'store'), model_path=str(tmp_path / 'none')))
+    detector.run()
+    first = detector.model_store.current_version()
+    assert first is not None
+
+    class AlwaysDrift:
+        def update(self, names, values, timestamps=None):
+            return list(names)
+
+        def save(self):
+            pass
+
+    detector.drift_detector = AlwaysDrift()
+    results = detector.run()
+    # 이번 run은 기존 버전으로 탐지
+    assert 'anomaly' in results.columns
+    detector.wait_for_training(timeout=60)
+    assert detector.model_store.current_version() != first
+
+
+def test_alert_batches_per_entity():
+    detector = AnomalyDetector(_cfg(alert_batch_size=2))
+    index = pd.MultiIndex.from_arrays(
+        [['a', 'a', 'a', 'b'], pd.date_range('2025-01-01', periods=4, freq='min')],
+        names=['instance', 'timestamp'])
+    anomalies = pd.DataFrame({'m0': [1.0, 2.0, 3.0, 4.0], 'anomaly': [-1] * 4}, index=index)
+    messages = detector._alert_messages(anomalies)
+    assert [m.splitlines()[0] for m in messages] == [
+        '[ALERT] 3 anomalies on a (1/2)', '[ALERT] 3 anomalies on a (2/2)', '[ALERT] 1 anomalies on b']
+    assert messages[0].splitlines()[1] == '2025-01-01 00:00:00 -> m0=1.00'
+
+
+def test_slack_dispatcher_retries_429_in_background():
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    from alerting.dispatcher import SlackDispatcher
+
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            if not received and not getattr(self.server, 'throttled', False):
+                self.server.throttled = True
+                self.send_response(429)
+                self.send_header('Retry-After', '0')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            received.append(body['text'])
+            self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        dispatcher = SlackDispatcher(f'http://127.0.0.1:{server.server_port}/hook',
+                                     backoff_factor=0.0, min_interval=0.0)
+        start = time.monotonic()
+        for i in range(3):
+            assert dispatcher.submit(f'msg {i}')
+        # submit은 전송을 기다리지 않음
+        assert time.monotonic() - start < 0.5
+        dispatcher.close(timeout=10)
+        assert received == ['msg 0', 'msg 1', 'msg 2']
+        assert dispatcher.sent == 3 and dispatcher.failed == 0
+    finally:
+        server.shutdown()
+
+
+def test_alertmanager_client_spools_while_down_and_replays(tmp_path):
+    from alerting.alerting_manager import AlertmanagerClient
+    from benchmarks.bench_chunked import free_port
+    from benchmarks.fake_alertmanager import FakeAlertmanager
+
+    port = free_port()
+    alerts = [{'labels': {'alertname': 'AnomalyDetected', 'instance': f'n{i}'}} for i in range(25)]
+    client = AlertmanagerClient(f'http://127.0.0.1:{port}', max_batch_size=10, flush_interval=0.05,
+                                max_retries=0, backoff_factor=0.01, max_backoff=0.05,
+                                spool_dir=str(tmp_path))
+    try:
+        assert client.send_alerts(alerts) == 25
+        assert client.flush(timeout=10)
+        assert client.sent == 0 and client.spooled == 25
+        assert len(client.spool_files()) == 3
+
+        with FakeAlertmanager(port=port) as am:
+            deadline = time.monotonic() + 10
+            while client.spool_files() and time.monotonic() < deadline:
+                time.sleep(0.02)
+            assert client.send_alerts(alerts[:5]) == 5
+            client.close(timeout=10)
+            assert am.alerts == 30 and am.requests == 4
+        assert client.spool_files() == []
+        assert client.sent == 30
+    finally:
+        client.close(timeout=1)
+
+
+def test_alertmanager_client_holds_batches_without_spool_dir():
+    from alerting.alerting_manager import AlertmanagerClient
+    from benchmarks.bench_chunked import free_port
+    from benchmarks.fake_alertmanager import FakeAlertmanager
+
+    port = free_port()
+    alerts = [{'labels': {'alertname': 'AnomalyDetected', 'instance': f'n{i}'}} for i in range(25)]
+    client = AlertmanagerClient(f'http://127.0.0.1:{port}', max_batch_size=10, flush_interval=0.05,
+                                max_retries=0, backoff_factor=0.01, max_backoff=0.05, queue_size=20)
+    try:
+        # 장애 중 배치는 버리지 않고 보관 (queue_size를 넘는 오래된 배치만 버림)
+        assert client.send_alerts(alerts[:20]) == 20
+        assert client.flush(timeout=10)
+        assert client.sent == 0 and client.dropped == 0
+        assert client.send_alerts(alerts[20:]) == 5
+        assert client.flush(timeout=10)
+        assert client.dropped == 10
+
+        with FakeAlertmanager(port=port) as am:
+            deadline = time.monotonic() + 10
+            while client.sent < 15 and time.monotonic() < deadline:
+                time.sleep(0.02)
+            client.close(timeout=10)
+            assert am.alerts == 15
+        assert client.sent == 15
+    finally:
+        client.close(timeout=1)
+
+
+def test_alertmanager_client_drops_rejected_batches_and_keeps_sending(tmp_path):
+    from alerting.alerting_manager import AlertmanagerClient
+    from benchmarks.bench_chunked import free_port
+    from benchmarks.fake_alertmanager import FakeAlertmanager
+
+    alerts = [{'labels': {'alertname': 'AnomalyDetected', 'instance': f'n{i}'}} for i in range(15)]
+    # 400 받은 spool 파일은 지우고 다음 파일/배치로 진행
+    with open(tmp_path / 'batch-00000000000000000001-1-000001.json', 'w') as f:
+        json.dump(alerts[:5], f)
+    with FakeAlertmanager(reject=1) as am:
+        client = AlertmanagerClient(am.url, max_batch_size=10, flush_interval=0.05, max_retries=0,
+                                    backoff_factor=0.01, max_backoff=0.05, spool_dir=str(tmp_path))
+        try:
+            deadline = time.monotonic() + 10
+            while client.spool_files() and time.monotonic() < deadline:
+                time.sleep(0.02)
+            assert client.send_alerts(alerts[5:]) == 10
+            client.close(timeout=10)
+            assert am.alerts == 10
+        finally:
+            client.close(timeout=1)
+    assert client.spool_files() == []
+    assert client.dropped == 5 and client.sent == 10
+
+    # spool_dir 없이도 거부된 배치를 붙잡고 재시도하지 않음
+    with FakeAlertmanager(reject=1) as am:
+        client = AlertmanagerClient(am.url, max_batch_size=5, flush_interval=0.05, max_retries=0,
+                                    backoff_factor=0.01, max_backoff=0.05)
+        try:
+            assert client.send_alerts(alerts[:5]) == 5
+            assert client.flush(timeout=10)
+            assert client.send_alerts(alerts[5:]) == 10
+            client.close(timeout=10)
+            assert am.alerts == 10 and am.requests == 2
+        finally:
+            client.close(timeout=1)
+    assert client.dropped == 5 and client.sent == 10 and client._held == []
+
+
+def test_metric_drift_detector_reports_metric_and_persists(tmp_path):
+    from monitoring.drift import MetricDriftDetector
+    from storage.state_store import SQLiteStateStore
+
+    rng = np.random.RandomState(0)
+    names = ['cpu_seconds', 'mem_bytes', 'steady']
+    X = np.column_stack([rng.normal(0.5, 0.05, 600), rng.normal(8e9, 1e8, 600), rng.normal(10, 1, 600)])
+    # 작은 단위 metric의 변화가 bytes metric에 묻히지 않아야 함
+    X[400:, 0] += 0.2
+
+    whole = MetricDriftDetector()
+    assert whole.update(names, X[:300]) == []
+    assert whole.update(names, X[300:]) == ['cpu_seconds']
+
+    # 두 번의 실행으로 나눠도 store로 이어받은 상태가 같은 결과
+    path = str(tmp_path / 'state.db')
+    first = MetricDriftDetector(store=SQLiteStateStore(path))
+    assert first.update(names, X[:300]) == []
+    first.save()
+    second = MetricDriftDetector(store=SQLiteStateStore(path))
+    assert second.update(names, X[300:]) == ['cpu_seconds']
+    np.testing.assert_allclose(second._state, whole._state)
+
+
+def test_metric_drift_detector_skips_overlapping_rows_and_prunes(tmp_path):
+    from monitoring.drift import MetricDriftDetector
+    from storage.state_store import SQLiteStateStore
+
+    rng = np.random.RandomState(1)
+    names = ['cpu', 'mem']
+    X = rng.normal(0, 1, (600, 2))
+    X[450:, 0] += 3
+    ts = 1.7e9 + 60.0 * np.arange(600)
+
+    once = MetricDriftDetector()
+    once.update(names, X[:300], ts[:300])
+    once.update(names, X[300:], ts[300:])
+
+    # window가 겹치는 실행(0-300, 200-500, 400-600)도 각 행을 한 번만 반영
+    path = str(tmp_path / 'state.db')
+    for start, end in [(0, 300), (200, 500), (400, 600)]:
+        run = MetricDriftDetector(store=SQLiteStateStore(path))
+        run.update(names, X[start:end], ts[start:end])
+        run.save()
+    np.testing.assert_allclose(run._state, once._state)
+    # 이미 처리한 구간만 다시 들어오면 상태 변화 없음
+    before = run._state.copy()
+    assert run.update(names, X[100:600], ts[100:600]) == []
+    np.testing.assert_array_equal(run._state, before)
+
+    # 갱신되지 않은 series는 ttl이 지나면 삭제
+    store = SQLiteStateStore(path)
+    pruner = MetricDriftDetector(store=store, state_ttl=1e-9)
+    pruner.update(['cpu'], X[:10, :1], ts[:10])
+    time.sleep(0.01)
+    pruner.save()
+    assert set(store.get_many('metric_drift', names)) == {'cpu'}
+
+
+def test_detector_backends_load_lazily():
+    import subprocess
+    import sys
+
+    code = ("import sys, anomaly_detection; from models.registry import get_detector; "
+            "get_detector('isolation_forest'); assert 'tensorflow' not in sys.modules, 'tensorflow imported'")
+    subprocess.run([sys.executable, '-c', code], check=True, capture_output=True)
+
+
+def test_autoencoder_detector_selected_from_config(tmp_path, monkeypatch):
+    from models.backends import ReconstructionModel
+    from models.numpy_inference import NumpyAutoencoder
+
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame(rng.rand(200, 2) * [100, 1e9], columns=['m0', 'm1'],
+                      index=pd.date_range('2025-01-01', periods=200, freq='min'))
+    monkeypatch.setattr(AnomalyDetector, 'fetch_data', lambda self: df)
+    detector = AnomalyDetector(_cfg(model_store_dir=str(tmp_path / 'store'), model_path=str(tmp_path / 'none'),
+                                    detector='deep_autoencoder', contamination=0.05,
+                                    detector_params={'encoding_dim': 4, 'epochs': 2}))
+    results = detector.run()
+    assert isinstance(detector.model, ReconstructionModel) and isinstance(detector.model.scorer, NumpyAutoencoder)
+    assert set(results['anomaly']) <= {-1, 1} and 0 < (results['anomaly'] == -1).sum() <= 20
+
+
+def test_ensemble_scores_members_concurrently_and_combines(tmp_path, monkeypatch):
+    import threading
+
+    from models.ensemble import EnsembleModel
+
+    class SlowMember:
+        # 다른 member가 모두 점수 계산에 들어와야 통과하는 barrier → 순차 실행이면 timeout
+        def __init__(self, barrier, column):
+            self.barrier, self.column = barrier, column
+
+        def anomaly_score(self, X):
+            self.barrier.wait(timeout=5)
+            return X[:, self.column]
+
+    X = np.random.RandomState(0).rand(1000, 2)
+    barrier = threading.Barrier(2)
+    ensemble = EnsembleModel(['a', 'b'], [SlowMember(barrier, 0), SlowMember(barrier, 1)], combine='vote')
+    ensemble.calibrate(X, 0.1)
+    # 기본은 과반: 같은 가중치 둘 중 한 표로는 이상이 아님
+    labels = ensemble.predict(np.array([[0.99, 0.99], [0.99, 0.5], [0.5, 0.5]]))
+    assert list(labels) == [-1, 1, 1]
+    ensemble.weights = np.array([2.0, 1.0])
+    assert list(ensemble.predict(np.array([[0.99, 0.5], [0.5, 0.99]]))) == [-1, 1]
+    ensemble.min_votes = 1.0
+    assert list(ensemble.predict(np.array([[0.99, 0.5], [0.5, 0.99]]))) == [-1, -1]
+    ensemble.close()
+
+    # process pool(spawn)도 thread와 같은 점수
+    from sklearn.ensemble import IsolationForest
+
+    forests = [IsolationForest(n_estimators=20, random_state=s).fit(X) for s in (0, 1)]
+    scores = {}
+    for executor in ('thread', 'process'):
+        model = EnsembleModel(['a', 'b'], forests, executor=executor)
+        scores[executor] = model.calibrate(X, 0.1).anomaly_score(X[:50])
+        model.close()
+    np.testing.assert_array_equal(scores['thread'], scores['process'])
+
+    df = pd.DataFrame(X * [100, 1e9], columns=['m0', 'm1'],
+                      index=pd.date_range('2025-01-01', periods=1000, freq='min'))
+    monkeypatch.setattr(AnomalyDetector, 'fetch_data', lambda self: df)
+    members = [{'detector': 'isolation_forest', 'params': {'n_estimators': 50}},
+               {'detector': 'deep_autoencoder', 'params': {'encoding_dim': 2, 'epochs': 2}}]
+    detector = AnomalyDetector(_cfg(model_store_dir=str(tmp_path / 'store'), model_path=str(tmp_path / 'none'),
+                                    detector='ensemble', contamination=0.05,
+                                    detector_params={'members': members}))
+    results = detector.run()
+    assert isinstance(detector.model, EnsembleModel) and detector.model.names == ['isolation_forest', 'deep_autoencoder']
+    assert set(results['anomaly']) <= {-1, 1} and 0 < (results['anomaly'] == -1).sum() <= 100
+
+
+def test_per_entity_models_trained_in_pool_and_loaded_lazily(tmp_path, monkeypatch):
+    from models.fleet import EntityModelFleet
+
+    rng = np.random.RandomState(0)
+    hosts = ['a', 'b', 'c']
+    idx = pd.MultiIndex.from_product([hosts, pd.date_range('2025-01-01', periods=200, freq='min')],
+                                     names=['instance', 'timestamp'])
+    # entity마다 정상 범위가 다름: a의 정상값은 b에게 이상
+    level = np.repeat([0.2, 0.5, 0.8], 200)[:, None]
+    values = level + 0.02 * rng.randn(600, 2)
+    values[[150, 350]] = [0.8, 0.8]
+    df = pd.DataFrame(values, index=idx, columns=['m0', 'm1'])
+    monkeypatch.setattr(AnomalyDetector, 'fetch_data', lambda self: df)
+    detector = AnomalyDetector(_cfg(model_store_dir=str(tmp_path / 'store'), model_path=str(tmp_path / 'none'),
+                                    entity_label='instance', per_entity_models=True, contamination=0.01,
+                                    fleet_workers=2, fleet_chunk_entities=1, fleet_cache_size=2,
+                                    detector_params={'n_estimators': 50}))
+    results = detector.run()
+    assert isinstance(detector.model, EntityModelFleet)
+    assert sorted(detector.model.pack.keys()) == ['__global__', 'a', 'b', 'c']
+    assert len(detector.model.pack._cache) == 2
+    assert results['anomaly'].iloc[150] == -1 and results['anomaly'].iloc[350] == -1
+    assert results['anomaly'].iloc[450] == 1
+    assert [f for f in os.listdir(tmp_path / 'store' / 'versions') if f.endswith('.pack')]
+
+
+def test_flat_scoring_keeps_isolation_forest_labels(tmp_path, monkeypatch):
+    from models.flat_iforest import FlatIsolationForest
+
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame(rng.rand(300, 2), columns=['m0', 'm1'],
+                      index=pd.date_range('2025-01-01', periods=300, freq='min'))
+    monkeypatch.setattr(AnomalyDetector, 'fetch_data', lambda self: df)
+    cfg = _cfg(model_store_dir=str(tmp_path / 'store'), model_path=str(tmp_path / 'none'), contamination=0.05)
+    expected = AnomalyDetector(cfg).run()
+    detector = AnomalyDetector(dict(cfg, flat_scoring=True))
+    results = detector.run()
+    assert isinstance(detector.model, FlatIsolationForest)
+    pd.testing.assert_series_equal(results['anomaly'], expected['anomaly'])
+    compiled = detector.model
+    detector.run()
+    assert detector.model is compiled
+
+
+def test_incremental_retrain_replaces_oldest_trees_and_keeps_history(tmp_path, monkeypatch):
+    from storage.reservoir import Reservoir, reservoir_path
+
+    rng = np.random.RandomState(0)
+    index = pd.date_range('2025-01-01', periods=500, freq='min')
+    windows = [pd.DataFrame(level + 0.05 * rng.randn(500, 2), columns=['m0', 'm1'], index=index)
+               for level in (0.2, 0.8)]
+    current = {'df': windows[0]}
+    monkeypatch.setattr(AnomalyDetector, 'fetch_data', lambda self: current['df'])
+    store = str(tmp_path / 'store')
+    detector = AnomalyDetector(_cfg(model_store_dir=store, model_path=str(tmp_path / 'none'), contamination=0.01,
+                                    incremental_retrain=True, reservoir_size=300,
+                                    incremental_params={'replace_fraction': 0.5}))
+    detector.run()
+    first = detector.model
+    assert len(Reservoir.load(reservoir_path(store), 300, 2).rows) == 300
+
+    # 새 regime window로 재학습: tree 절반만 새로 학습, 이전 regime은 reservoir 표본으로 유지
+    current['df'] = windows[1]
+    detector.retrain_async(detector.training_data(windows[1])).result()
+    detector.run()
+    updated = detector.model
+    assert updated is not first and len(updated.estimators_) == len(first.estimators_) == 100
+    np.testing.assert_array_equal(updated.estimators_[0].tree_.threshold, first.estimators_[50].tree_.threshold)
+    assert updated.incremental_generation_ == 1
+    # 이전 tree의 bootstrap 표본은 다시 만들 수 없어 estimators_samples_는 제공하지 않음
+    assert not hasattr(updated, 'estimators_samples_')
+    assert (updated.predict(windows[0].values) == 1).mean() > 0.9
+    assert (updated.predict(windows[1].values) == 1).mean() > 0.9
+    assert Reservoir.load(reservoir_path(store), 300, 2).seen == 1000
+
+
+def test_incremental_refit_fallback_keeps_reservoir_history(tmp_path, monkeypatch):
+    from models.ensemble import EnsembleModel
+
+    rng = np.random.RandomState(0)
+    index = pd.date_range('2025-01-01', periods=500, freq='min')
+    windows = [pd.DataFrame(level + 0.05 * rng.randn(500, 2), columns=['m0', 'm1'], index=index)
+               for level in (0.2, 0.8)]
+    monkeypatch.setattr(AnomalyDetector, 'fetch_data', lambda self: windows[0])
+    cfg = _cfg(model_store_dir=str(tmp_path / 'store'), model_path=str(tmp_path / 'none'), contamination=0.01,
+               incremental_retrain=True, reservoir_size=300)
+    AnomalyDetector(cfg).run()
+
+    # detector가 바뀌면 이어서 학습할 수 없음 → 새 window + reservoir 표본으로 전체 재학습
+    detector = AnomalyDetector(dict(cfg, detector='ensemble',
+                                    detector_params={'members': [{'detector': 'isolation_forest'}]}))
+    train = detector.training_frame(windows[1])
+    assert train is windows[1]
+    detector.retrain_async(train.values, history=False).result()
+    detector.load_or_train(windows[1].values)
+    assert isinstance(detector.model, EnsembleModel)
+    assert (detector.model.predict(windows[0].values) == 1).mean() > 0.9
+    assert (detector.model.predict(windows[1].values) == 1).mean() > 0.9
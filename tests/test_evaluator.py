@@ -10,4 +10,18 @@ def test_accuracy_evaluator_metrics_and_report():
     metrics = ev.compute_metrics()
     assert all(k in metrics for k in ('precision', 'recall', 'f1_score'))
     report = ev.report()
-    assert 'precision' in report.lower() and 'recall' in report.lower()
\ No newline at end of file
+    assert 'precision' in report.lower() and 'recall' in report.lower()
+
+def test_accuracy_evaluator_from_archive(tmp_path):
+    from storage.metric_archive import MetricArchive
+
+    archive = MetricArchive(str(tmp_path))
+    idx = pd.date_range('2025-01-01', periods=4, freq='min')
+    archive.append('results', pd.DataFrame({
+        'cpu': [0.1, 0.9, 0.2, 0.8],
+        'true_label': [0, 1, 0, 1],
+        'anomaly': [0, 1, 1, 0]
+    }, index=idx))
+    ev = AccuracyEvaluator.from_archive(archive, start=idx[1], end=idx[3])
+    assert list(ev.df.columns) == ['true_label', 'anomaly']
+    assert len(ev.y_true) == 3
@@ -31,4 +31,107 @@ def test_lstm_autoencoder_detect():
     assert errors.shape == (50,)
     labels = det.detect(X, threshold=np.percentile(errors, 90))
     assert labels.shape == (50,)
-    assert set(labels.tolist()) <= {0, 1}
\ No newline at end of file
+    assert set(labels.tolist()) <= {0, 1}
+def test_deep_autoencoder_numpy_export_matches_keras(tmp_path):
+    from models.numpy_inference import NumpyAutoencoder
+
+    X = np.random.rand(100, 10).astype('float32')
+    det = DeepAutoencoderDetector(input_dim=10, encoding_dim=5)
+    det.fit(X, epochs=1, batch_size=10)
+    det.export_numpy(str(tmp_path / 'ae.npz'))
+    model = NumpyAutoencoder.load(str(tmp_path / 'ae.npz'))
+    errors = det.compute_reconstruction_error(X).numpy()
+    np.testing.assert_allclose(model.compute_reconstruction_error(X), errors, rtol=1e-5, atol=1e-7)
+    assert model.detect(X, threshold=np.percentile(errors, 90)).shape == (100,)
+
+def test_lstm_scores_rows_from_window_views_per_segment():
+    from models.lstm_detector import sliding_windows
+
+    X = np.random.rand(120, 3).astype('float32')
+    windows = sliding_windows(X, 5)
+    assert windows.shape == (116, 5, 3) and np.shares_memory(windows, X)
+    det = LSTMAutoencoderDetector(timesteps=5, n_features=3, latent_dim=2)
+    det.fit(windows, epochs=1, batch_size=16)
+    np.testing.assert_allclose(det.compute_reconstruction_error(windows, chunk_size=7),
+                               det.compute_reconstruction_error(np.ascontiguousarray(windows)), rtol=1e-5)
+
+    # 구간(entity)별로 따로 점수 낸 것과 같음, 짧은 구간(3행)은 첫 행 반복으로 채움
+    segments = [0, 50, 53]
+    rows = det.score_rows(X, segments, chunk_size=10)
+    first = det.compute_reconstruction_error(sliding_windows(X[:50], 5))
+    np.testing.assert_allclose(rows[:50], np.r_[np.full(4, first[0]), first], rtol=1e-5)
+    short = det.compute_reconstruction_error(np.concatenate([np.repeat(X[50:51], 2, axis=0), X[50:53]])[None])
+    np.testing.assert_allclose(rows[50:53], short[0], rtol=1e-5)
+    last = det.compute_reconstruction_error(sliding_windows(X[53:], 5))
+    np.testing.assert_allclose(rows[53:], np.r_[np.full(4, last[0]), last], rtol=1e-5)
+
+
+def test_flat_isolation_forest_matches_sklearn_bit_for_bit():
+    from sklearn.ensemble import IsolationForest
+
+    from models.flat_iforest import FlatIsolationForest
+
+    rng = np.random.RandomState(0)
+    X = rng.randn(1000, 5)
+    T = 2 * rng.randn(3000, 5)
+    T[::37, 2] = np.nan
+    for params in ({}, {'max_features': 0.6, 'max_samples': 64}, {'contamination': 'auto'}):
+        model = IsolationForest(n_estimators=40, random_state=1, **params).fit(X)
+        flat = FlatIsolationForest.from_sklearn(model, large_batch=None)
+        np.testing.assert_array_equal(flat.score_samples(T), model.score_samples(T))
+        np.testing.assert_array_equal(flat.predict(T), model.predict(T))
+        np.testing.assert_array_equal(flat.predict(T[:1]), model.predict(T[:1]))
+    # large_batch 이상은 원래 모델로 계산
+    flat = FlatIsolationForest.from_sklearn(model, large_batch=100)
+    np.testing.assert_array_equal(flat.decision_function(T), model.decision_function(T))
+    # 버전별 private 속성 없이도 같은 점수 (예: sklearn < 1.3으로 학습한 모델)
+    expected = model.score_samples(T)
+    for attr in ('_decision_path_lengths', '_average_path_length_per_tree', '_max_features'):
+        delattr(model, attr)
+    np.testing.assert_array_equal(FlatIsolationForest.from_sklearn(model, large_batch=None).score_samples(T),
+                                  expected)
+
+
+def test_compile_model_falls_back_to_sklearn_model(monkeypatch):
+    from sklearn.ensemble import IsolationForest
+
+    from models.flat_iforest import FlatIsolationForest, compile_model
+
+    model = IsolationForest(n_estimators=5, random_state=0).fit(np.random.RandomState(0).randn(100, 2))
+    assert isinstance(compile_model(model), FlatIsolationForest)
+
+    def unsupported(cls, model, large_batch=1024):
+        raise AttributeError('tree_')
+
+    monkeypatch.setattr(FlatIsolationForest, 'from_sklearn', classmethod(unsupported))
+    assert compile_model(model) is model
+
+
+def test_lstm_incremental_update_leaves_previous_model_untouched():
+    from models.backends import train_lstm_autoencoder
+    from models.incremental import update_model
+
+    rng = np.random.RandomState(0)
+    previous = train_lstm_autoencoder(rng.rand(60, 2), 0.05, timesteps=5, latent_dim=4, epochs=1)
+    before = [w.copy() for w in previous.scorer.detector.autoencoder.get_weights()]
+    threshold = previous.threshold
+    updated = update_model(previous, 'lstm_autoencoder', rng.rand(60, 2) + 1, None, 0.05, epochs=1)
+    assert updated is not previous and updated.detector == 'lstm_autoencoder'
+    for old, new in zip(before, previous.scorer.detector.autoencoder.get_weights()):
+        np.testing.assert_array_equal(old, new)
+    assert previous.threshold == threshold
+    assert updated.predict(rng.rand(20, 2)).shape == (20,)
+
+
+def test_isolation_forest_incremental_update_keeps_max_samples_on_small_window():
+    from sklearn.ensemble import IsolationForest
+    from models.incremental import update_isolation_forest
+
+    rng = np.random.RandomState(0)
+    X = rng.randn(1000, 2)
+    previous = IsolationForest(random_state=0, contamination=0.01).fit(X)
+    # window가 256보다 작아도 남은 tree의 정규화 c(max_samples)는 그대로
+    updated = update_isolation_forest(previous, X[:100], 0.01)
+    assert updated._max_samples == updated.max_samples_ == 256
+    assert updated.max_samples == 'auto'
+    assert abs(updated.score_samples(X).mean() - previous.score_samples(X).mean()) < 0.035
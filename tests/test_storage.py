@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+
+from storage.metric_archive import MetricArchive
+
+
+def test_archive_appends_overlapping_windows_once(tmp_path):
+    archive = MetricArchive(str(tmp_path), compact_threshold=4)
+    idx = pd.date_range('2025-01-01 23:00', periods=180, freq='min')
+    df = pd.DataFrame({'cpu': np.arange(180.0), 'mem': np.arange(180.0) * 2}, index=idx)
+    # 60분 window를 20분 간격으로 겹쳐서 적재 (자정 경계 포함)
+    for i in range(0, 180, 20):
+        archive.append('metrics', df.iloc[max(0, i - 40):i + 20], key='up{job="node"}')
+
+    out = archive.read('metrics', key='up{job="node"}')
+    assert (out.index == df.index).all()
+    np.testing.assert_array_equal(out.values, df.values)
+    assert archive.keys('metrics') == ['up{job="node"}']
+
+    part = archive.read('metrics', key='up{job="node"}', start=idx[50], end=idx[70], columns=['mem'])
+    assert list(part.columns) == ['mem']
+    assert part['mem'].tolist() == (np.arange(50, 71) * 2.0).tolist()
+
+
+def test_archive_roundtrips_entity_frames(tmp_path):
+    archive = MetricArchive(str(tmp_path))
+    idx = pd.date_range('2025-01-01', periods=5, freq='min')
+    frame = pd.concat({
+        'a': pd.DataFrame({'cpu': np.arange(5.0)}, index=idx),
+        'b': pd.DataFrame({'cpu': np.arange(5.0) + 10}, index=idx),
+    }, names=['instance', 'timestamp'])
+    archive.append('metrics', frame, key='cpu')
+    out = archive.read('metrics', key='cpu')
+    assert out.index.names == ['instance', 'timestamp']
+    assert out.loc['b', 'cpu'].tolist() == [10.0, 11.0, 12.0, 13.0, 14.0]
+
+
+def test_archive_reads_mixed_schemas_and_hides_compacted_segments(tmp_path, monkeypatch):
+    import os
+
+    import storage.metric_archive as metric_archive
+
+    archive = MetricArchive(str(tmp_path), compact_threshold=100)
+    idx = pd.date_range('2025-01-01', periods=6, freq='min')
+    archive.append('metrics', pd.DataFrame({'cpu': np.arange(3.0)}, index=idx[:3]), key='k')
+    # 중간에 컬럼이 추가된 segment
+    archive.append('metrics', pd.DataFrame({'cpu': np.arange(3.0, 6.0), 'mem': [1.0, 2.0, 3.0]}, index=idx[3:]),
+                   key='k')
+    out = archive.read('metrics', key='k')
+    assert list(out.columns) == ['cpu', 'mem']
+    assert out['cpu'].tolist() == list(np.arange(6.0))
+    assert np.isnan(out['mem'].iloc[:3]).all() and out['mem'].iloc[3:].tolist() == [1.0, 2.0, 3.0]
+
+    # 병합본을 쓴 뒤 원본을 지우기 전(동시에 읽는 시점)에도 중복 행 없음
+    monkeypatch.setattr(metric_archive.shutil, 'rmtree', lambda *a, **k: None)
+    archive.compact('metrics', 'k', '2025-01-01')
+    day_dir = os.path.join(archive._key_dir('metrics', 'k'), '2025-01-01')
+    assert len(os.listdir(day_dir)) == 3
+    pd.testing.assert_frame_equal(archive.read('metrics', key='k'), out)
+    # 다음 compact에서 남은 원본 정리
+    monkeypatch.undo()
+    archive.append('metrics', pd.DataFrame({'cpu': [6.0], 'mem': [4.0]}, index=[idx[-1] + pd.Timedelta('1min')]),
+                   key='k')
+    archive.compact('metrics', 'k', '2025-01-01')
+    assert len(os.listdir(day_dir)) == 1
+    assert archive.read('metrics', key='k')['cpu'].tolist() == list(np.arange(7.0))
+
+
+def test_model_cache_reuses_until_content_changes(tmp_path):
+    import os
+    import joblib
+    from storage.model_cache import ModelCache
+
+    path = str(tmp_path / 'model.joblib')
+    joblib.dump({'weights': np.arange(10.0)}, path)
+    cache = ModelCache(mmap_mode='r')
+    first = cache.load(path)
+    assert isinstance(first['weights'], np.memmap)
+    assert cache.load(path) is first
+
+    # mtime만 바뀌고 내용이 같으면 재사용
+    os.utime(path, ns=(1, 1))
+    assert cache.load(path) is first
+
+    joblib.dump({'weights': np.arange(5.0)}, path)
+    second = cache.load(path)
+    assert second is not first
+    assert second['weights'].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_model_cache_mmap_shares_plain_arrays_but_not_sklearn_trees(tmp_path):
+    import joblib
+    from sklearn.ensemble import IsolationForest
+
+    from models.numpy_inference import NumpyAutoencoder
+    from storage.model_cache import ModelCache
+
+    rng = np.random.RandomState(0)
+    autoencoder = NumpyAutoencoder([(rng.rand(4, 2), rng.rand(2), 'relu'), (rng.rand(2, 4), rng.rand(4), 'sigmoid')])
+    forest = IsolationForest(n_estimators=5, random_state=0).fit(rng.rand(100, 2))
+    cache = ModelCache(mmap_mode='r')
+    for name, model in (('ae', autoencoder), ('if', forest)):
+        joblib.dump(model, str(tmp_path / f'{name}.joblib'))
+    # NumPy 가중치는 파일 mmap (프로세스 간 page cache 공유)
+    assert isinstance(cache.load(str(tmp_path / 'ae.joblib')).layers[0][0], np.memmap)
+    # sklearn Tree는 unpickle 시 node 배열을 복사 → mmap이 아님
+    tree = cache.load(str(tmp_path / 'if.joblib')).estimators_[0].tree_
+    assert not isinstance(tree.threshold, np.memmap) and not isinstance(tree.threshold.base, np.memmap)
+
+
+def test_model_store_publishes_atomically_and_prunes(tmp_path):
+    import os
+
+    from storage.model_store import ModelStore
+
+    store = ModelStore(str(tmp_path), keep_versions=2)
+    assert store.current_version() is None and store.load_current() is None
+    versions = [store.publish({'v': i}) for i in range(4)]
+    assert store.current_version() == versions[-1]
+    assert store.load_current() == {'v': 3}
+    assert store.versions() == versions[-2:]
+    # temp 파일이 남지 않음
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['CURRENT', 'versions']
+
+    # publish되지 못한 학습의 pack은 유지 대상보다 오래되면 정리, 학습 중일 수 있는 새 pack은 유지
+    orphan = store.attachment_path(store.new_version(), 'pack')
+    open(orphan, 'wb').close()
+    store.publish({'v': 4})
+    assert os.path.exists(orphan)
+    fresh = store.attachment_path(store.new_version(), 'pack')
+    open(fresh, 'wb').close()
+    store.publish({'v': 5})
+    assert not os.path.exists(orphan) and os.path.exists(fresh)
+
+
+def test_sqlite_state_store_roundtrips_and_prunes(tmp_path):
+    from storage.state_store import SQLiteStateStore
+
+    store = SQLiteStateStore(str(tmp_path / 'state' / 'state.db'))
+    store.put_many('dedup', {f'id{i}': (float(i), b'x' * i) for i in range(1200)})
+    store.put_many('flapping', {'id1': (5.0, b'')})
+    got = store.get_many('dedup', ['id3', 'id1100', 'missing'])
+    assert got == {'id3': (3.0, b'xxx'), 'id1100': (1100.0, b'x' * 1100)}
+    assert store.prune('dedup', before=1000.0) == 1000
+    assert store.get_many('dedup', ['id3']) == {}
+    assert store.get_many('flapping', ['id1']) == {'id1': (5.0, b'')}
+    store.close()
+
+
+def test_model_pack_random_access_with_lru(tmp_path):
+    import pytest
+
+    from storage.model_pack import ModelPack, ModelPackWriter
+
+    path = str(tmp_path / 'fleet.pack')
+    with ModelPackWriter(path) as writer:
+        for i in range(50):
+            writer.add(f'host-{i}', {'id': i, 'w': np.full(100, i)})
+    pack = ModelPack(path, cache_size=2)
+    assert len(pack) == 50 and 'host-7' in pack and pack.get('missing') is None
+    assert pack.get('host-42')['id'] == 42 and pack.get('host-3')['w'][0] == 3
+    pack.get('host-42')
+    pack.get('host-9')
+    pack.get('host-3')  # LRU에서 밀려나 다시 읽음
+    assert (pack.hits, pack.misses) == (1, 4)
+    pack.close()
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:-10])
+    with pytest.raises(ValueError):
+        ModelPack(path)
+
+
+def test_reservoir_keeps_bounded_uniform_sample(tmp_path):
+    from storage.reservoir import Reservoir
+
+    reservoir = Reservoir(1000, 1)
+    for start in range(0, 100000, 5000):
+        reservoir.add(np.arange(start, start + 5000, dtype=float)[:, None])
+    assert reservoir.rows.shape == (1000, 1) and reservoir.seen == 100000
+    # 오래된 구간과 최근 구간이 비슷한 비율로 남음
+    assert 400 < (reservoir.rows[:, 0] < 50000).sum() < 600
+    path = str(tmp_path / 'reservoir.npz')
+    reservoir.save(path)
+    loaded = Reservoir.load(path, 1000, 1)
+    np.testing.assert_array_equal(loaded.rows, reservoir.rows)
+    assert loaded.seen == 100000 and len(Reservoir.load(path, 1000, 3).rows) == 0
@@ -4,4 +4,238 @@ def test_online_iforest_detect_type():
     det = OnlineIsolationForestDetector(n_trees=10, height=4, seed=0)
     x = {'cpu': 0.1, 'mem': 0.2}
     result = det.detect(x, threshold=1.0)
-    assert isinstance(result, bool)
\ No newline at end of file
+    assert isinstance(result, bool)
+
+
+def test_online_iforest_batch_api_matches_river_path():
+    import numpy as np
+
+    rng = np.random.RandomState(0)
+    X = rng.rand(700, 3)
+    X[::50] = 0.98
+    # NaN feature는 river처럼 split의 오른쪽으로
+    X[7::60, 1] = np.nan
+    probe = rng.rand(20, 3)
+    probe[::4, 0] = np.nan
+    features = ['mem', 'cpu', 'disk']
+    river_path = OnlineIsolationForestDetector(n_trees=10, height=5, seed=1, window_size=64)
+    expected = [river_path.detect(dict(zip(features, row)), threshold=0.6) for row in X]
+
+    batch = OnlineIsolationForestDetector(n_trees=10, height=5, seed=1, window_size=64, features=features)
+    got = np.concatenate([batch.detect_many(X[i:i + 97], threshold=0.6) for i in range(0, len(X), 97)])
+    assert got.tolist() == expected and 0 < sum(expected) < len(X)
+    # window 경계·mass가 모두 같으므로 이후 점수도 동일
+    river_scores = [river_path.model.score_one(dict(zip(features, row))) for row in probe]
+    np.testing.assert_array_equal(batch.score_many(probe), river_scores)
+
+    # dict로 학습하던 detector도 배열 API로 이어서 사용
+    switched = OnlineIsolationForestDetector(n_trees=10, height=5, seed=1, window_size=64, features=features)
+    for row in X[:300]:
+        switched.learn(dict(zip(features, row)))
+    switched.learn_many(X[300:])
+    np.testing.assert_array_equal(switched.score_many(probe), river_scores)
+    assert switched.score(dict(zip(features, probe[0]))) == river_scores[0]
+
+
+def test_remote_write_round_trip():
+    from streaming.remote_write import decode_write_request, encode_write_request, snappy_decompress
+
+    series = [({'__name__': 'cpu', 'instance': 'n1'}, [(1700000000000, 0.5), (1700000015000, -1.25)]),
+              ({'__name__': 'mem', 'instance': 'n2'}, [(-5, 1e300)])]
+    body = encode_write_request(series)
+    assert decode_write_request(body) == series
+    # copy(오프셋 참조)가 포함된 snappy block: "abcd" literal + 겹치는 copy 8바이트
+    assert snappy_decompress(bytes([12, 3 << 2]) + b'abcd' + bytes([(8 - 4) << 2 | 1, 4])) == b'abcdabcdabcd'
+
+
+def test_streaming_service_alerts_on_pushed_anomaly():
+    import asyncio
+
+    import numpy as np
+    import requests
+
+    from benchmarks.fake_alertmanager import FakeAlertmanager
+    from streaming.daemon import StreamingService
+    from streaming.remote_write import encode_write_request
+
+    def push(port, rows):
+        series = {}
+        for entity, ts, cpu, mem in rows:
+            series.setdefault(('cpu', entity), []).append((ts, cpu))
+            series.setdefault(('mem', entity), []).append((ts, mem))
+        body = encode_write_request([({'__name__': m, 'instance': e}, s) for (m, e), s in series.items()])
+        return requests.post(f"http://127.0.0.1:{port}/api/v1/write", data=body).status_code
+
+    rng = np.random.RandomState(0)
+    with FakeAlertmanager() as am:
+        cfg = {'metrics': ['cpu', 'mem'], 'stream_host': '127.0.0.1', 'stream_port': 0,
+               'stream_flush_seconds': 0.05, 'stream_window_size': 50, 'stream_n_trees': 10,
+               'stream_height': 6, 'stream_threshold': 0.9, 'stream_limits': {'mem': [0, 100]},
+               'flapping_threshold': 100, 'alertmanager_url': am.url,
+               'alertmanager_flush_seconds': 0.05}
+
+        async def scenario():
+            service = StreamingService(cfg)
+            await service.start()
+            loop = asyncio.get_running_loop()
+            base = 1700000000000
+            normal = [(f"n{i % 4}", base + i * 1000, 0.4 + 0.1 * rng.rand(), 40 + 10 * rng.rand())
+                      for i in range(400)]
+            statuses = [await loop.run_in_executor(None, push, service.port, normal[i:i + 40])
+                        for i in range(0, 400, 40)]
+            quiet = service.alerts_sent
+            # mem만 먼저 도착해도 cpu가 채워질 때 하나의 행으로 점수
+            statuses.append(await loop.run_in_executor(None, push, service.port, [('n3', base + 10 ** 6, 0.99, 99.0)]))
+            for _ in range(100):
+                if service.rows_scored == 401:
+                    break
+                await asyncio.sleep(0.05)
+            alerted = service.alerts_sent - quiet
+            await service.stop()
+            return statuses, service.rows_scored, alerted
+
+        statuses, scored, alerted = asyncio.run(scenario())
+        assert set(statuses) == {204}
+        assert scored == 401 and alerted == 1
+        assert am.alerts >= 1
+
+
+def test_streaming_service_rejects_when_queue_full():
+    import asyncio
+
+    from streaming.daemon import StreamingService
+    from streaming.remote_write import encode_write_request
+
+    cfg = {'metrics': ['cpu'], 'stream_queue_size': 2, 'stream_backpressure_seconds': 0.05}
+
+    async def scenario():
+        service = StreamingService(cfg)
+        # worker 없이 큐만 만들어 소비가 멈춘 상태를 재현
+        service._queue, service._space = asyncio.Queue(), asyncio.Condition()
+        body = lambda ts: encode_write_request([({'__name__': 'cpu', 'instance': 'n1'}, [(ts, 0.1), (ts + 1, 0.2)])])
+        first = await service.handle_write(body(0))
+        second = await service.handle_write(body(10))
+        invalid = await service.handle_write(b'\xff\xff')
+        return first[0], second[0], invalid[0]
+
+    assert asyncio.run(scenario()) == (204, 503, 400)
+
+
+def test_streaming_service_skips_stale_markers_and_caps_body():
+    import asyncio
+
+    import requests
+
+    from streaming.daemon import StreamingService
+
+    service = StreamingService({'metrics': ['cpu', 'mem'], 'stream_host': '127.0.0.1', 'stream_port': 0,
+                                'stream_max_body_bytes': 100})
+    # staleness marker(NaN)는 feature를 채우지 않음: cpu NaN 두 번으로 행이 완성되지 않음
+    assert service.assemble([({'__name__': 'cpu', 'instance': 'n1'}, [(1, float('nan'))]),
+                             ({'__name__': 'cpu', 'instance': 'n1'}, [(1, float('nan'))])]) == []
+    assert service.assemble([({'__name__': 'mem', 'instance': 'n1'}, [(1, float('nan'))])]) == []
+    rows = service.assemble([({'__name__': 'cpu', 'instance': 'n1'}, [(1, 0.5)]),
+                             ({'__name__': 'mem', 'instance': 'n1'}, [(1, 0.7)])])
+    assert len(rows) == 1 and rows[0][2].tolist() == [0.5, 0.7]
+
+    async def scenario():
+        await service.start()
+        loop = asyncio.get_running_loop()
+        url = f"http://127.0.0.1:{service.port}/api/v1/write"
+        status = await loop.run_in_executor(None, lambda: requests.post(url, data=b'x' * 1000).status_code)
+        await service.stop()
+        return status
+
+    assert asyncio.run(scenario()) == 413
+
+
+def test_sharded_engine_matches_per_entity_models_across_rebalancing():
+    import numpy as np
+
+    from streaming.half_space_trees import HalfSpaceTreesArray
+    from streaming.sharded import ShardedStreamingEngine
+
+    rng = np.random.RandomState(0)
+    features = ['cpu', 'mem']
+    entities = [f"svc{i}" for i in rng.randint(0, 40, 6000)]
+    X = rng.rand(6000, 2)
+    X[::97] = 0.99
+    engine = ShardedStreamingEngine(features, n_workers=2, threshold=0.7, n_trees=10, height=5,
+                                    window_size=32, seed=3, ring_capacity=500)
+    try:
+        for i in range(0, 6000, 1000):
+            if i == 2000:
+                engine.add_worker()
+            if i == 4000:
+                engine.remove_worker(engine.workers[0])
+            engine.submit(entities[i:i + 1000], np.arange(i, i + 1000), X[i:i + 1000])
+        stats = engine.flush()
+        got = {(e, ts) for e, ts, _ in engine.results()}
+    finally:
+        engine.close()
+
+    assert len(stats) == 2 and sum(s['entities'] for s in stats.values()) == 40
+    expected = set()
+    names = np.array(entities)
+    for name in set(entities):
+        rows = np.flatnonzero(names == name)
+        scores = HalfSpaceTreesArray.build(features, 10, 5, 32, seed=3).process(X[rows])
+        expected |= {(name, int(i)) for i in rows[scores > 0.7]}
+    assert got == expected and expected
+
+
+def test_sharded_engine_resumes_from_incremental_checkpoint(tmp_path):
+    import numpy as np
+
+    from streaming.half_space_trees import HalfSpaceTreesArray
+    from streaming.sharded import ShardedStreamingEngine
+
+    rng = np.random.RandomState(1)
+    features = ['cpu', 'mem']
+    names = [f"svc{i}" for i in rng.randint(0, 30, 3000)]
+    X = rng.rand(3000, 2)
+    X[::50] = 0.99
+    kwargs = dict(threshold=0.6, n_trees=10, height=5, window_size=32, seed=3, checkpoint_dir=str(tmp_path))
+    engine = ShardedStreamingEngine(features, n_workers=2, **kwargs)
+    engine.submit(names[:2000], np.arange(2000), X[:2000])
+    assert engine.checkpoint() == 30
+    # 두 번째는 바뀐 모델만 기록
+    engine.submit(names[2000:2500], np.arange(2000, 2500), X[2000:2500])
+    changed = len(set(names[2000:2500]))
+    assert engine.checkpoint() == changed
+    engine.close()
+
+    restored = ShardedStreamingEngine(features, n_workers=3, **kwargs)
+    try:
+        restored.submit(names[2500:], np.arange(2500, 3000), X[2500:])
+        restored.flush()
+        got = {(e, ts) for e, ts, _ in restored.results()}
+    finally:
+        restored.close()
+    expected = set()
+    entity = np.array(names)
+    for name in set(names):
+        rows = np.flatnonzero(entity == name)
+        scores = HalfSpaceTreesArray.build(features, 10, 5, 32, seed=3).process(X[rows])
+        expected |= {(name, int(i)) for i in rows[(scores > 0.6) & (rows >= 2500)]}
+    assert got == expected and expected
+
+
+def test_online_iforest_state_round_trip(tmp_path):
+    import numpy as np
+
+    from streaming.checkpoint import load_checkpoints, write_checkpoint
+
+    features = ['cpu', 'mem']
+    X = np.random.RandomState(2).rand(500, 2)
+    trained = OnlineIsolationForestDetector(n_trees=10, height=5, seed=1, window_size=64, features=features)
+    trained.learn_many(X[:450])
+    meta = {'features': features, 'n_trees': 10, 'height': 5, 'window_size': 64, 'seed': 1}
+    write_checkpoint(str(tmp_path / 'detector-0000000000.ckpt'), ['*'], trained.state(), meta, 0, True)
+
+    names, state, seq = load_checkpoints(str(tmp_path), meta, prefix='detector')
+    fresh = OnlineIsolationForestDetector(n_trees=10, height=5, seed=1, window_size=64, features=features)
+    fresh.restore(state)
+    assert names == ['*'] and seq == 0
+    np.testing.assert_array_equal(fresh.detect_many(X[450:], 0.5), trained.detect_many(X[450:], 0.5))
+    assert load_checkpoints(str(tmp_path), dict(meta, n_trees=20), prefix='detector')[0] == []
@@ -1,10 +1,12 @@
 import time
-from datetime import timedelta
+from datetime import datetime, timedelta
 from alerting.suppression import (
     FlappingSuppressor,
     Deduplicator,
     MuteList,
-    filter_alerts
+    filter_alerts,
+    filter_alerts_batch,
+    suppression_mask
 )
 
 def test_flapping_suppressor():
@@ -37,4 +39,97 @@ def test_filter_alerts():
     ]
     filtered = filter_alerts(alerts, sup, ded, mutes)
     assert len(filtered) == 1
-    assert filtered[0]['labels']['alertname'] == 'a'
\ No newline at end of file
+    assert filtered[0]['labels']['alertname'] == 'a'
+
+def test_suppression_state_is_bounded():
+    sup = FlappingSuppressor(window=timedelta(seconds=10), threshold=3, max_keys=100)
+    ded = Deduplicator(dedup_window=timedelta(seconds=10), max_keys=100)
+    for i in range(1000):
+        sup.should_suppress(f"id{i}")
+        ded.is_duplicate(f"id{i}")
+    assert len(sup.history) == 100 and len(ded.last_seen) == 100
+    # 가장 오래된 key부터 제거
+    assert "id999" in ded.last_seen and "id0" not in ded.last_seen
+    assert ded.last_seen.evicted == 900
+    # deque 길이는 threshold로 제한
+    for _ in range(10):
+        sup.should_suppress("hot")
+    assert len(sup.history.get("hot")) == 3
+
+def test_expired_keys_are_evicted():
+    ded = Deduplicator(dedup_window=timedelta(seconds=0.5))
+    ded.is_duplicate("old")
+    time.sleep(0.6)
+    ded.is_duplicate("new")
+    assert "old" not in ded.last_seen and "new" in ded.last_seen
+
+def test_mute_list_regex_and_negative_matchers():
+    mutes = MuteList(mutes=[
+        {'matchers': ['alertname="AnomalyDetected"', 'instance=~"db[0-9]+"', 'severity!="critical"']},
+        {'matchers': [{'name': 'team', 'value': 'infra', 'isRegex': False, 'isEqual': False}]}
+    ])
+    base = {'alertname': 'AnomalyDetected', 'team': 'infra'}
+    assert mutes.is_muted({**base, 'instance': 'db12', 'severity': 'warning'})
+    assert not mutes.is_muted({**base, 'instance': 'db12', 'severity': 'critical'})
+    # 정규식은 값 전체에 매치
+    assert not mutes.is_muted({**base, 'instance': 'xdb1'})
+    # label이 없으면 빈 값으로 취급 → team!="infra" 매치
+    assert mutes.is_muted({'alertname': 'other'})
+
+def test_mute_list_time_bounded_mutes_expire():
+    now = datetime.utcnow()
+    mutes = MuteList(mutes=[
+        {'matchers': ['alertname="maint"'], 'startsAt': now - timedelta(hours=1), 'endsAt': now + timedelta(hours=1)},
+        {'matchers': ['alertname="later"'], 'startsAt': (now + timedelta(hours=1)).isoformat() + 'Z'},
+    ])
+    assert mutes.is_muted({'alertname': 'maint'}, now=now)
+    assert not mutes.is_muted({'alertname': 'later'}, now=now)
+    assert mutes.is_muted({'alertname': 'later'}, now=now + timedelta(hours=2))
+    # 만료된 rule은 index에서 제거
+    assert not mutes.is_muted({'alertname': 'maint'}, now=now + timedelta(hours=2))
+    assert len(mutes) == 1
+
+def test_suppression_state_persists_across_processes(tmp_path):
+    from storage.state_store import SQLiteStateStore
+
+    path = str(tmp_path / 'state.db')
+    alerts = [{'labels': {'alertname': 'a'}}, {'labels': {'alertname': 'b'}}]
+    store = SQLiteStateStore(path)
+    sup = FlappingSuppressor(window=timedelta(seconds=60), threshold=3, store=store)
+    ded = Deduplicator(dedup_window=timedelta(seconds=60), store=store)
+    assert len(filter_alerts(alerts, sup, ded, MuteList([]))) == 2
+    store.close()
+
+    # 새 pod: 빈 메모리에서 시작해도 store의 상태로 중복 판정
+    store = SQLiteStateStore(path)
+    ded = Deduplicator(dedup_window=timedelta(seconds=60), store=store)
+    sup = FlappingSuppressor(window=timedelta(seconds=60), threshold=3, store=store)
+    assert len(ded.last_seen) == 0
+    assert filter_alerts(alerts + [{'labels': {'alertname': 'c'}}], sup, ded, MuteList([])) == [
+        {'labels': {'alertname': 'c'}}]
+    assert len(sup.history.get('c')) == 1
+    store.close()
+
+def test_filter_alerts_batch_matches_per_alert_path():
+    import random
+
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    mutes = [{'alertname': 'a3', 'severity': 'info'}, {'matchers': ['instance=~"db-.*"']}]
+
+    def make_state():
+        return (FlappingSuppressor(window=timedelta(minutes=5), threshold=2),
+                Deduplicator(dedup_window=timedelta(seconds=30)), MuteList(mutes))
+
+    per_alert, batch = make_state(), make_state()
+    for step in range(6):
+        alerts = [{'labels': {'alertname': f'a{rng.randrange(8)}', 'severity': rng.choice(['info', 'warn']),
+                              'instance': rng.choice(['db-1', 'web-1', 'web-2'])}} for _ in range(200)]
+        at = now + timedelta(seconds=20 * step)
+        assert filter_alerts(alerts, *per_alert, now=at) == filter_alerts_batch(alerts, *batch, now=at)
+
+    # 컬럼 입력
+    sup, ded, mute_list = make_state()
+    mask = suppression_mask(['x', 'x', 'y'], [{'alertname': 'x'}, {'alertname': 'x'}, {'instance': 'db-2'}],
+                            sup, ded, mute_list, now=now)
+    assert mask == [True, False, False]